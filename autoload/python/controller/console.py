@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+#
+# console.py 
+# Copyright (c) 2017 owl
+#
+
+# Output of the debugged program. The inferior's stdin/stdout/stderr are
+# opened on a pty owned by vim's process; a background thread drains it into
+# a bounded ring of lines, which vim appends to the console buffer in batches
+# from its poll timer. A program printing faster than vim can show it only
+# loses its oldest lines, never grows memory.
+
+import os, pty, select, threading
+from collections import deque
+
+class Console(threading.Thread):
+	def __init__(self, lines=10000, timeout=0.2):
+		threading.Thread.__init__(self, name="sdebug_console")
+		self.daemon = True
+		self.master, self.slave = pty.openpty()
+		self.path = os.ttyname(self.slave)	# opened by the inferior
+		self.timeout = timeout
+		self.lines = deque(maxlen=lines)
+		self.partial = b''
+		self.dropped = 0		# lines which fell out of the ring before being shown
+		self.lock = threading.Lock()
+		self.done = threading.Event()
+
+	def run(self):
+		while not self.done.is_set():
+			ready, _, _ = select.select([self.master], [], [], self.timeout)
+			if not ready:
+				continue
+			try:
+				data = os.read(self.master, 65536)
+			except OSError:
+				data = None
+			if not data:
+				# No program has the terminal open (yet, or any more)
+				self.done.wait(self.timeout)
+				continue
+			self.feed(data)
+
+	def feed(self, data):
+		with self.lock:
+			data = (self.partial + data).replace(b'\r\n', b'\n').split(b'\n')
+			self.partial = data.pop()
+			overflow = len(self.lines) + len(data) - self.lines.maxlen
+			if overflow > 0:
+				self.dropped += overflow
+			self.lines.extend(line.decode('utf-8', 'replace') for line in data)
+
+	def pending(self):
+		return len(self.lines) > 0 or len(self.partial) > 0
+
+	# Take every collected line; returns (lines, number of lines dropped).
+	# An unterminated last line (e.g. a prompt) is shown as it is so far.
+	def drain(self):
+		with self.lock:
+			lines, dropped = list(self.lines), self.dropped
+			if self.partial:
+				lines.append(self.partial.decode('utf-8', 'replace'))
+				self.partial = b''
+			self.lines.clear()
+			self.dropped = 0
+		return lines, dropped
+
+	# The inferior has its own descriptors on the terminal now; keeping ours
+	# would hold the terminal open after the program exited
+	def launched(self):
+		self.close(self.slave)
+		self.slave = None
+
+	# The reader must be gone before the descriptors are closed; their
+	# numbers could otherwise be reused under it
+	def stop(self):
+		self.done.set()
+		if self.is_alive() and threading.current_thread() is not self:
+			self.join()
+		self.close(self.master)
+		self.close(self.slave)
+		self.master = self.slave = None
+
+	def close(self, fd):
+		if fd is None:
+			return
+		try:
+			os.close(fd)
+		except OSError:
+			pass
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+#
+# disasm.py 
+# Copyright (c) 2017 owl
+#
+
+# Disassembly listings, cached per function so stepping through code without
+# source doesn't disassemble the same function again on every stop
+
+import re
+from collections import OrderedDict
+
+ADDRESS = re.compile(r'^\s*(0x[0-9a-fA-F]+)')
+
+class Listing:
+	def __init__(self, key, text):
+		self.key = key
+		self.lines = []
+		self.index = {}		# instruction address -> line number (1 based)
+		for line in text.split("\n"):
+			# Drop lldb's pc marker; the current line is tracked by address
+			if line.startswith("->"):
+				line = "  "+line[2:]
+			match = ADDRESS.match(line)
+			if match:
+				self.index[int(match.group(1), 16)] = len(self.lines)+1
+			self.lines.append(line)
+		self.data = "\n".join(self.lines)
+
+	def line(self, address):
+		return self.index.get(address, 0)
+
+# Bounded LRU of listings keyed by (module uuid, function start, function end)
+class Cache:
+	def __init__(self, size=32):
+		self.size = size
+		self.entries = OrderedDict()
+
+	def get(self, key):
+		listing = self.entries.pop(key, None)
+		if listing is not None:
+			self.entries[key] = listing
+		return listing
+
+	def put(self, key, listing):
+		self.entries.pop(key, None)
+		self.entries[key] = listing
+		while len(self.entries) > self.size:
+			self.entries.popitem(last=False)
+
+	# Drop every listing belonging to an unloaded module
+	def invalidate(self, uuid):
+		for key in list(self.entries):
+			if key[0] == uuid:
+				del self.entries[key]
+
+	def clear(self):
+		self.entries.clear()
@@ -7,7 +7,40 @@
 
 # Locate and load the lldb python module
 
-import os, sys
+import os, sys, json
+
+# Location of the lldb python module, as reported by 'lldb -P', keyed by the
+# lldb executable's path and mtime so startup can skip running lldb
+CACHE = os.path.join(os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache')), 'superdebug', 'lldb_path.json')
+
+def find_executable(name):
+	if os.path.dirname(name):
+		return name if os.path.isfile(name) else None
+	for directory in os.environ.get('PATH', '').split(os.pathsep):
+		path = os.path.join(directory, name)
+		if os.path.isfile(path) and os.access(path, os.X_OK):
+			return path
+	return None
+
+def cache_key(executable):
+	path = os.path.realpath(executable)
+	return "%s:%s"%(path, str(os.path.getmtime(path)))
+
+def cache_load(key):
+	try:
+		with open(CACHE) as f:
+			return json.load(f).get(key)
+	except (IOError, OSError, ValueError):
+		return None
+
+def cache_store(key, path):
+	try:
+		if not os.path.isdir(os.path.dirname(CACHE)):
+			os.makedirs(os.path.dirname(CACHE))
+		with open(CACHE, 'w') as f:
+			json.dump({key: path}, f)
+	except (IOError, OSError):
+		pass
 
 def import_lldb():
 	""" Find and import the lldb modules. This function tries to find the lldb module by:
@@ -31,17 +64,35 @@ def import_lldb():
 	if 'LLDB' in os.environ and os.path.exists(os.environ['LLDB']):
 		lldb_executable = os.environ['LLDB']
 
+	# Try the path 'lldb -P' returned on a previous start of this same lldb
+	key = None
+	executable = find_executable(lldb_executable)
+	if executable:
+		key = cache_key(executable)
+		cached = cache_load(key)
+		if cached and os.path.exists(cached):
+			sys.path.append(cached)
+			try:
+				import lldb
+				return True
+			except ImportError:
+				sys.path.remove(cached)
+
 	# Try using builtin module location support ('lldb -P')
 	from subprocess import check_output, CalledProcessError
 	try:
 		with open(os.devnull, 'w') as fnull:
 			lldb_minus_p_path = check_output("%s -P" % lldb_executable, shell=True, stderr=fnull).strip()
+		if not isinstance(lldb_minus_p_path, str):
+			lldb_minus_p_path = lldb_minus_p_path.decode('utf-8')
 		if not os.path.exists(lldb_minus_p_path):
 			#lldb -P returned invalid path, probably too old
 			pass
 		else:
 			sys.path.append(lldb_minus_p_path)
 			import lldb
+			if key:
+				cache_store(key, lldb_minus_p_path)
 			return True
 	except CalledProcessError:
 		# Cannot run 'lldb -P' to determine location of lldb python module
@@ -64,6 +115,10 @@ def import_lldb():
 	return False
 
 if not import_lldb():
-	import vim
-	vim.command('redraw | echo "%s"' % " Error loading lldb module; vim-lldb will be disabled. Check LLDB installation or set LLDB environment variable.")
+	try:
+		import vim
+		vim.command('redraw | echo "%s"' % " Error loading lldb module; vim-lldb will be disabled. Check LLDB installation or set LLDB environment variable.")
+	except ImportError:
+		# Running outside of vim (debugger worker, batch tools)
+		sys.stderr.write("Error loading lldb module. Check LLDB installation or set LLDB environment variable.\n")
 
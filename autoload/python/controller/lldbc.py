@@ -10,17 +10,44 @@
 # from model_breakpoints import Breakpoint as Breakpoints
 # from model_source import Model as model_src.Model
 
-import sys, os
+import sys, os, threading, time
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 import import_lldb, lldb
+import disasm
+import memory
+import sampler
+import snapshot
+import tracepoint
+import metrics
+try:
+	import Queue as queue
+except ImportError:
+	import queue
 
 import model.backtrace as model_bt
 import model.breakpoint as model_bp
 import model.source as model_src
+import model.variables as model_var
+import model.memory as model_mem
+import model.watch as model_watch
+import model.samples as model_samples
 
 def cerr(data):
 	sys.stderr.write(data)
 
+def mtime(path):
+	try:
+		return os.stat(path).st_mtime
+	except OSError:
+		return None
+
+# Build id of a module file, read without creating a target
+def build_id(path):
+	spec = lldb.SBModuleSpec()
+	spec.SetFileSpec(lldb.SBFileSpec(path))
+	module = lldb.SBModule(spec)
+	return module.GetUUIDString() if module.IsValid() else None
+
 def state_type_to_str(enum):
 	"""Returns the stateType string given an enum."""
 	if enum == lldb.eStateInvalid:
@@ -48,7 +75,47 @@ def state_type_to_str(enum):
 	elif enum == lldb.eStateSuspended:
 		return "suspended"
 	else:
-		return "uknown"
+		return "unknown"
+
+class Listener(threading.Thread):
+	"""Background thread draining an SBListener into a thread-safe queue, so
+	vim never blocks inside WaitForEvent; vim polls the queue from a timer."""
+	def __init__(self, listener, timeout=1):
+		threading.Thread.__init__(self, name="sdebug_listener")
+		self.daemon = True
+		self.listener = listener
+		self.timeout = timeout
+		self.events = queue.Queue()
+		self.sink = None		# queue taking the process states instead of vim (sampler)
+		self.done = threading.Event()
+
+	def run(self):
+		while not self.done.is_set():
+			event = lldb.SBEvent()
+			if not self.listener.WaitForEvent(self.timeout, event):
+				continue
+			if lldb.SBTarget.EventIsTargetEvent(event):
+				if event.GetType() & lldb.SBTarget.eBroadcastBitModulesUnloaded:
+					uuids = []
+					for index in range(lldb.SBTarget.GetNumModulesFromEvent(event)):
+						module = lldb.SBTarget.GetModuleAtIndexFromEvent(index, event)
+						uuids.append(module.GetUUIDString())
+					self.events.put(("unloaded", uuids))
+				continue
+			state = lldb.SBProcess.GetStateFromEvent(event)
+			if state == lldb.eStateInvalid:
+				continue
+			sink = self.sink
+			if sink is not None:
+				sink.put(state)
+			else:
+				self.events.put(("state", state))
+
+	def pending(self):
+		return not self.events.empty()
+
+	def stop(self):
+		self.done.set()
 
 class Controller:
 	def __init__(self):
@@ -60,36 +127,79 @@ class Controller:
 
 		self.pid = -1
 		self.proc_listener = None
-		self.timeoutEvents = 1		# Number of seconds we wait for events
-		self.timeoutEventsFast = 2	# Events which are expected to return fast end up waiting the longest (to avoid multple calls to refresh)
+		self.listener = None
+		self.timeoutEvents = 1		# Number of seconds the listener thread waits for events per iteration
+		self.disasm = disasm.Cache()
+		self.memory = memory.Cache()
+		self.sampler = None
+		self.snap = None		# snapshot shown instead of a live process
+		self.symbols = {}		# pc -> "module`symbol", for samples
+		self.values = {}		# variable path -> SBValue, for the current stop
+		self.values_key = None	# (stop, thread, frame) the values were read at
+		self.stops = 0			# number of stops seen, bumped by refresh()
+		self.program = None		# program and args of the last run, for restart()
+		self.args = []
+		self.build = None		# build id of the program's executable
+		self.stamps = {}		# module path -> modification time when loaded
+		self.loaded = 0			# time the target was created or last relaunched
+		self.tracing = False	# tracepoint callbacks are importable by lldb
+		if metrics.sbcount:
+			metrics.count_sbcalls(lldb)
 
 		self.operation = ""
 
 	def running(self):
 		return self.process != None
 
-	def run(self, program, args=[]):
-		error = lldb.SBError()
-		info = lldb.SBLaunchInfo(args)
+	def profile(self):
+		return metrics.dump()
+
+	def pending(self):
+		return self.listener != None and self.listener.pending()
 
+	def listen(self):
+		self.target.GetBroadcaster().AddListener(self.proc_listener, lldb.SBTarget.eBroadcastBitModulesUnloaded)
+		self.listener = Listener(self.proc_listener, self.timeoutEvents)
+		self.listener.start()
+
+	# tty is the terminal the program's stdin/stdout/stderr are opened on
+	@metrics.timed("ctrl.run")
+	def run(self, program, args=[], tty=None):
+		error = lldb.SBError()
 		if not self.dbg:
 			cerr("error creating target \"%s\"; not initialized."%(program))
 			return
+		self.drop_snapshot()
 
 		# Prevent lldb from crashing by trying to load python files from within dSYM
 		result = lldb.SBCommandReturnObject()
 		self.commander.HandleCommand("settings set target.load-script-from-symbol-file false", result)
 
 		# Create new target (args are supplied when launching)
+		self.loaded = time.time()
 		self.target = self.dbg.CreateTarget(program, None, None, True, error)
 		if not self.target or not error.Success():
 			cerr("error creating target \"%s\". %s"%(program, str(error)))
 			return
+		self.program, self.args = program, args
+		self.stamps = self.module_stamps()
+		module = self.target.FindModule(self.target.GetExecutable())
+		self.build = module.GetUUIDString() if module.IsValid() else None
 		
 		# Initialize all the breakpoints
-		for _, group in model_bp.Model.container.iteritems():
-			for _, item in group.iteritems():
+		for _, group in model_bp.Model.container.items():
+			for _, item in group.items():
 				self.breakpoint_add(item.source, item.line)
+		self.launch(program, args, tty)
+
+	# Launch a process of the current target
+	def launch(self, program, args, tty):
+		error = lldb.SBError()
+		info = lldb.SBLaunchInfo(args)
+		if tty:
+			info.AddOpenFileAction(0, tty, True, False)
+			info.AddOpenFileAction(1, tty, False, True)
+			info.AddOpenFileAction(2, tty, False, True)
 
 		# Launch target process
 		self.process = self.target.Launch(info, error)
@@ -99,7 +209,82 @@ class Controller:
 		self.pid = self.process.GetProcessID()
 		self.proc_listener = lldb.SBListener("process_event_listener")
 		self.process.GetBroadcaster().AddListener(self.proc_listener, lldb.SBProcess.eBroadcastBitStateChanged)
+		self.listen()
+
+	# Run the program again, keeping the target (parsed modules and debug
+	# info, resolved breakpoints) unless the executable was rebuilt. Modules
+	# which changed on disk are dropped from the target, so only they are
+	# loaded again by the launch.
+	@metrics.timed("ctrl.restart")
+	def restart(self, tty=None):
+		if not self.program:
+			cerr("error restarting; nothing was run.")
+			return
+		program, args = self.program, self.args
+		if self.listener:
+			self.listener.stop()
+			self.listener = None
+		if self.process and self.process.IsValid():
+			self.process.Kill()
+		self.process = None
+		self.proc_listener = None
+		self.pid = -1
 
+		executable = self.module_path(self.target.GetExecutable()) if self.target else None
+		if not executable or mtime(executable) != self.stamps.get(executable) or build_id(executable) != self.build:
+			self.unload()
+			self.run(program, args, tty)
+			return
+
+		stale = []
+		for index in range(self.target.GetNumModules()):
+			module = self.target.GetModuleAtIndex(index)
+			path = self.module_path(module.GetFileSpec())
+			stamp = mtime(path)
+			if stamp is None: continue
+			# Modules loaded after the target was created were read at launch
+			if stamp != self.stamps.get(path, stamp) or (path not in self.stamps and stamp > self.loaded):
+				stale.append(module)
+		for module in stale:
+			self.target.RemoveModule(module)
+		if stale:
+			self.disasm.clear()
+			self.symbols = {}
+		self.memory.clear()
+		self.values = {}
+		self.values_key = None
+		model_bt.Model.clear(True)
+
+		# The target kept its breakpoints; only apply changes made meanwhile
+		ids = set()
+		for _, group in model_bp.Model.container.items():
+			for _, item in group.items():
+				breakpoint = self.target.FindBreakpointByID(item.id)
+				if not breakpoint or not breakpoint.IsValid():
+					self.breakpoint_add(item.source, item.line)
+				ids.add(item.id)
+		for index in reversed(range(self.target.GetNumBreakpoints())):
+			breakpoint = self.target.GetBreakpointAtIndex(index)
+			if breakpoint.GetID() not in ids:
+				self.target.BreakpointDelete(breakpoint.GetID())
+
+		self.loaded = time.time()
+		self.stamps = self.module_stamps()
+		self.launch(program, args, tty)
+
+	def module_path(self, spec):
+		return os.path.join(spec.GetDirectory() or "", spec.GetFilename() or "")
+
+	# Modification times of the target's modules, to tell which were rebuilt
+	def module_stamps(self):
+		executable = self.module_path(self.target.GetExecutable())
+		stamps = {executable: mtime(executable)}
+		for index in range(self.target.GetNumModules()):
+			path = self.module_path(self.target.GetModuleAtIndex(index).GetFileSpec())
+			stamps[path] = mtime(path)
+		return stamps
+
+	@metrics.timed("ctrl.attach")
 	def attach(self, pid=-1, pname=""):
 		if not pid and not pname:
 			cerr("error attaching; nothing to attach to.")
@@ -107,6 +292,7 @@ class Controller:
 		if self.process:
 			cerr("error attaching to process \"%s\"; already attached."%(pname if pname else str(pid)))
 			return
+		self.drop_snapshot()
 
 		error = lldb.SBError()
 		self.target = self.dbg.CreateTarget('')
@@ -116,25 +302,285 @@ class Controller:
 		elif pname:
 			self.process = self.target.AttachToProcessWithName(self.proc_listener, pname, False, error)
 		if not error.Success():
-			cerr("error attaching to process \"%s\". %s" %(program if program else str(pid), str(error)))
+			cerr("error attaching to process \"%s\". %s" %(pname if pname else str(pid), str(error)))
 			return
+		self.listen()
+
+	# Post-mortem debugging of a core file. Symbols are loaded on demand, so
+	# only the frames of the crashed and unfolded threads get symbolicated.
+	@metrics.timed("ctrl.load_core")
+	def load_core(self, program, core):
+		if self.process:
+			cerr("error loading core \"%s\"; already debugging a process."%(core))
+			return
+		if not self.dbg:
+			cerr("error creating target \"%s\"; not initialized."%(program))
+			return
+		self.drop_snapshot()
+
+		result = lldb.SBCommandReturnObject()
+		self.commander.HandleCommand("settings set target.load-script-from-symbol-file false", result)
+
+		# Symbols of the core's target are read on demand; later targets preload
+		error = lldb.SBError()
+		preload = self.setting("target.preload-symbols", "false")
+		try:
+			self.target = self.dbg.CreateTarget(program, None, None, True, error)
+		finally:
+			self.setting("target.preload-symbols", preload)
+		if not self.target or not error.Success():
+			cerr("error creating target \"%s\". %s"%(program, str(error)))
+			return
+		self.process = self.target.LoadCore(core)
+		if not self.process or not self.process.IsValid():
+			cerr("error loading core \"%s\"."%(core))
+			self.process = None
+			return
+		self.pid = self.process.GetProcessID()
+		# A core never changes state; show it as stopped right away
+		self.stopped()
+
+	@metrics.timed("ctrl.detach")
+	def detach(self):
+		if not self.process:
+			cerr("error detaching; no running process.")
+			return
+		if self.sampler:
+			self.sampler.stop()
+			self.sampler = None
+		if self.listener:
+			self.listener.stop()
+			self.listener = None
+		self.process.Detach()
+		self.process = None
+		self.pid = -1
+		self.memory.clear()
+
+	# Attach, copy the stacks of all threads and detach again right away; the
+	# snapshot is symbolicated afterwards and browsed like a stopped process
+	@metrics.timed("ctrl.snapshot")
+	def snapshot(self, pid=-1, pname=""):
+		if not pid and not pname:
+			cerr("error taking snapshot; nothing to attach to.")
+			return
+		if self.process:
+			cerr("error taking snapshot of \"%s\"; already attached."%(pname if pname else str(pid)))
+			return
+		self.drop_snapshot()
+		# Symbols are read on demand by the snapshot's targets only
+		preload = self.setting("target.preload-symbols", "false")
+		try:
+			snap = snapshot.capture(self.dbg, pid, pname, model_bt.Model.frame_limit)
+			print(snap.report())
+			self.target = snapshot.symbolicate(self.dbg, snap)
+		except RuntimeError as error:
+			cerr(str(error))
+			return
+		finally:
+			self.setting("target.preload-symbols", preload)
+		self.snap = snap
+		self.snapshot_backtrace()
+		return snap.timings
+
+	# Leave a snapshot before debugging something else; its frames and offline
+	# target must not be mistaken for those of a live process
+	def drop_snapshot(self):
+		if not self.snap:
+			return
+		self.snap = None
+		if self.target:
+			self.dbg.DeleteTarget(self.target)
+			self.target = None
+		self.disasm.clear()
+		self.symbols = {}
+		model_bt.Model.clear(True)
+
+	def snapshot_backtrace(self):
+		model_bt.Model.begin()
+		for item in self.snap.threads:
+			thread = model_bt.Model.thread(item.id)
+			thread.default = item.id == self.snap.selected
+			thread.number = item.number
+			thread.name = model_bt.text(item.name)
+			if thread.default:
+				model_bt.Model.selected = thread
+				model_bt.Model.expanded.add(thread.id)
+			if thread.default or thread.id in model_bt.Model.expanded:
+				self.load_snapshot_frames(thread)
+			else:
+				thread.loaded = False
+		model_bt.Model.end()
+		if model_bt.Model.selected and model_bt.Model.selected.selected:
+			self.update_source()
+
+	# Resolve the captured PCs of a thread with the offline target
+	@metrics.timed("ctrl.load_snapshot_frames")
+	def load_snapshot_frames(self, thread):
+		pcs = []
+		for item in self.snap.threads:
+			if item.id == thread.id:
+				pcs = item.pcs
+		limit = model_bt.Model.limit(thread.id)
+		delta = model_bt.Model.delta
+		for frame in thread.frames:
+			delta.frame(thread.id, frame.number)
+		thread.frames = []
+		thread.selected = None
+		for number, pc in enumerate(pcs[:limit]):
+			frame = thread.frame()
+			frame.number = number
+			delta.frame(thread.id, number)
+			frame.pc = pc
+			frame.default = thread.default and number == 0
+			if frame.default:
+				thread.selected = frame
+			address = self.target.ResolveLoadAddress(pc)
+			frame.module = model_bt.text(address.GetModule().GetFileSpec().GetFilename())
+			symbol = address.GetSymbol()
+			frame.name = model_bt.text(symbol.GetName() if symbol.IsValid() and symbol.GetName() else "0x%x"%(pc))
+			entry = address.GetLineEntry()
+			spec = entry.GetFileSpec()
+			frame.file = model_bt.text(spec.GetFilename())
+			frame.path = frame.file
+			frame.line = entry.GetLine()
+			if spec.GetDirectory() and frame.line:
+				frame.path = model_bt.text(spec.GetDirectory()+"/"+frame.file)
+				frame.column = max(entry.GetColumn()-1, 0)
+				frame.disassembled = False
+			else:
+				# No line information; the process is gone, so there is nothing to disassemble
+				frame.disassembled = True
+				frame.data = "%s`%s (0x%x); no source available"%(frame.module, frame.name, pc)
+				frame.line = 1
+		thread.more = len(pcs) > limit
+		thread.loaded = True
+		delta.changed.add(thread.id)
+		model_bt.Model.changed = True
+
+	def select_snapshot_frame(self, frame):
+		thread = frame.thread
+		previous = model_bt.Model.selected
+		if previous is thread and thread.selected is frame:
+			return False
+		delta = model_bt.Model.delta
+		if previous:
+			previous.default = False
+			delta.changed.add(previous.id)
+			if previous.selected:
+				previous.selected.default = False
+				delta.frame(previous.id, previous.selected.number)
+		thread.default = True
+		delta.changed.add(thread.id)
+		if thread.selected:
+			thread.selected.default = False
+			delta.frame(thread.id, thread.selected.number)
+		frame.default = True
+		delta.frame(thread.id, frame.number)
+		thread.selected = frame
+		model_bt.Model.selected = thread
+		model_bt.Model.navigated = -1
+		model_bt.Model.changed = True
+		self.update_source()
+		return True
+
+	# Change a debugger setting; returns the previous value, for restoring it
+	def setting(self, name, value):
+		instance = self.dbg.GetInstanceName()
+		values = lldb.SBDebugger.GetInternalVariableValue(name, instance)
+		previous = values.GetStringAtIndex(0) if values and values.GetSize() else None
+		if value is not None:
+			lldb.SBDebugger.SetInternalVariable(name, value, instance)
+		return previous
+
+	# Drop the target (e.g. a core) but keep the debugger for the next one
+	def unload(self):
+		if self.sampler:
+			self.sampler.stop()
+			self.sampler = None
+		self.snap = None		# snapshot shown instead of a live process
+		self.symbols = {}
+		if self.listener:
+			self.listener.stop()
+			self.listener = None
+		if self.target:
+			self.dbg.DeleteTarget(self.target)
+		self.disasm.clear()
+		self.memory.clear()
+		tracepoint.clear()
+		self.target = None
+		self.process = None
+		self.proc_listener = None
+		self.pid = -1
+		model_bt.Model.clear(True)
 
 	def quit(self):
+		if self.sampler:
+			self.sampler.stop()
+			self.sampler = None
+		self.snap = None		# snapshot shown instead of a live process
+		self.symbols = {}
+		if self.listener:
+			self.listener.stop()
+			self.listener = None
 		self.dbg.Terminate()
+		self.tracing = False
+		self.program = None
+		self.disasm.clear()
+		self.memory.clear()
+		tracepoint.clear()
 		self.target = None
 		self.process = None
 		self.proc_listener = None
 		self.pid = -1
 		model_bp.Model.unset_all()
 
-	def pause(self, program):
+	@metrics.timed("ctrl.pause")
+	def pause(self):
 		if not self.process:
 			cerr("error pausing; no running process.")
 			return
+		state = self.state()
 		if state in ["running"]:
 			self.process.Stop()
-			self.operatoin = "pause"
+			self.operation = "pause"
+
+	# Profile the process by sampling every thread's stack hz times a second
+	# for a number of seconds, in the background
+	@metrics.timed("ctrl.sample")
+	def sample(self, hz, seconds):
+		if not self.process or not self.listener:
+			cerr("error sampling; no running process.")
+			return
+		if self.sampler and self.sampler.is_alive():
+			cerr("error sampling; already sampling.")
+			return
+		self.sampler = sampler.Sampler(self.process, self.listener, hz, seconds)
+		self.sampler.start()
+
+	# Symbolicate the recorded stacks (each pc once) into the samples model
+	@metrics.timed("ctrl.load_samples")
+	def load_samples(self):
+		if not self.sampler:
+			return
+		stacks = []
+		for pcs, count in self.sampler.stacks.items():
+			stacks.append((tuple(self.symbol(pc) for pc in pcs), count))
+		model_samples.Model.load(stacks, self.sampler.count, self.sampler.paused * 1000.0)
+
+	def symbol(self, pc):
+		name = self.symbols.get(pc)
+		if name is None:
+			address = self.target.ResolveLoadAddress(pc)
+			module = address.GetModule().GetFileSpec().GetFilename() or "?"
+			symbol = address.GetSymbol()
+			if symbol.IsValid() and symbol.GetName():
+				name = model_bt.text(module+"`"+symbol.GetName())
+			else:
+				name = model_bt.text("%s`0x%x"%(module, pc))
+			self.symbols[pc] = name
+		return name
 
+	@metrics.timed("ctrl.resume")
 	def resume(self):
 		if not self.process:
 			cerr("error resuming; no running process.")
@@ -144,63 +590,404 @@ class Controller:
 			self.process.Continue()
 			self.operation = "continue"
 
+	@metrics.timed("ctrl.backtrace")
 	def backtrace(self):
 		if not self.process:
 			cerr("error getting backtrace; no running process.")
 			return
 
-		model_bt.Model.clear()
+		# Only thread headers are collected here; frames are materialized for
+		# the selected and unfolded threads (see load_frames). Threads are
+		# updated in place so unchanged threads and frames are reused.
+		model_bt.Model.begin()
 		threadSelected = self.process.GetSelectedThread() 
-		frameSelected = threadSelected.GetSelectedFrame()
 		thread_ids = []
 		for _thread in self.process:
-			thread = model_bt.Model.thread()
+			thread = model_bt.Model.thread(_thread.GetThreadID())
+			header = (thread.default, thread.number, thread.name)
 			thread.default = True if threadSelected == _thread else False
 			thread.number = _thread.GetIndexID()
-			thread.id = _thread.GetThreadID()
+			thread.name = model_bt.text(_thread.GetName())
+			if header != (thread.default, thread.number, thread.name):
+				model_bt.Model.delta.changed.add(thread.id)
 			if thread.default:
 				model_bt.Model.selected = thread
 				if thread.id not in model_bt.Model.expanded:
 					model_bt.Model.fold(thread.id)
-			thread_ids.append(_thread.GetThreadID())
+			thread_ids.append(thread.id)
+
+			if thread.default or thread.id in model_bt.Model.expanded:
+				self.load_frames(thread, _thread)
+			else:
+				# Frames of folded threads are stale; they're compared again on unfold
+				thread.loaded = False
+			if model_bt.Model.aggregate:
+				model_bt.Model.group(self.stack_key(thread, _thread), thread)
+		model_bt.Model.end()
+
+		# Unfolded groups show the frames of their first thread
+		for group in model_bt.Model.groups:
+			if group.key in model_bt.Model.expanded_groups and not group.threads[0].loaded:
+				self.load_frames(group.threads[0])
+
+		# Cleanup disappeared threads from list
+		model_bt.Model.expanded.intersection_update(thread_ids)
+		for id in list(model_bt.Model.limits):
+			if id not in thread_ids:
+				del model_bt.Model.limits[id]
+
+	# Identify a thread's stack by the PCs of its top frames; only the PCs are
+	# read, nothing is symbolicated. The key is the PCs themselves, so stacks
+	# are told apart even when their hashes collide. A thread parked at the
+	# same pc and stack address as at the last stop keeps its key without
+	# walking the stack.
+	def stack_key(self, thread, _thread):
+		_frame = _thread.GetFrameAtIndex(0)
+		top = (_frame.GetPC(), _frame.GetCFA())
+		if thread.stack and thread.stack[0] == top:
+			return thread.stack[1]
+		limit = model_bt.Model.frame_limit
+		if thread.loaded:
+			pcs = tuple(frame.pc for frame in thread.frames[:limit])
+		else:
+			count = min(_thread.GetNumFrames(), limit)
+			pcs = tuple(_thread.GetFrameAtIndex(index).GetPC() for index in range(count))
+		thread.stack = (top, pcs)
+		return thread.stack[1]
+
+	# Fetch the top frames of a thread (up to Model.limit); used when a
+	# thread is selected, unfolded or asked to "load more". Frames whose
+	# PC/CFA didn't change are kept as they are.
+	@metrics.timed("ctrl.load_frames")
+	def load_frames(self, thread, _thread=None):
+		if self.snap:
+			return self.load_snapshot_frames(thread)
+		if not self.process:
+			cerr("error loading frames; no running process.")
+			return
+		if not _thread:
+			_thread = self.process.GetThreadByID(thread.id)
+		if not _thread or not _thread.IsValid():
+			cerr("error loading frames; thread %s not found."%(str(thread.id)))
+			return
 
-			for _frame in _thread:
-				frame = thread.frame()
-				frame.default = True if thread.default and frameSelected.GetFrameID() == _frame.GetFrameID() else False
-				frame.number = _frame.GetFrameID()
-				frame.module = _frame.GetModule().GetFileSpec().GetFilename()
+		selected = -1
+		if thread.default:
+			selected = _thread.GetSelectedFrame().GetFrameID()
+		limit = max(model_bt.Model.limit(thread.id), selected+1)
+		delta = model_bt.Model.delta
 
+		frames = thread.frames
+		thread.frames = []
+		thread.selected = None
+		for index in range(limit):
+			_frame = _thread.GetFrameAtIndex(index)
+			if not _frame.IsValid():
+				break
+			frame = frames[index] if index < len(frames) else None
+			if frame and frame.pc == _frame.GetPC() and frame.cfa == _frame.GetCFA():
+				thread.frames.append(frame)
+				default = frame.number == selected
+				if frame.default != default:
+					frame.default = default
+					delta.frame(thread.id, frame.number)
 				if frame.default:
 					thread.selected = frame
+					if frame.disassembled and not frame.data:
+						self.disassemble(frame, _frame)
+			else:
+				self.load_frame(thread, _frame, selected)
+				delta.frame(thread.id, index)
+		for frame in frames[len(thread.frames):]:
+			delta.frame(thread.id, frame.number)
 
-				function = _frame.GetDisplayFunctionName()
-				frame.path = _frame.GetLineEntry().GetFileSpec().GetFilename()
-				if function and _frame.GetLineEntry().GetFileSpec().GetDirectory():
-					frame.name = _frame.GetFunctionName()
-					frame.file = _frame.GetLineEntry().GetFileSpec().GetFilename()
-					frame.path = _frame.GetLineEntry().GetFileSpec().GetDirectory()+"/"+_frame.GetLineEntry().GetFileSpec().GetFilename()
-					frame.line = _frame.GetLineEntry().GetLine()
-					frame.column = _frame.GetLineEntry().GetColumn()-1
-					if not frame.name: frame.name = "<null>"
-					frame.disassembled = False
-				else:
-					# Function is undefined; Load module/assembly
-					frame.name = _frame.GetSymbol().GetName()
-					frame.path = _frame.GetLineEntry().GetFileSpec().GetFilename()
-					#TODO: get address locations for disassembly
-					frame.line = _frame.GetLineEntry().GetLine()
-					# frame.address = _frame.GetPCAddress()
-					# print(str(frame.address))
-					if frame.default:
-						frame.data = _frame.Disassemble()
-					frame.disassembled = True
-					if not frame.name: frame.name = "<null2>"
+		# Peek one frame past the cap to know whether there is more to load
+		more = _thread.GetFrameAtIndex(limit).IsValid()
+		if more != thread.more:
+			thread.more = more
+			delta.changed.add(thread.id)
+		thread.loaded = True
 
-		# Cleanup disappeared threads from list
-		for expanded in model_bt.Model.expanded:
-			if expanded not in thread_ids:
-				model_bt.Model.expanded.remove(expanded)
+	def load_frame(self, thread, _frame, selected=-1):
+		frame = thread.frame()
+		frame.number = _frame.GetFrameID()
+		frame.pc = _frame.GetPC()
+		frame.cfa = _frame.GetCFA()
+		frame.default = frame.number == selected
+		frame.module = model_bt.text(_frame.GetModule().GetFileSpec().GetFilename())
+		if frame.default:
+			thread.selected = frame
+
+		function = _frame.GetDisplayFunctionName()
+		entry = _frame.GetLineEntry()
+		spec = entry.GetFileSpec()
+		directory = spec.GetDirectory()
+		frame.file = model_bt.text(spec.GetFilename())
+		frame.path = frame.file
+		frame.line = entry.GetLine()
+		if function and directory:
+			frame.name = model_bt.text(_frame.GetFunctionName())
+			frame.path = model_bt.text(directory+"/"+frame.file)
+			frame.column = entry.GetColumn()-1
+			if not frame.name: frame.name = "<null>"
+			frame.disassembled = False
+		else:
+			# Function is undefined; Load module/assembly
+			frame.name = model_bt.text(_frame.GetSymbol().GetName())
+			frame.disassembled = True
+			if frame.default:
+				self.disassemble(frame, _frame)
+			if not frame.name: frame.name = "<null2>"
+		return frame
+
+	# Fill in the frame's disassembly from the per-function listing cache
+	def disassemble(self, frame, _frame):
+		function = _frame.GetFunction()
+		if function.IsValid():
+			start, end = function.GetStartAddress(), function.GetEndAddress()
+		else:
+			start, end = _frame.GetSymbol().GetStartAddress(), _frame.GetSymbol().GetEndAddress()
+		start = start.GetLoadAddress(self.target)
+		end = end.GetLoadAddress(self.target)
+		frame.addressStart = start
+		frame.addressEnd = end
+		frame.addressCurrent = _frame.GetPC()
+
+		if start == lldb.LLDB_INVALID_ADDRESS or end == lldb.LLDB_INVALID_ADDRESS:
+			# No function bounds; nothing to key the cache on
+			listing = disasm.Listing("", _frame.Disassemble())
+		else:
+			key = (_frame.GetModule().GetUUIDString(), start, end)
+			listing = self.disasm.get(key)
+			if not listing:
+				listing = disasm.Listing("%s:%x-%x"%key, _frame.Disassemble())
+				self.disasm.put(key, listing)
+		frame.listing = listing.key
+		frame.data = listing.data
+		frame.line = listing.line(frame.addressCurrent)
 
+	# Read the locals/arguments of the selected frame in one go; children
+	# are only read for expanded variables, one page at a time
+	@metrics.timed("ctrl.variables")
+	def variables(self):
+		if not self.process:
+			cerr("error reading variables; no running process.")
+			return
+		_thread = self.process.GetSelectedThread()
+		_frame = _thread.GetSelectedFrame()
+		key = (self.stops, _thread.GetThreadID(), _frame.GetFrameID())
+		if key == self.values_key:
+			return
+		self.values_key = key
+		model_var.Model.clear()
+		self.values = {}
+		if not _frame.IsValid():
+			return
+		names = {}
+		values = _frame.GetVariables(True, True, False, True)
+		for index in range(values.GetSize()):
+			_value = values.GetValueAtIndex(index)
+			# Shadowed names get a suffix, so paths stay unique
+			name = _value.GetName() or ""
+			path = name if name not in names else "%s#%i"%(name, names[name])
+			names[name] = names.get(name, 0) + 1
+			self.load_variable(model_var.Model.root(path), _value)
+
+	def load_variable(self, variable, _value):
+		self.values[variable.path] = _value
+		variable.name = model_bt.text(_value.GetName())
+		variable.type = model_bt.text(_value.GetTypeName())
+		variable.value = _value.GetValue() or ""
+		variable.summary = _value.GetSummary() or ""
+		self.count_children(variable, _value)
+		if variable.count and variable.path in model_var.Model.expanded:
+			self.load_children(variable)
+
+	# Count children only up to the page limit (and one more, to tell if there
+	# are more); lldb walks lists and maps to count their synthetic children
+	def count_children(self, variable, _value):
+		limit = model_var.Model.limit(variable.path)
+		count = _value.GetNumChildren(limit + 1)
+		variable.capped = count > limit
+		variable.count = min(count, limit)
+
+	# Read the next children of a variable, up to its page limit
+	def load_children(self, variable):
+		_value = self.values.get(variable.path)
+		if _value is None:
+			cerr("error reading variable %s; value not available."%(variable.path))
+			return
+		limit = model_var.Model.limit(variable.path)
+		if variable.capped and variable.count < limit:
+			self.count_children(variable, _value)
+		for index in range(len(variable.children), min(variable.count, limit)):
+			self.load_variable(variable.child(index), _value.GetChildAtIndex(index))
+		model_var.Model.changed = True
+
+	@metrics.timed("ctrl.expand_variable")
+	def expand_variable(self, path):
+		variable = model_var.Model.find(path)
+		if not variable:
+			cerr("error expanding variable %s; not found."%(path))
+			return
+		model_var.Model.fold(path)
+		if path in model_var.Model.expanded and not variable.children:
+			self.load_children(variable)
+
+	@metrics.timed("ctrl.more_variables")
+	def more_variables(self, path):
+		variable = model_var.Model.find(path)
+		if not variable:
+			cerr("error paging variable %s; not found."%(path))
+			return
+		model_var.Model.extend(path)
+		self.load_children(variable)
+
+	@metrics.timed("ctrl.watch_add")
+	def watch_add(self, expression):
+		model_watch.Model.add(expression)
+		if self.process:
+			self.evaluate_watches()
+
+	def watch_remove(self, index):
+		model_watch.Model.remove(index)
+
+	# Evaluate the watch expressions in the selected frame. Every watch is
+	# evaluated at most once per stop and frame; constant expressions only
+	# once, and plain variable paths are read without the expression evaluator.
+	# Expressions whose variable paths are known are only evaluated again when
+	# the frame (thread, CFA, function) or one of those paths' values changed.
+	@metrics.timed("ctrl.evaluate_watches")
+	def evaluate_watches(self):
+		if not self.process or not model_watch.Model.watches:
+			return
+		_thread = self.process.GetSelectedThread()
+		_frame = _thread.GetSelectedFrame()
+		if not _frame.IsValid():
+			return
+		key = (self.stops, _thread.GetThreadID(), _frame.GetFrameID())
+		scope = (key[1], _frame.GetCFA(), _frame.GetFunctionName())
+		options = None
+		for watch in model_watch.Model.watches:
+			if watch.key == key:
+				continue
+			if watch.kind == "constant" and watch.key is not None and not watch.error:
+				continue
+			# Changes are relative to the value at the previous stop
+			if watch.key is not None and watch.key[0] != self.stops:
+				watch.previous = watch.value
+			if watch.kind == "path":
+				_value = _frame.GetValueForVariablePath(watch.expression)
+			else:
+				inputs = self.watch_inputs(_frame, watch.paths) if watch.paths is not None else None
+				if inputs is not None and inputs == watch.inputs and scope == watch.scope \
+						and not watch.error and not watch.stale:
+					watch.changed = watch.previous is not None and watch.value != watch.previous
+					watch.key = key
+					continue
+				if options is None:
+					options = self.expression_options()
+				_value = _frame.EvaluateExpression(watch.expression, options)
+				watch.inputs = inputs
+				watch.scope = scope
+			self.load_watch(watch, _value)
+			watch.key = key
+		model_watch.Model.changed = True
+
+	# Values of the variable paths an expression reads, or None if any can't be
+	# read or is an aggregate (struct, array, class): its contents can change
+	# while its summary doesn't, and operators on it may read past its bytes
+	def watch_inputs(self, _frame, paths):
+		inputs = []
+		for path in paths:
+			_value = _frame.GetValueForVariablePath(path)
+			if not _value.IsValid() or not _value.GetError().Success():
+				return None
+			value = _value.GetValue()
+			if value is None:
+				return None
+			inputs.append(value)
+		return inputs
+
+	def expression_options(self):
+		options = lldb.SBExpressionOptions()
+		options.SetTimeoutInMicroSeconds(model_watch.Model.timeout * 1000)
+		# Retrying on all threads would run the expression a second time
+		options.SetTryAllThreads(False)
+		options.SetUnwindOnError(True)
+		options.SetIgnoreBreakpoints(True)
+		return options
+
+	def load_watch(self, watch, _value):
+		error = _value.GetError() if _value.IsValid() else None
+		if error is not None and error.Success():
+			watch.value = _value.GetValue() or _value.GetSummary() or ""
+			watch.error = ""
+			watch.stale = False
+		elif error is not None and error.GetError() == lldb.eExpressionTimedOut and watch.value:
+			# Keep showing the last value rather than nothing
+			watch.stale = True
+		else:
+			watch.value = ""
+			watch.error = str(error) if error is not None else "no value"
+			watch.stale = False
+		watch.changed = watch.previous is not None and watch.value != watch.previous
+
+	# Read the rows shown by the memory view; address may be a number or an
+	# expression evaluated in the selected frame. Only pages missing from the
+	# page cache are read from the inferior.
+	@metrics.timed("ctrl.read_memory")
+	def read_memory(self, address=None, rows=None):
+		if not self.process:
+			cerr("error reading memory; no running process.")
+			return
+		if address is not None:
+			address = self.evaluate_address(address)
+			if address is None:
+				return
+		model_mem.Model.show(address, rows)
+		pages = []
+		start, end = model_mem.Model.address, model_mem.Model.end()
+		for address in range(memory.page_of(start), end, memory.PAGE):
+			page = self.memory.get(address)
+			if page is None:
+				page = self.read_page(address)
+				self.memory.put(page)
+			pages.append((page.address, memory.PAGE, page.data))
+		model_mem.Model.pages = pages
+		model_mem.Model.changed = True
+
+	def read_page(self, address):
+		error = lldb.SBError()
+		data = self.process.ReadMemory(address, memory.PAGE, error)
+		if not error.Success():
+			data = None
+		writable = self.memory.region(address)
+		if writable is None:
+			region = lldb.SBMemoryRegionInfo()
+			error = self.process.GetMemoryRegionInfo(address, region)
+			if error.Success():
+				writable = region.IsWritable()
+				self.memory.regions.append((region.GetRegionBase(), region.GetRegionEnd(), writable))
+			else:
+				writable = True
+		return memory.Page(address, data, writable)
+
+	def evaluate_address(self, expression):
+		try:
+			return int(expression, 0)
+		except TypeError:
+			return expression	# already a number
+		except ValueError:
+			pass
+		_frame = self.process.GetSelectedThread().GetSelectedFrame()
+		value = _frame.EvaluateExpression(expression)
+		if not value.IsValid() or not value.GetError().Success():
+			cerr("error evaluating address %s; %s"%(expression, str(value.GetError())))
+			return None
+		return value.GetValueAsUnsigned()
+
+	@metrics.timed("ctrl.breakpoint_add")
 	def breakpoint_add(self, path, line):
 		if not self.target:
 			cerr("error creating breakpoint %s:%s; no target set."%(path,str(line)))
@@ -217,11 +1004,16 @@ class Controller:
 			cerr("error creating breakpoint %s:%s; breakpoint is null"%(path,str(line)))
 			return
 		bp.id = breakpoint.GetID()
+		if bp.conditional():
+			self.breakpoint_options(breakpoint, bp)
+		if bp.message:
+			self.trace_setup(breakpoint, bp)
 		# location = breakpoint.GetLocationAtIndex(0)
 		# if not location:
 			# cerr("error finding breakpoint location.")
 			# return
 	
+	@metrics.timed("ctrl.breakpoint_delete")
 	def breakpoint_delete(self, path, line):
 		if not self.target:
 			cerr("error deleting breakpoint %s:%s; no target set."%(path,str(line)))
@@ -230,16 +1022,61 @@ class Controller:
 		if not bp:
 			cerr("error deleting breakpoint %s:%s; breakpoint is null"%(path,str(line)))
 			return
+		tracepoint.unregister(bp.id)
 		self.target.BreakpointDelete(bp.id)
-		
+
+	# Apply the condition/ignore count/thread filter of an existing breakpoint
+	@metrics.timed("ctrl.breakpoint_update")
+	def breakpoint_update(self, path, line):
+		if not self.target:
+			cerr("error updating breakpoint %s:%s; no target set."%(path,str(line)))
+			return
+		bp = model_bp.Model.get(path, line)
+		if not bp:
+			cerr("error updating breakpoint %s:%s; breakpoint is null"%(path,str(line)))
+			return
+		breakpoint = self.target.FindBreakpointByID(bp.id)
+		if not breakpoint or not breakpoint.IsValid():
+			cerr("error updating breakpoint %s:%s; breakpoint not valid"%(path,str(line)))
+			return
+		self.breakpoint_options(breakpoint, bp)
+
+	# Hits which don't pass the filters are skipped inside lldb; vim never sees them
+	def breakpoint_options(self, breakpoint, bp):
+		breakpoint.SetCondition(bp.condition)
+		breakpoint.SetIgnoreCount(bp.ignore)
+		breakpoint.SetThreadID(bp.thread or lldb.LLDB_INVALID_THREAD_ID)
+
+	# Log bp.message on every hit of the breakpoint instead of stopping
+	def trace_setup(self, breakpoint, bp):
+		if not self.tracing:
+			# The callback runs in lldb's script interpreter; share this module
+			# with it (under the name lldb imports, whatever package it is in here)
+			sys.modules['tracepoint'] = tracepoint
+			result = lldb.SBCommandReturnObject()
+			self.commander.HandleCommand("script import tracepoint", result)
+			self.tracing = True
+		tracepoint.options = self.expression_options()
+		tracepoint.register(bp.id, bp.source, bp.line, bp.message)
+		breakpoint.SetScriptCallbackFunction("tracepoint.hit")
+
+	# Tracepoint output and hit counts collected since the last call
+	@metrics.timed("ctrl.trace")
+	def trace(self):
+		return tracepoint.drain()
+
 
 	def breakpoints_clear(self):
 		if not self.target:
 			cerr("error clearing breakpoints; no target set.")
 			return
 		self.target.DeleteAllBreakpoints()
+		tracepoint.clear()
 	
+	@metrics.timed("ctrl.select_frame")
 	def select_frame(self, obj):
+		if self.snap and not isinstance(obj, model_bt.Thread):
+			return self.select_snapshot_frame(obj)
 		if not self.process:
 			cerr("error selecting frame; no running process.")
 			return
@@ -274,14 +1111,16 @@ class Controller:
 			self.update_source()
 		return changed
 
+	@metrics.timed("ctrl.update_source")
 	def update_source(self):
 		frame = model_bt.Model.selected.selected
 		model_src.Model.clear()
 		if not frame.disassembled:
 			model_src.Model.set_source(frame.path, frame.line, frame.column)
 		else:
-			model_src.Model.set_disasm(frame.name, frame.data, frame.line)
+			model_src.Model.set_disasm(frame.name, frame.data, frame.line, frame.listing)
 
+	@metrics.timed("ctrl.step_over")
 	def step_over(self):
 		if not self.process:
 			cerr("error stepping over; no running process.")
@@ -291,6 +1130,7 @@ class Controller:
 			self.process.GetSelectedThread().StepOver()
 			self.operation = "stepping"
 
+	@metrics.timed("ctrl.step_into")
 	def step_into(self):
 		if not self.process:
 			cerr("error stepping into; no running process.")
@@ -300,6 +1140,7 @@ class Controller:
 			self.process.GetSelectedThread().StepInto()
 			self.operation = "stepping"
 
+	@metrics.timed("ctrl.step_out")
 	def step_out(self):
 		if not self.process:
 			cerr("error stepping out; no running process.")
@@ -312,6 +1153,7 @@ class Controller:
 	def state(self):
 		return state_type_to_str(self.process.GetState())
 
+	@metrics.timed("ctrl.refresh")
 	def refresh(self, timeout=0, nesting=0):
 		if nesting > 3: pass
 
@@ -344,8 +1186,7 @@ class Controller:
 		elif state == "launching":
 			print('r:'+state)
 		elif state == "stopped":
-			self.operation = ""
-			self.backtrace()
+			self.stopped()
 		elif state == "running":
 			print('r:'+state)
 			if self.operation == "stepping":
@@ -354,12 +1195,10 @@ class Controller:
 				print('r:'+state)
 		elif state == "stepping":
 			print('r:'+state)
-			self.operation = ""
-			self.backtrace()
+			self.stopped()
 		elif state == "crashed":
 			print('r:'+state)
-			self.operation = ""
-			self.backtrace()
+			self.stopped()
 		elif state == "detached":
 			print('r:'+state)
 		elif state == "exited":
@@ -368,42 +1207,47 @@ class Controller:
 			print('r:'+state)
 		return state
 
+	# Common handling of every state in which the process is stopped
+	def stopped(self):
+		self.operation = ""
+		self.stops += 1
+		self.memory.invalidate()
+		self.backtrace()
+		self.evaluate_watches()
+
+	@metrics.timed("ctrl.process_events")
 	def process_events(self, timeout=0):
-		if not self.process:
-			return
-		event = lldb.SBEvent()
-		eventCount = 0
-		state = self.process.GetState()
-		state_new = ''
-		done = False
+		if not self.process or not self.listener:
+			return "unknown"
 
-		if state == lldb.eStateExited or not self.proc_listener:
+		# Events are collected by the listener thread; only wait here when the
+		# caller explicitly asks for it (timeout in seconds), otherwise just
+		# drain whatever has already arrived and keep the latest state
+		state = None
+		events = []
+		try:
+			if timeout > 0:
+				events.append(self.listener.events.get(True, timeout))
+			else:
+				events.append(self.listener.events.get_nowait())
+			while True:
+				events.append(self.listener.events.get_nowait())
+		except queue.Empty:
 			pass
-
-		import time;
-		start = time.time()*1000.0
-		while not done and self.proc_listener is not None:
-			elapsed = time.time()*1000.0
-			if not self.proc_listener.PeekAtNextEvent(event):
-				if elapsed - start < timeout:
-					time.sleep(0.1)
-				else:
-					done = True
-				# If no events in queue - wait X seconds for events
-				if timeout > 0:
-					self.proc_listener.WaitForEvent(timeout, event)
-					state_new = lldb.SBProcess.GetStateFromEvent(event)
-				done = not self.proc_listener.PeekAtNextEvent(event)
+		for kind, data in events:
+			if kind == "unloaded":
+				for uuid in data:
+					self.disasm.invalidate(uuid)
+				self.memory.clear()
+				self.symbols = {}
+			elif kind == "sampled":
+				self.load_samples()
 			else:
-				# If events are in queue - process them here
-				self.proc_listener.GetNextEvent(event)
-				state_new = lldb.SBProcess.GetStateFromEvent(event)
-				if state_new == lldb.eStateInvalid:
-					continue
-				done = not self.proc_listener.PeekAtNextEvent(event)
+				state = data
+		if state is None:
+			return "unknown"
 
 		# View changes bubble up from here. First, they're handled on the controller
 		# level in the refresh() function. Then, code bubbles up to plugin.py where
 		# the state change is handled on the view level (MVC)
-		return state_type_to_str(state_new)
-
+		return state_type_to_str(state)
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+#
+# memory.py 
+# Copyright (c) 2017 owl
+#
+
+# Inferior memory, read in fixed-size pages and kept in a bounded LRU.
+# Pages of read-only regions (code, constants) survive stops; only pages
+# which the inferior could have written are dropped when it runs again.
+
+from collections import OrderedDict
+
+PAGE = 4096
+
+def page_of(address):
+	return address - address % PAGE
+
+class Page:
+	def __init__(self, address, data, writable):
+		self.address = address
+		self.data = data			# bytes, or None when unreadable
+		self.writable = writable
+
+# Bounded LRU of pages keyed by page address
+class Cache:
+	def __init__(self, size=256):
+		self.size = size
+		self.entries = OrderedDict()
+		self.regions = []	# (start, end, writable) of the regions seen since the last stop
+
+	def get(self, address):
+		page = self.entries.pop(address, None)
+		if page is not None:
+			self.entries[address] = page
+		return page
+
+	def put(self, page):
+		self.entries.pop(page.address, None)
+		self.entries[page.address] = page
+		while len(self.entries) > self.size:
+			self.entries.popitem(last=False)
+
+	def region(self, address):
+		for start, end, writable in self.regions:
+			if start <= address < end:
+				return writable
+		return None
+
+	# Drop every page the inferior could have changed
+	def invalidate(self):
+		for address in list(self.entries):
+			if self.entries[address].writable:
+				del self.entries[address]
+		self.regions = []
+
+	def clear(self):
+		self.entries.clear()
+		self.regions = []
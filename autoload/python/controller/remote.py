@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+#
+# remote.py 
+# Copyright (c) 2017 owl
+#
+
+# Controller proxy which runs lldb in a separate worker process (worker.py).
+# Slow lldb calls and lldb crashes never take vim down with them; vim only
+# receives the resulting backtrace/source models.
+
+import sys, os, subprocess, threading
+from collections import deque
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import rpc
+import metrics
+import model.backtrace as model_bt
+import model.breakpoint as model_bp
+import model.variables as model_var
+import model.watch as model_watch
+
+WORKER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'worker.py')
+
+def cerr(data):
+	sys.stderr.write(data)
+
+class RemoteController:
+	def __init__(self, python="python"):
+		env = dict(os.environ)
+		env['SDEBUG_PROFILE'] = '1' if metrics.sbcount else '0'
+		self.worker = subprocess.Popen([python, WORKER], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+			stderr=subprocess.PIPE, env=env)
+		self.alive = True
+		self.attached = False
+		# Whatever the worker writes to stderr outside of a request (e.g. the
+		# traceback it died with) is collected here and shown after the next call
+		self.errors = deque(maxlen=200)
+		self.reader = threading.Thread(target=self.read_errors, name="sdebug_worker_stderr")
+		self.reader.daemon = True
+		self.reader.start()
+
+	def read_errors(self):
+		for line in iter(self.worker.stderr.readline, b''):
+			self.errors.append(line.decode('utf-8', 'replace'))
+
+	def show_errors(self):
+		while self.errors:
+			cerr(self.errors.popleft())
+
+	@metrics.timed("ctrl.remote")
+	def call(self, op, *args):
+		if not self.alive:
+			cerr("error calling %s; debugger worker is not running."%(op))
+			return
+		message = {'op': op, 'args': list(args)}
+		message['ui'] = {
+			'expanded': list(model_bt.Model.expanded),
+			'navigated': model_bt.Model.navigated,
+			'limits': list(model_bt.Model.limits.items()),
+			'frame_limit': model_bt.Model.frame_limit,
+			'aggregate': model_bt.Model.aggregate,
+			'expanded_groups': list(model_bt.Model.expanded_groups),
+			'page_size': model_var.Model.page_size,
+			'watch_timeout': model_watch.Model.timeout,
+		}
+		try:
+			rpc.send(self.worker.stdin, message)
+			response = rpc.recv(self.worker.stdout)
+		except (EOFError, IOError, OSError):
+			self.alive = False
+			self.attached = False
+			self.reader.join(1)
+			self.show_errors()
+			cerr("error calling %s; debugger worker exited (code %s)."%(op, str(self.worker.poll())))
+			return
+		self.show_errors()
+
+		if response['out']: sys.stdout.write(response['out'])
+		if response['err']: cerr(response['err'])
+		# The backtrace comes as changes to the threads vim has; if it hasn't
+		# got them anymore they're sent again whole
+		synced = True
+		for name, data in response['models'].items():
+			if rpc.MODELS[name].restore(data) is False:
+				synced = False
+		if not synced and op != 'resend':
+			self.call('resend')
+		return response['result']
+
+	# Forward the remaining controller operations as-is
+	def __getattr__(self, name):
+		if name.startswith('_'):
+			raise AttributeError(name)
+		return lambda *args: self.call(name, *args)
+
+	def running(self):
+		return self.alive and self.attached
+
+	def run(self, program, args=[], tty=None):
+		items = []
+		for _, group in model_bp.Model.container.items():
+			for _, item in group.items():
+				items.append([item.source, item.line, item.message] + item.options())
+		self.call('breakpoints', items)
+		self.call('watches', [watch.expression for watch in model_watch.Model.watches])
+		self.call('run', program, args, tty)
+		self.attached = bool(self.call('running'))
+
+	def restart(self, tty=None):
+		self.call('restart', tty)
+		self.attached = bool(self.call('running'))
+
+	def attach(self, pid=-1, pname=""):
+		self.call('attach', pid, pname)
+		self.attached = bool(self.call('running'))
+
+	def load_core(self, program, core):
+		self.call('load_core', program, core)
+		self.attached = bool(self.call('running'))
+
+	def quit(self):
+		if self.alive:
+			self.call('quit')
+			self.worker.stdin.close()
+			self.worker.wait()
+		self.alive = False
+		self.attached = False
+		model_bp.Model.unset_all()
+
+	def breakpoint_add(self, path, line):
+		bp = model_bp.Model.get(path, line)
+		if not bp:
+			cerr("error creating breakpoint %s:%s; breakpoint is null"%(path,str(line)))
+			return
+		id = self.call('breakpoint_add', path, line, bp.message, bp.options())
+		if id is not None:
+			bp.id = id
+
+	def breakpoint_update(self, path, line):
+		bp = model_bp.Model.get(path, line)
+		if bp:
+			self.call('breakpoint_update', path, line, bp.options())
+
+	def breakpoint_delete(self, path, line):
+		self.call('breakpoint_delete', path, line)
+
+	def load_frames(self, thread):
+		return self.call('load_frames', thread.id)
+
+	def select_frame(self, obj):
+		if isinstance(obj, model_bt.Thread):
+			cerr("error selecting frame; not a frame")
+			return
+		if not obj or not obj.thread:
+			cerr("error invalid frame.")
+			return
+		return self.call('select_frame', obj.thread.id, obj.number)
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+#
+# rpc.py 
+# Copyright (c) 2017 owl
+#
+
+# Message framing between vim and the out-of-process debugger worker.
+# Every message is a 4 byte big-endian length followed by a compact JSON body.
+
+import sys, os, json, struct
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import model.backtrace as model_bt
+import model.source as model_src
+import model.variables as model_var
+import model.memory as model_mem
+import model.watch as model_watch
+import model.samples as model_samples
+
+HEADER = struct.Struct('>I')
+
+# Models mirrored from the worker into vim after every request; the backtrace
+# is sent as what changed in it (see model_bt.Model.snapshot)
+MODELS = {
+	'bt': model_bt.Model,
+	'src': model_src.Model,
+	'var': model_var.Model,
+	'mem': model_mem.Model,
+	'watch': model_watch.Model,
+	'samples': model_samples.Model,
+}
+
+# Operations which never change the mirrored models; the worker doesn't
+# snapshot the models after them (they are called from the poll timer)
+READONLY = set(['pending', 'running', 'trace', 'profile'])
+
+def send(stream, message):
+	data = json.dumps(message, separators=(',',':')).encode('utf-8')
+	stream.write(HEADER.pack(len(data)) + data)
+	stream.flush()
+
+def recv(stream):
+	size, = HEADER.unpack(read(stream, HEADER.size))
+	return json.loads(read(stream, size).decode('utf-8'))
+
+def read(stream, size):
+	data = b''
+	while len(data) < size:
+		chunk = stream.read(size - len(data))
+		if not chunk:
+			raise EOFError("debugger worker pipe closed")
+		data += chunk
+	return data
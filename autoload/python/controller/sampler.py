@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+#
+# sampler.py 
+# Copyright (c) 2017 owl
+#
+
+# Sampling profiler. A background thread stops the process at a fixed rate,
+# records the PCs of every thread's stack and resumes it right away; nothing
+# is symbolicated while the process is stopped. While sampling, process
+# state events are routed to the sampler instead of vim (see Listener.sink);
+# vim gets a single "sampled" event once the run is over. A state the sampler
+# did not cause (exit, crash, a breakpoint) ends the run and is passed on to
+# vim after it.
+
+import time, threading
+import lldb
+
+# Process states which end a sampling run
+FINAL = (lldb.eStateExited, lldb.eStateCrashed, lldb.eStateDetached)
+# Stop reasons of stops the sampler did not ask for
+FOREIGN = (lldb.eStopReasonBreakpoint, lldb.eStopReasonWatchpoint, lldb.eStopReasonException)
+try:
+	import Queue as queue
+except ImportError:
+	import queue
+
+class Sampler(threading.Thread):
+	def __init__(self, process, listener, hz, seconds, depth=128):
+		threading.Thread.__init__(self, name="sdebug_sampler")
+		self.daemon = True
+		self.process = process
+		self.listener = listener
+		self.interval = 1.0 / max(hz, 1)
+		self.seconds = seconds
+		self.depth = depth
+		self.events = queue.Queue()	# process states, fed by the listener
+		self.stacks = {}			# tuple of pcs (innermost first) -> number of samples
+		self.count = 0				# number of samples taken
+		self.paused = 0.0			# seconds the process spent stopped by the sampler
+		self.final = None			# state which ended the run, for vim
+		self.done = threading.Event()
+
+	def wait(self, state, timeout=1):
+		deadline = time.time() + timeout
+		while True:
+			try:
+				received = self.events.get(True, max(deadline - time.time(), 0))
+			except queue.Empty:
+				self.final = self.process.GetState()
+				return False
+			if received in FINAL:
+				self.final = received
+				return False
+			if received == state:
+				return True
+
+	# Skip the states of the sampler's own resumes; returns False when the
+	# process stopped or went away on its own meanwhile
+	def drain(self):
+		try:
+			while True:
+				state = self.events.get_nowait()
+				if state in FINAL or state == lldb.eStateStopped:
+					self.final = state
+					return False
+		except queue.Empty:
+			return True
+
+	def run(self):
+		self.listener.sink = self.events
+		try:
+			self.record()
+		finally:
+			self.listener.sink = None
+			self.listener.events.put(("sampled", None))
+			if self.final is not None:
+				self.listener.events.put(("state", self.final))
+
+	def record(self):
+		if self.process.GetState() != lldb.eStateRunning:
+			self.process.Continue()
+		end = time.time() + self.seconds
+		tick = time.time()
+		while not self.done.is_set() and time.time() < end:
+			if not self.drain():
+				break
+			start = time.time()
+			self.process.Stop()
+			if not self.wait(lldb.eStateStopped):
+				break
+			if not self.sample():
+				# Stopped at a breakpoint (or similar) before our stop; stay stopped
+				self.final = lldb.eStateStopped
+				self.count += 1
+				break
+			self.process.Continue()
+			self.paused += time.time() - start
+			self.count += 1
+			tick += self.interval
+			self.done.wait(max(tick - time.time(), 0))
+
+	# Record every thread's stack; returns False if a thread stopped for a
+	# reason of its own
+	def sample(self):
+		own = True
+		for _thread in self.process:
+			if _thread.GetStopReason() in FOREIGN:
+				own = False
+			# Frame by frame; GetNumFrames() would unwind the whole stack
+			pcs = []
+			for index in range(self.depth):
+				_frame = _thread.GetFrameAtIndex(index)
+				if not _frame.IsValid():
+					break
+				pcs.append(_frame.GetPC())
+			pcs = tuple(pcs)
+			self.stacks[pcs] = self.stacks.get(pcs, 0) + 1
+		return own
+
+	def stop(self):
+		self.done.set()
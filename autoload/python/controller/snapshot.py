@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+#
+# snapshot.py 
+# Copyright (c) 2017 owl
+#
+
+# Minimal-pause snapshots of a live process. capture() attaches, copies the
+# stack PCs of every thread plus where the modules are loaded, and detaches
+# right away; everything else (symbols, line tables) is resolved afterwards
+# by symbolicate(), without the process.
+
+import os
+import lldb
+import metrics
+
+class Thread:
+	def __init__(self, id, number, name):
+		self.id = id
+		self.number = number
+		self.name = name
+		self.pcs = []			# innermost frame first
+
+class Snapshot:
+	def __init__(self, pid):
+		self.pid = pid
+		self.program = ""
+		self.threads = []
+		self.selected = None	# id of the thread lldb selected
+		self.modules = []		# (path, uuid, [(section, load address)])
+		self.timings = {}		# milliseconds per phase; 'paused' is the total the process was stopped
+
+	def report(self):
+		return "snapshot of pid %s: %i threads, process stopped %.1f ms (attach %.1f, capture %.1f, detach %.1f)"%(
+			str(self.pid), len(self.threads), self.timings['paused'], self.timings['attach'],
+			self.timings['capture'], self.timings['detach'])
+
+def path(spec):
+	if not spec.GetDirectory():
+		return spec.GetFilename() or ""
+	return os.path.join(spec.GetDirectory(), spec.GetFilename())
+
+# The process is stopped from the start of the attach until the detach
+# returns; only what is needed to symbolicate later is read in between
+def capture(dbg, pid=-1, pname="", depth=128):
+	error = lldb.SBError()
+	target = dbg.CreateTarget('')
+	listener = lldb.SBListener("snapshot_listener")
+	synchronous = not dbg.GetAsync()
+	dbg.SetAsync(False)
+	try:
+		start = metrics.clock()
+		if pid and pid > 0:
+			process = target.AttachToProcessWithID(listener, pid, error)
+		else:
+			process = target.AttachToProcessWithName(listener, pname, False, error)
+		if not process or not error.Success():
+			raise RuntimeError("error attaching to process \"%s\". %s"%(pname if pname else str(pid), str(error)))
+		attached = metrics.clock()
+
+		snap = Snapshot(process.GetProcessID())
+		snap.selected = process.GetSelectedThread().GetThreadID()
+		for _thread in process:
+			thread = Thread(_thread.GetThreadID(), _thread.GetIndexID(), _thread.GetName() or "")
+			# Frame by frame; GetNumFrames() would unwind the whole stack
+			for index in range(depth):
+				_frame = _thread.GetFrameAtIndex(index)
+				if not _frame.IsValid():
+					break
+				thread.pcs.append(_frame.GetPC())
+			snap.threads.append(thread)
+		for index in range(target.GetNumModules()):
+			module = target.GetModuleAtIndex(index)
+			sections = []
+			for number in range(module.GetNumSections()):
+				section = module.GetSectionAtIndex(number)
+				sections.append((section.GetName(), section.GetLoadAddress(target)))
+			snap.modules.append((path(module.GetFileSpec()), module.GetUUIDString(), sections))
+		if snap.modules:
+			snap.program = snap.modules[0][0]
+		captured = metrics.clock()
+
+		process.Detach()
+		detached = metrics.clock()
+	finally:
+		dbg.SetAsync(not synchronous)
+		dbg.DeleteTarget(target)
+
+	snap.timings = {
+		'attach': (attached - start) * 1000.0,
+		'capture': (captured - attached) * 1000.0,
+		'detach': (detached - captured) * 1000.0,
+		'paused': (detached - start) * 1000.0,
+	}
+	return snap
+
+# Offline target with every module loaded where it was in the process, so
+# the captured PCs resolve to symbols and lines
+def symbolicate(dbg, snap):
+	error = lldb.SBError()
+	target = dbg.CreateTarget(snap.program, None, None, True, error)
+	if not target or not error.Success():
+		target = dbg.CreateTarget('')
+	for path, uuid, sections in snap.modules:
+		module = target.FindModule(lldb.SBFileSpec(path))
+		if not module.IsValid():
+			module = target.AddModule(path, None, uuid)
+		if not module or not module.IsValid():
+			continue
+		for name, address in sections:
+			section = module.FindSection(name)
+			if section.IsValid() and address != lldb.LLDB_INVALID_ADDRESS:
+				target.SetSectionLoadAddress(section, address)
+	return target
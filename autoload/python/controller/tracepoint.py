@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+#
+# tracepoint.py
+# Copyright (c) 2017 owl
+#
+
+# Breakpoints which log a message instead of stopping. lldb runs hit() on its
+# own thread for every hit; the message is formatted and the hit counted
+# there, and hit() returns False so the process keeps running without a stop
+# event ever reaching the listener. Lines are kept in a bounded ring which
+# vim drains in batches from its poll timer (like the console).
+#
+# Messages are templates; {expression} is replaced by the value of the
+# variable path or expression in the frame that hit the breakpoint.
+#
+# lldb resolves the callback by name, so this module is imported into lldb's
+# script interpreter as well (see Controller.trace_setup); both share it.
+
+import os, re, threading
+from collections import deque
+
+FIELD_RE = re.compile(r'\{([^{}]+)\}')
+
+traces = {}			# breakpoint id -> (source, line, template split into text/expression parts)
+hits = {}			# breakpoint id -> hits so far
+changed = set()		# breakpoint ids hit since the last drain
+lines = deque(maxlen=10000)
+dropped = [0]		# lines which fell out of the ring before being shown
+options = None		# SBExpressionOptions for expressions not found as variables
+lock = threading.Lock()
+
+# Split a template once; odd parts are expressions
+def parse(template):
+	return FIELD_RE.split(template)
+
+def register(id, source, line, template):
+	with lock:
+		traces[id] = (source, line, parse(template))
+		hits[id] = 0
+		changed.add(id)
+
+def unregister(id):
+	with lock:
+		traces.pop(id, None)
+		hits.pop(id, None)
+		changed.discard(id)
+
+def clear():
+	with lock:
+		traces.clear()
+		hits.clear()
+		changed.clear()
+		lines.clear()
+		dropped[0] = 0
+
+def value(frame, expression):
+	result = frame.GetValueForVariablePath(expression)
+	if not result.IsValid() or not result.GetError().Success():
+		result = frame.EvaluateExpression(expression, options) if options else frame.EvaluateExpression(expression)
+		if not result.IsValid() or not result.GetError().Success():
+			return "<%s>"%(str(result.GetError()))
+	return result.GetSummary() or result.GetValue() or ""
+
+def format(frame, parts):
+	text = []
+	for index, part in enumerate(parts):
+		text.append(value(frame, part) if index % 2 else part)
+	return "".join(text)
+
+# Breakpoint callback; returning False resumes the process
+def hit(frame, location, internal_dict):
+	id = location.GetBreakpoint().GetID()
+	trace = traces.get(id)
+	if not trace:
+		return True
+	source, line, parts = trace
+	message = format(frame, parts)
+	with lock:
+		count = hits.get(id, 0) + 1
+		hits[id] = count
+		changed.add(id)
+		if len(lines) == lines.maxlen:
+			dropped[0] += 1
+		lines.append("%s:%i #%i %s"%(os.path.basename(source), line, count, message))
+	return False
+
+# Take the collected lines and the [source, line, hits] which changed since the last call
+def drain():
+	with lock:
+		result = {
+			'lines': list(lines),
+			'dropped': dropped[0],
+			'hits': [[traces[id][0], traces[id][1], hits[id]] for id in changed if id in traces],
+		}
+		lines.clear()
+		dropped[0] = 0
+		changed.clear()
+	return result
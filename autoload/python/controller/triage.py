@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+#
+# triage.py 
+# Copyright (c) 2017 owl
+#
+
+# Batch crash triage. Loads every core file of a directory with the regular
+# controller (in a pool of processes, one debugger each), reduces the
+# crashing threads to a normalized stack signature and writes a report of
+# the crashes grouped by signature, most frequent first.
+#
+#	python triage.py <program> <directory> [-j 8] [-o report.txt]
+
+import sys, os, re, argparse, multiprocessing
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import lldbc, lldb
+import model.backtrace as model_bt
+
+# Frames on top of the actual crash site (signal delivery, abort, asserts)
+NOISE = re.compile(r'^(_*(GI_)?(raise|abort|pthread_kill|kill|sigtramp|assert_fail|assert_rtn)\w*|<null2?>)$')
+
+ctrl = None
+
+def initialize():
+	global ctrl
+	ctrl = lldbc.Controller()
+
+# Function name without arguments, template arguments or offsets
+def normalize(name):
+	name = re.sub(r'\s*\+\s*\d+$', '', name)
+	while True:
+		stripped = re.sub(r'<[^<>]*>', '', name)
+		if stripped == name: break
+		name = stripped
+	name = re.sub(r'\(.*\)(\s*const)?$', '', name)
+	return name.strip()
+
+def signature(thread, depth):
+	names = []
+	for frame in thread.frames:
+		name = normalize(frame.name)
+		if not names and NOISE.match(name):
+			continue
+		names.append("%s`%s"%(frame.module, name or "???"))
+		if len(names) == depth:
+			break
+	return tuple(names)
+
+# Signatures of the crashing threads of one core; [(reason, signature)]
+def triage(job):
+	program, core, depth = job
+	crashes = []
+	ctrl.load_core(program, core)
+	try:
+		if not ctrl.process:
+			return core, [("error: core could not be loaded", ())]
+		selected = ctrl.process.GetSelectedThread()
+		for _thread in ctrl.process:
+			reason = _thread.GetStopReason()
+			if reason not in (lldb.eStopReasonSignal, lldb.eStopReasonException) and _thread != selected:
+				continue
+			thread = model_bt.Model.index[_thread.GetThreadID()]
+			if not thread.loaded:
+				ctrl.load_frames(thread, _thread)
+			crashes.append((_thread.GetStopDescription(256) or "crashed", signature(thread, depth)))
+	finally:
+		ctrl.unload()
+	return core, crashes
+
+# Text report; one fold (by indent) per signature
+def report(program, results):
+	groups = {}
+	for core, crashes in results:
+		for reason, frames in crashes:
+			groups.setdefault((reason, frames), []).append(core)
+	lines = ["%s: %i cores, %i signatures"%(program, len(results), len(groups)), ""]
+	for (reason, frames), cores in sorted(groups.items(), key=lambda item: (-len(item[1]), item[0])):
+		lines.append("%i x %s"%(len(cores), reason))
+		for frame in frames:
+			lines.append("\t%s"%(frame))
+		lines.append("\tcores:")
+		for core in sorted(cores):
+			lines.append("\t\t%s"%(core))
+		lines.append("")
+	lines.append(" vim: set foldmethod=indent foldlevel=0 :")
+	return lines
+
+def main():
+	parser = argparse.ArgumentParser(description="group core files by crash signature")
+	parser.add_argument('program')
+	parser.add_argument('directory')
+	parser.add_argument('-j', '--jobs', type=int, default=multiprocessing.cpu_count())
+	parser.add_argument('-d', '--depth', type=int, default=8, help="frames per signature")
+	parser.add_argument('-o', '--output', help="report file (default: stdout)")
+	args = parser.parse_args()
+
+	cores = sorted(os.path.join(args.directory, name) for name in os.listdir(args.directory)
+		if os.path.isfile(os.path.join(args.directory, name)))
+	jobs = [(args.program, core, args.depth) for core in cores]
+	pool = multiprocessing.Pool(max(args.jobs, 1), initialize)
+	try:
+		results = list(pool.imap_unordered(triage, jobs))
+	finally:
+		pool.close()
+		pool.join()
+
+	lines = report(args.program, results)
+	if args.output:
+		with open(args.output, 'w') as f:
+			f.write("\n".join(lines)+"\n")
+	else:
+		print("\n".join(lines))
+
+if __name__ == '__main__':
+	main()
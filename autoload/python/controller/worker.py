@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+#
+# worker.py 
+# Copyright (c) 2017 owl
+#
+
+# Out-of-process debugger worker. Runs the lldb controller in its own process
+# and serves requests from vim (see remote.py) over stdin/stdout.
+
+import sys, os, traceback
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+try:
+	from StringIO import StringIO
+except ImportError:
+	from io import StringIO
+
+import rpc
+import lldbc
+import model.backtrace as model_bt
+import model.breakpoint as model_bp
+import model.variables as model_var
+import model.watch as model_watch
+
+class Worker:
+	def __init__(self):
+		self.ctrl = lldbc.Controller()
+		self.sent = {}
+
+	def handle(self, message):
+		response = {'result': None}
+		out, err = sys.stdout, sys.stderr
+		sys.stdout, sys.stderr = StringIO(), StringIO()
+		try:
+			ui = message.get('ui')
+			if ui:
+				model_bt.Model.expanded = set(ui['expanded'])
+				model_bt.Model.navigated = ui['navigated']
+				model_bt.Model.limits = dict(ui['limits'])
+				model_bt.Model.frame_limit = ui['frame_limit']
+				model_bt.Model.aggregate = ui['aggregate']
+				model_bt.Model.expanded_groups = set(tuple(key) for key in ui['expanded_groups'])
+				model_var.Model.page_size = ui['page_size']
+				model_watch.Model.timeout = ui['watch_timeout']
+			op = message['op']
+			args = message.get('args', [])
+			handler = getattr(self, 'op_'+op, None)
+			if handler:
+				response['result'] = handler(*args)
+			else:
+				response['result'] = getattr(self.ctrl, op)(*args)
+		except Exception:
+			sys.stderr.write(traceback.format_exc())
+		finally:
+			response['out'] = sys.stdout.getvalue()
+			response['err'] = sys.stderr.getvalue()
+			sys.stdout, sys.stderr = out, err
+
+		# Only ship models which changed since they were last sent
+		models = {}
+		if message['op'] in rpc.READONLY:
+			response['models'] = models
+			return response
+		for name, model in rpc.MODELS.items():
+			data = model.snapshot()
+			if data != self.sent.get(name):
+				self.sent[name] = data
+				models[name] = data
+		# The backtrace delta is rendered on the vim side; start a new one
+		model_bt.Model.take_delta()
+		response['models'] = models
+		return response
+
+	# vim lost track of the models (e.g. cleared them); send them whole
+	def op_resend(self):
+		self.sent = {}
+		model_bt.Model.resend()
+
+	def op_breakpoints(self, items):
+		model_bp.Model.clear()
+		for source, line, message, condition, ignore, thread in items:
+			model_bp.Model.add(source, line, message)
+			model_bp.Model.get(source, line).set_options(condition, ignore, thread)
+
+	def op_watches(self, expressions):
+		model_watch.Model.clear()
+		for expression in expressions:
+			model_watch.Model.add(expression)
+
+	def op_breakpoint_add(self, path, line, message="", options=None):
+		model_bp.Model.add(path, line, message)
+		if options:
+			model_bp.Model.get(path, line).set_options(*options)
+		self.ctrl.breakpoint_add(path, line)
+		return model_bp.Model.get(path, line).id
+
+	def op_breakpoint_update(self, path, line, options):
+		bp = model_bp.Model.get(path, line)
+		if not bp:
+			sys.stderr.write("error updating breakpoint %s:%s; breakpoint not found."%(path, str(line)))
+			return
+		bp.set_options(*options)
+		self.ctrl.breakpoint_update(path, line)
+
+	def op_breakpoint_delete(self, path, line):
+		self.ctrl.breakpoint_delete(path, line)
+		model_bp.Model.delete(path, line)
+
+	def op_load_frames(self, tid):
+		for thread in model_bt.Model.threads:
+			if thread.id == tid:
+				return self.ctrl.load_frames(thread)
+		sys.stderr.write("error loading frames; thread %s not found."%(str(tid)))
+
+	def op_select_frame(self, tid, number):
+		for thread in model_bt.Model.threads:
+			if thread.id != tid: continue
+			for frame in thread.frames:
+				if frame.number == number:
+					return self.ctrl.select_frame(frame)
+		sys.stderr.write("error selecting frame; frame %s of thread %s not found."%(str(number), str(tid)))
+
+def main():
+	instream = getattr(sys.stdin, 'buffer', sys.stdin)
+	outstream = getattr(sys.stdout, 'buffer', sys.stdout)
+	worker = Worker()
+	while True:
+		try:
+			message = rpc.recv(instream)
+		except EOFError:
+			break
+		rpc.send(outstream, worker.handle(message))
+		if message['op'] == 'quit':
+			break
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+#
+# metrics.py
+# Copyright (c) 2017 owl
+#
+
+# Hot path instrumentation. Operations are timed into fixed-bucket histograms
+# (constant memory, no per-sample storage); SB API calls are counted per
+# operation once count_sbcalls() has wrapped the lldb module. Calls are
+# counted per thread, so those of the listener and sampler threads aren't
+# charged to whatever vim is doing meanwhile.
+#
+# Names are grouped by prefix: ctrl.* (controller), view.* (rendering) and
+# vim.* (plugin entry points); vim.blocked sums the outermost entry points,
+# which is the time vim was blocked.
+
+import os, bisect, inspect, json, threading, time
+
+clock = getattr(time, 'perf_counter', time.time)
+
+# Bucket upper bounds in seconds; 1us growing by 1.5x up to ~7 minutes
+BOUNDS = [0.000001 * 1.5**index for index in range(51)]
+
+histograms = {}
+enabled = True
+sbcount = os.environ.get('SDEBUG_PROFILE') == '1'	# count SB API calls (slower)
+
+class Counters(threading.local):
+	def __init__(self):
+		self.sbcalls = 0	# SB API calls made so far by the thread
+		self.depth = 0		# nesting of entry() calls
+
+counters = Counters()
+
+class Histogram:
+	def __init__(self, name):
+		self.name = name
+		self.reset()
+
+	def reset(self):
+		self.buckets = [0] * (len(BOUNDS)+1)
+		self.count = 0
+		self.total = 0.0
+		self.max = 0.0
+		self.calls = 0
+
+	def add(self, elapsed, calls=0):
+		self.buckets[bisect.bisect_left(BOUNDS, elapsed)] += 1
+		self.count += 1
+		self.total += elapsed
+		self.calls += calls
+		if elapsed > self.max:
+			self.max = elapsed
+
+	# Upper bound of the bucket holding the p-th sample (never above max)
+	def percentile(self, p):
+		if not self.count:
+			return 0.0
+		rank = p * self.count
+		seen = 0
+		for index, count in enumerate(self.buckets):
+			seen += count
+			if seen >= rank and count:
+				bound = BOUNDS[index] if index < len(BOUNDS) else self.max
+				return min(bound, self.max)
+		return self.max
+
+	def dump(self):
+		return {
+			'count': self.count,
+			'total_ms': self.total * 1000.0,
+			'p50_ms': self.percentile(0.5) * 1000.0,
+			'p95_ms': self.percentile(0.95) * 1000.0,
+			'max_ms': self.max * 1000.0,
+			'sb_calls': self.calls,
+		}
+
+def histogram(name):
+	if name not in histograms:
+		histograms[name] = Histogram(name)
+	return histograms[name]
+
+# Decorator timing every call of the function under name
+def timed(name):
+	def decorate(function):
+		samples = histogram(name)
+		def wrapper(*args, **kwargs):
+			if not enabled:
+				return function(*args, **kwargs)
+			calls = counters.sbcalls
+			start = clock()
+			try:
+				return function(*args, **kwargs)
+			finally:
+				samples.add(clock() - start, counters.sbcalls - calls)
+		wrapper.__name__ = function.__name__
+		wrapper.__doc__ = function.__doc__
+		return wrapper
+	return decorate
+
+# Decorator for functions called from vim; the outermost call is also
+# accounted in vim.blocked
+def entry(name):
+	def decorate(function):
+		inner = timed(name)(function)
+		blocked = histogram('vim.blocked')
+		def wrapper(*args, **kwargs):
+			if not enabled or counters.depth:
+				return inner(*args, **kwargs)
+			counters.depth += 1
+			calls = counters.sbcalls
+			start = clock()
+			try:
+				return inner(*args, **kwargs)
+			finally:
+				counters.depth -= 1
+				blocked.add(clock() - start, counters.sbcalls - calls)
+		wrapper.__name__ = function.__name__
+		wrapper.__doc__ = function.__doc__
+		return wrapper
+	return decorate
+
+# Wrap every public method of the lldb SB classes to count calls
+def count_sbcalls(lldb):
+	if getattr(lldb, '_sdebug_counted', False):
+		return
+	def wrap(method):
+		def wrapper(*args, **kwargs):
+			counters.sbcalls += 1
+			return method(*args, **kwargs)
+		wrapper.__name__ = method.__name__
+		return wrapper
+	for name in dir(lldb):
+		cls = getattr(lldb, name)
+		if not name.startswith('SB') or not inspect.isclass(cls):
+			continue
+		for attr, method in list(vars(cls).items()):
+			if attr.startswith('_') or not callable(method):
+				continue
+			setattr(cls, attr, wrap(method))
+	lldb._sdebug_counted = True
+
+def reset():
+	for item in histograms.values():
+		item.reset()
+
+def dump():
+	return dict((name, item.dump()) for name, item in histograms.items() if item.count)
+
+def save(path, data=None):
+	with open(path, 'w') as f:
+		json.dump(data if data is not None else dump(), f, indent=1, sort_keys=True)
+
+# Text report of a dump(), one operation per line
+def report(data=None):
+	data = data if data is not None else dump()
+	lines = ["%-32s %7s %9s %9s %9s %10s"%("operation", "count", "p50 ms", "p95 ms", "max ms", "sb/op")]
+	group = None
+	for name in sorted(data):
+		item = data[name]
+		prefix = name.split('.')[0]
+		if prefix != group:
+			group = prefix
+			lines.append("")
+		lines.append("%-32s %7i %9.2f %9.2f %9.2f %10.1f"%(name, item['count'], item['p50_ms'],
+			item['p95_ms'], item['max_ms'], item['sb_calls'] / float(item['count'])))
+	if 'vim.blocked' in data:
+		lines.append("")
+		lines.append("vim blocked: %.1f ms total"%(data['vim.blocked']['total_ms']))
+	return lines
@@ -4,19 +4,38 @@
 # Copyright (c) 2017 owl
 #
 
-class Frame:
+try:
+	intern
+except NameError:
+	from sys import intern
+
+# Shared copy of module/file/function names; frames of different threads
+# mostly point at the same few strings
+def text(value):
+	return intern(value) if value else ""
+
+class Frame(object):
+	__slots__ = ('default', 'number', 'thread', 'disassembled', 'pc', 'cfa',
+			'module', 'name', 'path', 'file', 'line', 'column',
+			'data', 'addressStart', 'addressEnd', 'addressCurrent', 'listing')
+
 	def __init__(self):
 		self.default = False
 		self.number = None
 		self.thread = None
 		self.disassembled = False
 
+		# Frame identity across stops; unchanged frames are reused
+		self.pc = 0
+		self.cfa = 0
+
 		# Module and function/symbol information
 		self.module = ""
 		self.name = ""
 
 		# Source file information
 		self.path = ""
+		self.file = ""
 		self.line = 0
 		self.column = 0
 
@@ -25,14 +44,31 @@ class Frame:
 		self.addressStart = ""
 		self.addressEnd = ""
 		self.addressCurrent = ""
+		self.listing = ""		# disassembly cache key of the function
+
+	def snapshot(self):
+		return dict((name, getattr(self, name)) for name in Frame.__slots__ if name != 'thread')
+
+	def restore(self, thread, data):
+		for name, value in data.items():
+			setattr(self, name, value)
+		self.thread = thread
+
+class Thread(object):
+	__slots__ = ('frames', 'selected', 'default', 'number', 'id', 'name', 'loaded', 'more', 'stack')
 
-class Thread:
 	def __init__(self):
 		self.frames = []
-		self.frame_current = None
+		self.selected = None
 		self.default = False
 		self.number = None
 		self.id = 0
+		self.name = ""
+
+		# Frames are only fetched for shown threads, and capped (see Model.limit)
+		self.loaded = False
+		self.more = False
+		self.stack = None	# ((pc, cfa) of the top frame, PCs of the stack) for aggregation
 
 	def frame(self):
 		frame = Frame()
@@ -41,38 +77,299 @@ class Thread:
 		Model.changed = True
 		return frame
 
+	# Header and the frames numbered in numbers (all if None); frames left out
+	# are sent as None, and the list isn't sent if none is
+	def snapshot(self, numbers=None):
+		data = {'default':self.default, 'number':self.number, 'id':self.id, 'name':self.name,
+				'loaded':self.loaded, 'more':self.more}
+		if numbers is None:
+			data['frames'] = [frame.snapshot() for frame in self.frames]
+		elif numbers:
+			data['frames'] = [frame.snapshot() if frame.number in numbers else None for frame in self.frames]
+		return data
+
+	# Update the thread in place from a snapshot(); frames are reused by
+	# position. False if a frame which wasn't sent isn't there to be kept.
+	def restore(self, data):
+		self.default = data['default']
+		self.number = data['number']
+		self.name = data['name']
+		self.loaded = data['loaded']
+		self.more = data['more']
+		if 'frames' not in data:
+			return True
+		frames = self.frames
+		self.frames = []
+		self.selected = None
+		for index, item in enumerate(data['frames']):
+			if index < len(frames):
+				frame = frames[index]
+			elif item is None:
+				return False
+			else:
+				frame = Frame()
+			if item is not None:
+				frame.restore(self, item)
+			self.frames.append(frame)
+			if frame.default:
+				self.selected = frame
+		return True
+
+# Row placed after a capped stack; navigating it loads the next frames
+class More:
+	def __init__(self, thread):
+		self.thread = thread
+
+# Threads with identical stacks (same frame PCs); one row in aggregated mode.
+# The first thread stands for the group and is the one whose frames are shown.
+class Group(object):
+	__slots__ = ('key', 'threads')
+
+	def __init__(self, key):
+		self.key = key
+		self.threads = []
+
+	def snapshot(self):
+		return [self.key, [thread.id for thread in self.threads]]
+
+# Threads and frames touched since the delta was last taken (by the view, or
+# by the worker shipping it to vim)
+class Delta:
+	def __init__(self):
+		self.added = set()		# thread ids
+		self.removed = set()	# thread ids
+		self.changed = set()	# thread ids whose header changed
+		self.frames = {}		# thread id -> frame numbers added, removed or changed
+
+	def frame(self, tid, number):
+		if tid not in self.frames:
+			self.frames[tid] = set()
+		self.frames[tid].add(number)
+
+	def empty(self):
+		return not self.added and not self.removed and not self.changed and not self.frames
+
+	# Ids of threads whose rows have to be built again
+	def touched(self):
+		return self.added | self.changed | set(self.frames)
+
+	def merge(self, other):
+		self.removed.difference_update(other.added)
+		self.added.update(other.added)
+		for id in other.removed:
+			self.forget(id)
+		self.removed.update(other.removed)
+		self.changed.update(other.changed)
+		for tid, numbers in other.frames.items():
+			self.frames.setdefault(tid, set()).update(numbers)
+
+	def forget(self, tid):
+		self.added.discard(tid)
+		self.changed.discard(tid)
+		self.frames.pop(tid, None)
+
+	def snapshot(self):
+		return {
+			'added': list(self.added),
+			'removed': list(self.removed),
+			'changed': list(self.changed),
+			'frames': [[tid, list(numbers)] for tid, numbers in self.frames.items()],
+		}
+
+	@classmethod
+	def restore(c, data):
+		delta = Delta()
+		delta.added = set(data['added'])
+		delta.removed = set(data['removed'])
+		delta.changed = set(data['changed'])
+		delta.frames = dict((tid, set(numbers)) for tid, numbers in data['frames'])
+		return delta
+
 class Model:
 	sources = {}	# indexed by line numbers, stores frame
 	threads = []
+	index = {}		# thread id -> thread, kept across stops
+	delta = Delta()
 	selected = None
-	expanded = []
+	expanded = set()	# ids of unfolded threads
 	navigated = -1
 	changed = True
+	limits = {}		# number of frames loaded per thread id, raised by "load more"
+	frame_limit = 64
+	aggregate = False	# show threads grouped by identical stacks
+	groups = []
+	grouped = {}		# stack key (PCs of the top frames) -> group, while updating
+	expanded_groups = set()	# keys of unfolded groups
 
 	@classmethod
 	def fold(c, id):
 		if id in c.expanded:
-			c.expanded.remove(id)
+			c.expanded.discard(id)
 		else:
-			c.expanded.append(id)
+			c.expanded.add(id)
 		c.changed = True
 
+	@classmethod
+	def fold_group(c, key):
+		if key in c.expanded_groups:
+			c.expanded_groups.discard(key)
+		else:
+			c.expanded_groups.add(key)
+		c.changed = True
+
+	# Add thread to the group of its stack; the selected thread leads its group
+	@classmethod
+	def group(c, key, thread):
+		group = c.grouped.get(key)
+		if not group:
+			group = Group(key)
+			c.grouped[key] = group
+			c.groups.append(group)
+		if thread.default:
+			group.threads.insert(0, thread)
+		else:
+			group.threads.append(thread)
+		return group
+
+	@classmethod
+	def limit(c, id):
+		return c.limits.get(id, c.frame_limit)
+
+	@classmethod
+	def extend(c, id):
+		c.limits[id] = c.limit(id) + c.frame_limit
+		c.changed = True
+
+	@classmethod
+	def more(c, thread):
+		return More(thread)
+
 	@classmethod
 	def clear(c, total=False):
 		c.sources = {}
 		c.threads = []
+		c.index = {}
+		c.delta = Delta()
 		c.selected = None
+		c.groups = []
+		c.grouped = {}
 		# If not total - then we maintain folds while navigating backtrace 
 		# total is used when program exits and backtrace must be clear
 		if total:
-			c.expanded = []
+			c.expanded = set()
 			c.navigated = -1
+			c.limits = {}
+			c.expanded_groups = set()
 		c.changed = True
 	
+	# Incremental update; threads are reused by id between begin() and end(),
+	# and threads which weren't seen again are dropped. Changes add up in the
+	# delta until it is taken.
 	@classmethod
-	def thread(c):
-		thread = Thread()
+	def begin(c):
+		c.threads = []
+		c.selected = None
+		c.groups = []
+		c.grouped = {}
+
+	@classmethod
+	def thread(c, id):
+		thread = c.index.get(id)
+		if not thread:
+			thread = Thread()
+			thread.id = id
+			c.index[id] = thread
+			c.delta.removed.discard(id)
+			c.delta.added.add(id)
 		c.threads.append(thread)
-		c.changed = True
 		return thread
 
+	@classmethod
+	def end(c):
+		ids = set(thread.id for thread in c.threads)
+		for id in list(c.index):
+			if id not in ids:
+				del c.index[id]
+				c.delta.forget(id)
+				c.delta.removed.add(id)
+		if not c.delta.empty() or c.aggregate:
+			c.changed = True
+		c.grouped = {}
+		c.expanded_groups.intersection_update(group.key for group in c.groups)
+
+	@classmethod
+	def take_delta(c):
+		delta = c.delta
+		c.delta = Delta()
+		return delta
+
+	# Have every thread sent whole with the next snapshot(); for a vim side
+	# which lost track of them
+	@classmethod
+	def resend(c):
+		c.delta.added.update(c.index)
+
+	# Plain copy of what changed since the delta was last taken; used to ship
+	# the model from the debugger worker. Every thread's header is sent, but
+	# frames only when the delta names them, along with the selected frames
+	# (their disassembly is filled in without changing them otherwise).
+	@classmethod
+	def snapshot(c):
+		threads = []
+		for thread in c.threads:
+			if thread.id in c.delta.added:
+				threads.append(thread.snapshot())
+				continue
+			numbers = c.delta.frames.get(thread.id, set())
+			if thread.selected:
+				numbers = numbers | set([thread.selected.number])
+			threads.append(thread.snapshot(numbers))
+		return {
+			'threads': threads,
+			'expanded': list(c.expanded),
+			'navigated': c.navigated,
+			'limits': list(c.limits.items()),
+			'delta': c.delta.snapshot(),
+			'aggregate': c.aggregate,
+			'groups': [group.snapshot() for group in c.groups],
+			'expanded_groups': list(c.expanded_groups),
+		}
+
+	# Apply a snapshot() to the threads and frames in place, so they're kept
+	# as they are when the worker updates them incrementally. False if the
+	# snapshot refers to frames which aren't there (the model was cleared
+	# meanwhile); the worker is then asked to resend them.
+	@classmethod
+	def restore(c, data):
+		delta = c.delta
+		index = c.index
+		c.clear()
+		synced = True
+		for item in data['threads']:
+			thread = index.get(item['id'])
+			if not thread:
+				thread = Thread()
+				thread.id = item['id']
+				if 'frames' not in item:
+					synced = False
+			if not thread.restore(item):
+				synced = False
+			c.threads.append(thread)
+			c.index[thread.id] = thread
+			if thread.default:
+				c.selected = thread
+		c.expanded = set(data['expanded'])
+		c.navigated = data['navigated']
+		c.limits = dict(data['limits'])
+		# Changes not rendered yet are kept along with the worker's
+		delta.merge(Delta.restore(data['delta']))
+		c.delta = delta
+		c.aggregate = data['aggregate']
+		# Keys are PC tuples; they come back from json as lists
+		for key, ids in data['groups']:
+			group = Group(tuple(key))
+			group.threads = [c.index[id] for id in ids]
+			c.groups.append(group)
+		c.expanded_groups = set(tuple(key) for key in data['expanded_groups'])
+		c.changed = True
+		return synced
@@ -4,15 +4,44 @@
 # Copyright (c) 2017 owl
 #
 
+import os
+
 class Breakpoint:
-	def __init__(self, source, line):
+	def __init__(self, source, line, message=""):
 		self.source = source
 		self.line = line
 		self.set = False
 		self.id = -1
+		self.message = message	# tracepoint template; logs instead of stopping when set
+		self.hits = 0			# tracepoint hits, counted by lldb's callback
+		# Filters evaluated by lldb; the process only stops when all of them pass
+		self.condition = ""		# expression which must be true
+		self.ignore = 0			# number of hits to skip
+		self.thread = 0			# thread id which must hit it (0 for any)
+
+	def conditional(self):
+		return bool(self.condition or self.ignore or self.thread)
+
+	def options(self):
+		return [self.condition, self.ignore, self.thread]
+
+	def set_options(self, condition, ignore, thread):
+		self.condition, self.ignore, self.thread = condition, ignore, thread
 
 class Model:
 	container = {}
+	index = {}		# basename -> sources in container with that basename
+
+	# Breakpoints ({line: breakpoint}) which apply to a full path; sources
+	# can be stored either as full paths or as bare file names
+	@classmethod
+	def lookup(cls, path):
+		base = os.path.basename(path)
+		lines = {}
+		for source in cls.index.get(base, ()):
+			if source == path or source == base:
+				lines.update(cls.container[source])
+		return lines
 
 	@classmethod
 	def get(cls, source, line):
@@ -21,11 +50,31 @@ class Model:
 		return cls.container[source][line]
 
 	@classmethod
-	def add(cls, source, line):
+	def add(cls, source, line, message=""):
 		if not source in cls.container:
 			cls.container[source] = {}
+			cls.index.setdefault(os.path.basename(source), set()).add(source)
 		if not line in cls.container[source]:
-			cls.container[source][line] = Breakpoint(source, line)
+			cls.container[source][line] = Breakpoint(source, line, message)
+
+	@classmethod
+	def tracing(cls):
+		for _, group in cls.container.items():
+			for _, item in group.items():
+				if item.message:
+					return True
+		return False
+
+	# Apply [source, line, hits] counted by the debugger; returns the breakpoints changed
+	@classmethod
+	def update_hits(cls, counts):
+		changed = []
+		for source, line, hits in counts:
+			item = cls.get(source, line)
+			if item and item.hits != hits:
+				item.hits = hits
+				changed.append(item)
+		return changed
 
 	@classmethod
 	def delete(cls, source, line):
@@ -34,9 +83,17 @@ class Model:
 		if not line in cls.container[source]:
 			return
 		cls.container[source].pop(line, None)
+		if not cls.container[source]:
+			del cls.container[source]
+			cls.index[os.path.basename(source)].discard(source)
+
+	@classmethod
+	def clear(cls):
+		cls.container = {}
+		cls.index = {}
 
 	@classmethod
 	def unset_all(cls):
-		for _, group in cls.container.iteritems():
-			for _, item in group.iteritems():
+		for _, group in cls.container.items():
+			for _, item in group.items():
 				item.set = False
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+#
+# memory.py 
+# Copyright (c) 2017 owl
+#
+
+# Visible part of the memory view; pages hold exactly the bytes on screen,
+# the controller fills them from its page cache
+
+import binascii
+
+class Model:
+	address = 0		# first byte shown, a multiple of width
+	rows = 32
+	width = 16		# bytes per row
+	pages = []		# (address, size, data) of the pages covering the rows shown; data is None when unreadable
+	changed = False
+
+	@classmethod
+	def clear(c):
+		c.pages = []
+		c.changed = True
+
+	@classmethod
+	def show(c, address=None, rows=None):
+		if address is not None:
+			c.address = address - address % c.width
+		if rows is not None:
+			c.rows = max(rows, 1)
+		c.changed = True
+
+	@classmethod
+	def scroll(c, rows):
+		c.address = max(c.address + rows * c.width, 0)
+		c.changed = True
+
+	@classmethod
+	def end(c):
+		return c.address + c.rows * c.width
+
+	# Plain copy of the model; used to ship the model from the debugger worker
+	@classmethod
+	def snapshot(c):
+		return {'address':c.address, 'rows':c.rows, 'width':c.width,
+				'pages':[(address, size, binascii.hexlify(data).decode('ascii') if data is not None else None)
+					for address, size, data in c.pages]}
+
+	@classmethod
+	def restore(c, data):
+		c.address = data['address']
+		c.rows = data['rows']
+		c.width = data['width']
+		c.pages = [(address, size, binascii.unhexlify(item) if item is not None else None)
+			for address, size, item in data['pages']]
+		c.changed = True
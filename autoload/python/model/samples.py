@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+#
+# samples.py 
+# Copyright (c) 2017 owl
+#
+
+# Call tree of a sampling run (see controller/sampler.py); stacks are merged
+# top-down, from the outermost frame to the innermost
+
+class Node(object):
+	__slots__ = ('name', 'path', 'total', 'own', 'children', 'depth')
+
+	def __init__(self, name, path, depth=0):
+		self.name = name
+		self.path = path		# names from the root, joined by ';'
+		self.total = 0			# samples in this function and below
+		self.own = 0			# samples in this function itself
+		self.children = {}
+		self.depth = depth
+
+	def child(self, name):
+		node = self.children.get(name)
+		if not node:
+			node = Node(name, self.path+";"+name if self.path else name, self.depth+1)
+			self.children[name] = node
+		return node
+
+	def snapshot(self):
+		return [self.name, self.total, self.own, [child.snapshot() for child in self.children.values()]]
+
+	@classmethod
+	def restore(c, data, parent=None):
+		name, total, own, children = data
+		node = parent.child(name) if parent else Node(name, "", -1)
+		node.total, node.own = total, own
+		for item in children:
+			Node.restore(item, node)
+		return node
+
+class Model:
+	sources = {}	# indexed by line numbers, stores nodes
+	root = Node("all", "", -1)
+	folded = []		# (names outermost first, count); the folded-stack export
+	expanded = set()	# paths of unfolded nodes
+	samples = 0		# number of times the process was stopped
+	stacks = 0		# thread stacks recorded over all samples
+	paused = 0.0	# milliseconds the process was stopped by the sampler
+	changed = False
+
+	@classmethod
+	def clear(c):
+		c.sources = {}
+		c.root = Node("all", "", -1)
+		c.folded = []
+		c.samples = 0
+		c.stacks = 0
+		c.paused = 0.0
+		c.changed = True
+
+	# stacks: (names innermost first, count)
+	@classmethod
+	def load(c, stacks, samples, paused):
+		c.clear()
+		c.samples = samples
+		c.paused = paused
+		folded = {}
+		for names, count in stacks:
+			names = tuple(reversed(names))
+			folded[names] = folded.get(names, 0) + count
+			node = c.root
+			node.total += count
+			for name in names:
+				node = node.child(name)
+				node.total += count
+			node.own += count
+			c.stacks += count
+		c.folded = sorted(folded.items())
+		c.changed = True
+
+	@classmethod
+	def fold(c, path):
+		if path in c.expanded:
+			c.expanded.discard(path)
+		else:
+			c.expanded.add(path)
+		c.changed = True
+
+	# Folded-stack text, as consumed by flamegraph.pl and similar tools
+	@classmethod
+	def export(c):
+		return ["%s %i"%(";".join(names), count) for names, count in c.folded]
+
+	# Plain copy of the model; used to ship the model from the debugger worker
+	@classmethod
+	def snapshot(c):
+		return {'root': c.root.snapshot(), 'folded': [[list(names), count] for names, count in c.folded],
+				'samples': c.samples, 'stacks': c.stacks, 'paused': c.paused}
+
+	@classmethod
+	def restore(c, data):
+		c.root = Node.restore(data['root'])
+		c.folded = [(tuple(names), count) for names, count in data['folded']]
+		c.samples = data['samples']
+		c.stacks = data['stacks']
+		c.paused = data['paused']
+		c.changed = c.samples > 0
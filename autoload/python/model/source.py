@@ -11,6 +11,7 @@ class Model:
 	line = 0
 	column = 0
 	symbol = ""
+	listing = ""	# Identifies the disassembled function
 
 	@classmethod
 	def clear(c):
@@ -20,6 +21,7 @@ class Model:
 		c.line = 0
 		c.column = 0
 		c.symbol = ""
+		c.listing = ""
 
 	@classmethod
 	def set_source(c, path, line, column):
@@ -29,8 +31,25 @@ class Model:
 		c.changed = True
 
 	@classmethod
-	def set_disasm(c, symbol, data, line):
+	def set_disasm(c, symbol, data, line, listing=""):
 		c.symbol = symbol
+		c.listing = listing
 		c.data = data
 		c.line = line
 		c.changed = True
+
+	# Plain copy of the model; used to ship the model from the debugger worker
+	@classmethod
+	def snapshot(c):
+		return {'path':c.path, 'data':c.data, 'line':c.line, 'column':c.column, 'symbol':c.symbol,
+				'listing':c.listing}
+
+	@classmethod
+	def restore(c, data):
+		c.path = data['path']
+		c.data = data['data']
+		c.line = data['line']
+		c.column = data['column']
+		c.symbol = data['symbol']
+		c.listing = data['listing']
+		c.changed = True
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+#
+# variables.py
+# Copyright (c) 2017 owl
+#
+
+# Locals/arguments of the selected frame. Only the root values are read on
+# every stop; children are read when a node is expanded, one page at a time.
+
+class Variable(object):
+	__slots__ = ('path', 'name', 'type', 'value', 'summary', 'depth', 'count', 'capped', 'children', 'parent')
+
+	def __init__(self, path, depth=0):
+		self.path = path		# unique key; root name, then child indices
+		self.name = ""
+		self.type = ""
+		self.value = ""
+		self.summary = ""
+		self.depth = depth
+		self.count = 0			# number of children (not all of them are loaded)
+		self.capped = False		# counted up to the page limit only; there are more
+		self.children = []
+		self.parent = None
+
+	def child(self, index):
+		child = Variable("%s/%i"%(self.path, index), self.depth+1)
+		child.parent = self
+		self.children.append(child)
+		return child
+
+	def snapshot(self):
+		return {'path':self.path, 'name':self.name, 'type':self.type, 'value':self.value,
+				'summary':self.summary, 'depth':self.depth, 'count':self.count, 'capped':self.capped,
+				'children':[child.snapshot() for child in self.children]}
+
+	@classmethod
+	def restore(c, data, parent=None):
+		variable = Variable(data['path'], data['depth'])
+		for name in ('name', 'type', 'value', 'summary', 'count', 'capped'):
+			setattr(variable, name, data[name])
+		variable.parent = parent
+		variable.children = [Variable.restore(item, variable) for item in data['children']]
+		return variable
+
+# Row placed after a partially loaded container; navigating it loads the next page
+class Page:
+	def __init__(self, variable):
+		self.variable = variable
+
+class Model:
+	sources = {}	# indexed by line numbers, stores variable/page
+	roots = []
+	expanded = set()	# paths of expanded variables, kept across stops
+	pages = {}			# path -> number of children to load
+	page_size = 100
+	changed = True
+
+	@classmethod
+	def clear(c, total=False):
+		c.sources = {}
+		c.roots = []
+		if total:
+			c.expanded = set()
+			c.pages = {}
+		c.changed = True
+
+	@classmethod
+	def root(c, name):
+		variable = Variable(name)
+		c.roots.append(variable)
+		c.changed = True
+		return variable
+
+	@classmethod
+	def find(c, path):
+		pending = list(c.roots)
+		while pending:
+			variable = pending.pop()
+			if variable.path == path:
+				return variable
+			pending.extend(variable.children)
+		return None
+
+	@classmethod
+	def fold(c, path):
+		if path in c.expanded:
+			c.expanded.discard(path)
+		else:
+			c.expanded.add(path)
+		c.changed = True
+
+	@classmethod
+	def limit(c, path):
+		return c.pages.get(path, c.page_size)
+
+	@classmethod
+	def extend(c, path):
+		c.pages[path] = c.limit(path) + c.page_size
+		c.changed = True
+
+	@classmethod
+	def page(c, variable):
+		return Page(variable)
+
+	# Plain copy of the model; used to ship the model from the debugger worker
+	@classmethod
+	def snapshot(c):
+		return {
+			'roots': [variable.snapshot() for variable in c.roots],
+			'expanded': list(c.expanded),
+			'pages': list(c.pages.items()),
+		}
+
+	@classmethod
+	def restore(c, data):
+		c.roots = [Variable.restore(item) for item in data['roots']]
+		c.expanded = set(data['expanded'])
+		c.pages = dict(data['pages'])
+		c.changed = True
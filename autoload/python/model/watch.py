@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+#
+# watch.py 
+# Copyright (c) 2017 owl
+#
+
+# Watch expressions, evaluated once per stop (and frame) by the controller
+
+import re
+
+# Expressions made of literals only never need to be evaluated twice
+CONSTANT = re.compile(r'^(\s|\d[\w\.]*|[\+\-\*/%\(\)<>&\|\^~!])+$')
+# Plain variable paths are read without running the expression evaluator
+PATH = re.compile(r'^[A-Za-z_]\w*(\s*(\.|->)\s*[A-Za-z_]\w*|\[\d+\])*$')
+# Variable paths inside an expression; a path directly followed by "(" is a call
+OPERAND = re.compile(r'[A-Za-z_]\w*(\s*(\.|->)\s*[A-Za-z_]\w*|\[\d+\])*(\s*\()?')
+# Constructs whose result depends on more than the values of the paths named:
+# calls (above), assignments, increments, unary dereference, computed indices
+OPAQUE = re.compile(r'(?<![=!<>])=(?!=)|\+\+|--|(^|[\(\+\-\*/%<>&\|\^~!=,\?:])\s*\*|\[[^\]]*[^\d\]][^\]]*\]')
+KEYWORDS = set(['sizeof', 'true', 'false', 'nullptr', 'char', 'short', 'int', 'long', 'float',
+	'double', 'bool', 'void', 'signed', 'unsigned', 'const', 'struct'])
+
+# Variable paths an expression reads, or None when they can't be told; an
+# expression needs evaluating again only when the value of one of them changed
+def dependencies(expression):
+	if OPAQUE.search(expression):
+		return None
+	paths = []
+	for match in OPERAND.finditer(expression):
+		text = match.group(0)
+		if text.endswith("("):
+			return None
+		if text in KEYWORDS:
+			continue
+		# Skip suffixes of numbers, e.g. the "f" of 1.5f or "x10" of 0x10
+		if match.start() > 0 and (expression[match.start()-1].isalnum() or expression[match.start()-1] == '.'):
+			continue
+		if text not in paths:
+			paths.append(text)
+	return paths
+
+class Watch(object):
+	__slots__ = ('expression', 'value', 'error', 'changed', 'stale', 'key', 'previous', 'kind',
+		'paths', 'inputs', 'scope')
+
+	def __init__(self, expression):
+		self.expression = expression.strip()
+		self.value = ""
+		self.error = ""
+		self.changed = False	# value differs from the one at the previous stop
+		self.stale = False		# evaluation timed out; value is from an earlier stop
+		self.key = None			# (stop, thread, frame) the value was read at
+		self.previous = None	# value at the previous stop
+		self.paths = None		# variable paths an expression reads (None if unknown)
+		self.inputs = None		# values of those paths when it was last evaluated
+		self.scope = None		# (thread, cfa, function) it was last evaluated in
+		if CONSTANT.match(self.expression):
+			self.kind = "constant"
+		elif PATH.match(self.expression):
+			self.kind = "path"
+		else:
+			self.kind = "expression"
+			self.paths = dependencies(self.expression)
+
+	def snapshot(self):
+		return [self.expression, self.value, self.error, self.changed, self.stale]
+
+	@classmethod
+	def restore(c, data):
+		watch = Watch(data[0])
+		watch.value, watch.error, watch.changed, watch.stale = data[1:]
+		return watch
+
+class Model:
+	sources = {}	# indexed by line numbers, stores watches
+	watches = []
+	timeout = 100	# milliseconds an expression may run for
+	changed = True
+
+	@classmethod
+	def clear(c):
+		c.sources = {}
+		c.watches = []
+		c.changed = True
+
+	@classmethod
+	def add(c, expression):
+		watch = Watch(expression)
+		c.watches.append(watch)
+		c.changed = True
+		return watch
+
+	@classmethod
+	def remove(c, index):
+		if 0 <= index < len(c.watches):
+			del c.watches[index]
+			c.changed = True
+
+	# Forget the values, e.g. when the process exits; the expressions stay
+	@classmethod
+	def reset(c):
+		for watch in c.watches:
+			watch.value = ""
+			watch.error = ""
+			watch.changed = False
+			watch.stale = False
+			watch.key = None
+			watch.previous = None
+			watch.inputs = None
+			watch.scope = None
+		c.changed = True
+
+	# Plain copy of the model; used to ship the model from the debugger worker
+	@classmethod
+	def snapshot(c):
+		return {'watches': [watch.snapshot() for watch in c.watches]}
+
+	@classmethod
+	def restore(c, data):
+		c.watches = [Watch.restore(item) for item in data['watches']]
+		c.changed = True
@@ -12,13 +12,27 @@ sys.path.append(directory)
 import model.backtrace as model_bt
 import model.breakpoint as model_bp
 import model.source as model_src
+import model.variables as model_var
+import model.memory as model_mem
+import model.watch as model_watch
+import model.samples as model_samples
 import vim
 import view.backtrace as view_bt
 import view.breakpoint as view_bp
 import view.source as view_src
-import controller.lldbc
+import view.variables as view_var
+import view.memory as view_mem
+import view.console as view_con
+import view.trace as view_trace
+import view.watch as view_watch
+import view.samples as view_samples
+import view.profile as view_prof
+import controller.remote
+import controller.console
+import metrics
 
 ctrl = None
+console = None
 view_bp.View.initialize()
 
 class Debugger:
@@ -30,31 +44,97 @@ class Debugger:
 def cerr(data):
 	sys.stderr.write(data)
 
+@metrics.entry("vim.BufferLoad")
 def BufferLoad():
 	view_bp.View.update_current(model_bp.Model)
 
 # Initialize debugger and bootstrap the controller
+# When g:superdebug_worker is set, lldb runs in a separate worker process
+# lldb is only imported here, so loading the plugin never touches it
+@metrics.entry("vim.Launch")
 def Launch():
 	global ctrl
-	ctrl = controller.lldbc.Controller()
+	metrics.sbcount = bool(int(vim.eval("get(g:, 'superdebug_profile', 0)")))
+	if int(vim.eval("get(g:, 'superdebug_worker', 0)")):
+		python = vim.eval("get(g:, 'superdebug_worker_python', 'python')")
+		ctrl = controller.remote.RemoteController(python)
+	else:
+		from controller import lldbc
+		ctrl = lldbc.Controller()
+	model_bt.Model.frame_limit = int(vim.eval("get(g:, 'superdebug_frame_limit', 64)"))
+	model_var.Model.page_size = int(vim.eval("get(g:, 'superdebug_variables_page', 100)"))
+	view_con.View.limit = int(vim.eval("get(g:, 'superdebug_console_lines', 10000)"))
+	view_trace.View.limit = view_con.View.limit
+	model_watch.Model.timeout = int(vim.eval("get(g:, 'superdebug_watch_timeout', 100)"))
 
 # Run the program being debugged
+@metrics.entry("vim.Run")
 def Run(program, args=[]):
-	global ctrl
-	ctrl.run(program, args)
+	global ctrl, console
+	# The program's output is collected on a pty and shown in the console view
+	if console: console.stop()
+	console = controller.console.Console(view_con.View.limit)
+	console.start()
+	ctrl.run(program, args, console.path)
+	console.launched()
+
+# Run the program again; the target is reused unless the program was rebuilt
+@metrics.entry("vim.Restart")
+def Restart():
+	global ctrl, console
+	if not ctrl:
+		cerr("error restarting; debugger not launched.")
+		return
+	if not console:
+		console = controller.console.Console(view_con.View.limit)
+		console.start()
+	ClearProcess()
+	ctrl.restart(console.path)
+	console.launched()
+
+# Drop the views of a process which is gone
+def ClearProcess():
+	model_bt.Model.clear()
+	view_bt.View.clear()
+	model_var.Model.clear()
+	view_var.View.clear()
+	model_mem.Model.clear()
+	view_mem.View.clear()
+	model_watch.Model.reset()
+	view_watch.View.render()
 
 # Quit debug controller (and associated process)
+@metrics.entry("vim.Quit")
 def Quit():
-	global ctrl
+	global ctrl, console
 	ctrl.quit()
+	if console:
+		UpdateConsole()
+		console.stop()
+		console = None
+
+# Apply debugger events collected by the listener thread; called from a
+# vim timer so state changes show up without vim blocking on lldb
+@metrics.entry("vim.Poll")
+def Poll():
+	global ctrl
+	UpdateConsole()
+	UpdateTrace()
+	if not ctrl or not ctrl.pending(): return
+	Refresh()
 
 # Refresh debugger state
+@metrics.entry("vim.Refresh")
 def Refresh(timeout=0, nesting=0):
 	global ctrl
 	if not ctrl: return
 	if nesting > 2: return
 
 	state = ctrl.refresh(timeout)
+	if model_samples.Model.changed:
+		# A sampling run finished; the process is running again
+		view_bt.View.clear()
+		OpenViewSamples()
 	if state == "invalid":
 		# Invalid state needs to be ignored, nothing changes - and no
 		# operation should be allowed
@@ -71,7 +151,6 @@ def Refresh(timeout=0, nesting=0):
 		# print(state)
 		view_bt.View.render()
 		view_bt.View.reset_cursor()
-		#FIXME: Only navigate if the source/line has changed
 		BacktraceNavigate()
 	elif state == "running":
 		print(state)
@@ -89,8 +168,7 @@ def Refresh(timeout=0, nesting=0):
 	elif state == "detached":
 		print(state)
 	elif state == "exited":
-		model_bt.Model.clear()
-		view_bt.View.clear()
+		ClearProcess()
 		print(state)
 	elif state == "suspended":
 		print(state)
@@ -109,15 +187,170 @@ def OpenViewSource():
 	else:
 		view_src.View.switch_to_window()
 
+# Initilize/select variables view
 def OpenViewVariables():
 	global ctrl
-	pass
+	if not view_var.View.valid():
+		view_var.View.initialize(model_var.Model)
+	else:
+		view_var.View.switch_to()
+	UpdateVariables()
 
+# Read variables of the selected frame (once per stop/frame) if shown
+def UpdateVariables():
+	global ctrl
+	if not ctrl or not ctrl.running(): return
+	if not view_var.View.valid(): return
+	ctrl.variables()
+	view_var.View.render()
+
+# Expand/collapse the variable under cursor, or load its next page
+@metrics.entry("vim.VariablesNavigate")
+def VariablesNavigate():
+	global ctrl
+	if not ctrl: return
+	item = view_var.View.info()
+	if not item: return
+	if isinstance(item, model_var.Page):
+		ctrl.more_variables(item.variable.path)
+	else:
+		ctrl.expand_variable(item.path)
+	view_var.View.render()
+
+# Initilize/select memory view; address is a number or an expression
+def OpenViewMemory(address=None):
+	global ctrl
+	if not view_mem.View.valid():
+		view_mem.View.initialize(model_mem.Model)
+	else:
+		view_mem.View.switch_to()
+	UpdateMemory(address)
+
+# Re-read the shown memory; only pages the inferior could have written are
+# read again after a stop
+def UpdateMemory(address=None):
+	global ctrl
+	if not ctrl or not ctrl.running(): return
+	if not view_mem.View.valid(): return
+	ctrl.read_memory(address, view_mem.View.rows())
+	view_mem.View.render()
+
+# Scroll the memory view by whole windows
+@metrics.entry("vim.MemoryScroll")
+def MemoryScroll(count):
+	global ctrl
+	if not ctrl: return
+	model_mem.Model.scroll(count * model_mem.Model.rows)
+	UpdateMemory(model_mem.Model.address)
+
+# Initilize/select watch view
+def OpenViewWatch():
+	if not view_watch.View.valid():
+		view_watch.View.initialize(model_watch.Model)
+	else:
+		view_watch.View.switch_to()
+	UpdateWatches()
+
+# Evaluate watches in the selected frame (once per stop/frame) if shown
+def UpdateWatches():
+	global ctrl
+	if not view_watch.View.valid(): return
+	if ctrl and ctrl.running():
+		ctrl.evaluate_watches()
+	view_watch.View.render()
+
+@metrics.entry("vim.WatchAdd")
+def WatchAdd(expression):
+	global ctrl
+	if not expression.strip(): return
+	if ctrl:
+		ctrl.watch_add(expression)
+	else:
+		model_watch.Model.add(expression)
+	view_watch.View.render()
+
+# Remove the watch under the cursor
+@metrics.entry("vim.WatchRemove")
+def WatchRemove():
+	global ctrl
+	index = view_watch.View.index()
+	if index < 0: return
+	if ctrl:
+		ctrl.watch_remove(index)
+	else:
+		model_watch.Model.remove(index)
+	view_watch.View.render()
+
+# Sample the stacks of every thread hz times a second, for some seconds; the
+# call tree is shown once the run is over
+@metrics.entry("vim.Sample")
+def Sample(hz, seconds):
+	global ctrl
+	if not ctrl or not ctrl.running():
+		cerr("error sampling; no running process.")
+		return
+	ctrl.sample(int(hz), float(seconds))
+	print("sampling at %s Hz for %s seconds"%(hz, seconds))
+
+# Initilize/select samples view
+def OpenViewSamples():
+	if not view_samples.View.valid():
+		view_samples.View.initialize(model_samples.Model)
+	else:
+		view_samples.View.switch_to()
+	model_samples.Model.changed = True
+	view_samples.View.render()
+
+# Fold/unfold the call tree node under the cursor
+@metrics.entry("vim.SamplesNavigate")
+def SamplesNavigate():
+	node = view_samples.View.info()
+	if not node or not node.children: return
+	model_samples.Model.fold(node.path)
+	view_samples.View.render()
+
+# Write the samples as folded stacks (one "a;b;c count" line per stack)
+def SamplesExport(path):
+	with open(path, 'w') as f:
+		f.write("\n".join(model_samples.Model.export())+"\n")
+	print("samples written to %s"%(path))
+
+# Initilize/select console view
 def OpenViewConsole():
+	if not view_con.View.valid():
+		view_con.View.initialize()
+	else:
+		view_con.View.switch_to()
+	UpdateConsole()
+
+# Append the program output collected since the last poll, in one batch
+def UpdateConsole():
+	global console
+	if not console or not console.pending(): return
+	if not view_con.View.valid(): return
+	lines, dropped = console.drain()
+	view_con.View.append(lines, dropped)
+
+# Initilize/select tracepoint output view
+def OpenViewTrace():
+	if not view_trace.View.valid():
+		view_trace.View.initialize()
+	else:
+		view_trace.View.switch_to()
+	UpdateTrace()
+
+# Append tracepoint output and refresh hit counts, in one batch per poll
+def UpdateTrace():
 	global ctrl
-	pass
+	if not ctrl or not ctrl.running() or not model_bp.Model.tracing(): return
+	trace = ctrl.trace()
+	if not trace: return
+	view_bp.View.update_hits(model_bp.Model.update_hits(trace['hits']))
+	if view_trace.View.valid():
+		view_trace.View.append(trace['lines'], trace['dropped'])
 
 # Open frame under cursor in backtrace view
+@metrics.entry("vim.BacktraceNavigate")
 def BacktraceNavigate():
 	global ctrl
 	if not ctrl: return
@@ -125,7 +358,7 @@ def BacktraceNavigate():
 	# Get line selection from the backtrace view
 	frame = view_bt.View.info()
 	if not frame:
-		Refresh(ctrl.timeoutEvents)
+		Refresh()
 		return
 
 	if isinstance(frame, model_bt.Frame):
@@ -136,14 +369,44 @@ def BacktraceNavigate():
 		ctrl.update_source()
 		view_bt.View.render()
 		view_src.View.render()
+		UpdateVariables()
+		UpdateMemory()
+		UpdateWatches()
+	elif isinstance(frame, model_bt.More):
+		# Load the next batch of frames of a capped stack
+		model_bt.Model.extend(frame.thread.id)
+		ctrl.load_frames(frame.thread)
+		model_bt.Model.navigated = frame.thread.number
+		view_bt.View.render()
+	elif isinstance(frame, model_bt.Group):
+		# Unfold the group; it shows the frames of its first thread
+		thread = frame.threads[0]
+		model_bt.Model.fold_group(frame.key)
+		if frame.key in model_bt.Model.expanded_groups and not thread.loaded:
+			ctrl.load_frames(thread)
+		model_bt.Model.navigated = thread.number
+		view_bt.View.render()
 	else:
-		# Attempt to fold the thread
+		# Attempt to fold the thread; frames are fetched on first unfold
 		model_bt.Model.fold(frame.id)
+		if frame.id in model_bt.Model.expanded and not frame.loaded:
+			ctrl.load_frames(frame)
 		model_bt.Model.navigated = frame.number
 		view_bt.View.render()
 
-# Toggle breakpoint
-def BreakpointToggle(source='', line=''):
+# Switch the backtrace between one row per thread and one row per unique stack
+@metrics.entry("vim.BacktraceAggregate")
+def BacktraceAggregate():
+	global ctrl
+	model_bt.Model.aggregate = not model_bt.Model.aggregate
+	model_bt.Model.changed = True
+	if ctrl and ctrl.running():
+		ctrl.backtrace()
+	view_bt.View.render()
+
+# Toggle breakpoint; with a message, set a tracepoint logging it instead
+@metrics.entry("vim.BreakpointToggle")
+def BreakpointToggle(source='', line='', message=''):
 	global ctrl
 	# Detect source/line if necessary from current buffer/window
 	if not source or not line:
@@ -160,16 +423,48 @@ def BreakpointToggle(source='', line=''):
 	bp = model_bp.Model.get(source, line)
 	if not bp: bp = model_bp.Model.get(os.path.basename(source),line)
 	if not bp:
-		model_bp.Model.add(source, line)
-		view_bp.View.add(source, line)
+		model_bp.Model.add(source, line, message)
+		view_bp.View.add(source, line, model_bp.Model.get(source, line))
 		if ctrl and ctrl.running(): ctrl.breakpoint_add(source, line)
-		print("added breakpoint from %s line %i"%(source,line))
+		print("added %s from %s line %i"%("tracepoint" if message else "breakpoint",source,line))
 	else:
 		if ctrl and ctrl.running(): ctrl.breakpoint_delete(bp.source, bp.line)
 		view_bp.View.remove(source, line)
 		model_bp.Model.delete(bp.source, bp.line)
 		print("deleted breakpoint from %s line %i"%(source,line))
 
+# Filter the breakpoint at the cursor (added if missing) inside the debugger;
+# arguments left as None keep their current value. thread is a thread id, or
+# -1 for the thread selected in the backtrace
+@metrics.entry("vim.BreakpointOptions")
+def BreakpointOptions(condition=None, ignore=None, thread=None):
+	global ctrl
+	source,line,modified = view_bp.View.line_info()
+	if modified:
+		cerr("error setting breakpoint; buffer has unsaved changes.")
+		return
+	if not source:
+		print("error setting breakpoint; anonymous buffer.")
+		return
+	bp = model_bp.Model.get(source, line)
+	if not bp: bp = model_bp.Model.get(os.path.basename(source),line)
+	if not bp:
+		BreakpointToggle(source, line)
+		bp = model_bp.Model.get(source, line)
+	if thread == -1:
+		if not model_bt.Model.selected:
+			cerr("error filtering breakpoint by thread; no thread selected.")
+			return
+		thread = model_bt.Model.selected.id
+	bp.set_options(bp.condition if condition is None else condition,
+		bp.ignore if ignore is None else ignore,
+		bp.thread if thread is None else thread)
+	if ctrl and ctrl.running(): ctrl.breakpoint_update(bp.source, bp.line)
+	view_bp.View.update_sign(bp)
+	print("breakpoint %s line %i: condition \"%s\", ignore %i, thread %s"%(bp.source, bp.line,
+		bp.condition, bp.ignore, str(bp.thread) if bp.thread else "any"))
+
+@metrics.entry("vim.BreakpointsClear")
 def BreakpointsClear():
 	global ctrl
 	ctrl.breakpoints_clear()
@@ -177,45 +472,86 @@ def BreakpointsClear():
 		item.set = False
 	view_bp.View.clear()
 
+@metrics.entry("vim.Pause")
 def Pause():
 	global ctrl
 	ctrl.pause()
-	Refresh(ctrl.timeoutEventsFast)
+	Refresh()
 
+@metrics.entry("vim.Continue")
 def Continue():
 	global ctrl
 	ctrl.resume()
 	Refresh()
 
+@metrics.entry("vim.StepOver")
 def StepOver():
 	global ctrl
 	ctrl.step_over()
-	Refresh(ctrl.timeoutEventsFast)
-	ctrl.update_source()
-	view_src.View.render()
+	Refresh()
 
+@metrics.entry("vim.StepInto")
 def StepInto():
 	global ctrl
 	ctrl.step_into()
-	Refresh(ctrl.timeoutEventsFast)
-	ctrl.update_source()
-	view_src.View.render()
+	Refresh()
 
+@metrics.entry("vim.StepOut")
 def StepOut():
 	global ctrl
 	ctrl.step_out()
-	Refresh(ctrl.timeoutEventsFast)
-	ctrl.update_source()
-	view_src.View.render()
+	Refresh()
 
+@metrics.entry("vim.Attach")
 def Attach(pid=-1, name=""):
 	global ctrl
 	ctrl.attach(pid, name)
 	Refresh()
 
+# Open a core file of program; the views show it like a stopped process
+@metrics.entry("vim.LoadCore")
+def LoadCore(program, core):
+	global ctrl
+	ctrl.load_core(program, core)
+	if not ctrl.running(): return
+	view_bt.View.render()
+	view_bt.View.reset_cursor()
+	BacktraceNavigate()
+
+@metrics.entry("vim.Detach")
 def Detach():
 	global ctrl
 	ctrl.detach()
-	Refresh()
+	model_bt.Model.clear(True)
+	view_bt.View.clear()
 
+# Attach just long enough to copy every thread's stack, then browse the copy
+@metrics.entry("vim.Snapshot")
+def Snapshot(pid=-1, name=""):
+	global ctrl
+	if not ctrl.snapshot(pid, name): return
+	view_bt.View.render()
+	view_bt.View.reset_cursor()
+	BacktraceNavigate()
 
+# Show timings of controller operations, renders and vim entry points
+def Profile():
+	global ctrl
+	if not view_prof.View.valid():
+		view_prof.View.initialize()
+	else:
+		view_prof.View.switch_to()
+	view_prof.View.show(metrics.report(ProfileData()))
+
+def ProfileDump(path):
+	metrics.save(path, ProfileData())
+	print("profile written to %s"%(path))
+
+def ProfileData():
+	global ctrl
+	data = metrics.dump()
+	# Controller operations of the worker run in another process
+	if isinstance(ctrl, controller.remote.RemoteController) and ctrl.alive:
+		for name, item in (ctrl.profile() or {}).items():
+			data["worker."+name] = item
+	return data
@@ -4,8 +4,21 @@
 # Copyright (c) 2017 owl
 #
 
+from __future__ import absolute_import
 import vim
-import view
+from view import view
+import metrics
+
+GROUP_IDS = 16		# thread ids listed on a group's row
+HEADER = ["", "<Backtracke>"]
+
+# Lines of one row (a thread or group) and of its frames when shown
+class Block(object):
+	__slots__ = ('lines', 'shown')
+
+	def __init__(self, lines, shown):
+		self.lines = lines
+		self.shown = shown
 
 class View:
 	link = None
@@ -13,11 +26,14 @@ class View:
 	line_frame = 1
 	line_thread = 1
 	line_current = 1
+	keys = None		# row keys of the last render, in order
+	blocks = []		# Block per row of the last render
 
 	@classmethod
 	def initialize(c, model):
 		vim.command(":silent e [BACKTRACE]")
 		vim.command(":nmap <silent> <buffer> <Enter> : python BacktraceNavigate()<CR>")
+		vim.command(":nmap <silent> <buffer> a : python BacktraceAggregate()<CR>")
 		c.link = view.Link()
 		c.model = model
 		c.link.tab.window.buffer.set_readonly(True)
@@ -34,13 +50,19 @@ class View:
 		c.line_frame = 1
 		c.line_thread = 1
 		c.line_current = 1
+		c.keys = None
+		c.blocks = []
 	
 	@classmethod
 	def reset_cursor(c):
 		if not c.link: return
 		c.link.tab.window.set_cursor(c.line_frame, 1)
 
+	# Threads named in the model's delta get their lines built and written
+	# again; the others keep theirs from the last render. When threads came
+	# or went, and for groups, every row is built and the buffer diffed.
 	@classmethod
+	@metrics.timed("view.backtrace.render")
 	def render(c):
 		if not c.link: return
 		if not c.model: return
@@ -48,60 +70,132 @@ class View:
 		if not c.model.changed:
 			return
 		c.model.changed = False
+		touched = c.model.take_delta().touched()
 
-		c.link.switch_to()
-		c.link.tab.window.buffer.set_readonly(False)
-		c.link.clear()
-		c.link.write("<Backtracke>")
-		lineNum = 2
-		lineNav = -1
-		# Render every thread, and selected/unfolded threads' frames
-		for item in c.model.threads:
-			line = ""
-			if item.default:
-				line = line + "*"
-				c.line_thread = lineNum+1
-			else: line = line + " "
-			line = line + "Thread #"+str(item.number)
-			line = line + " id="+str(item.id)
-			lineNum = lineNum + 1
-			c.link.write(line)
+		# Rows are threads, or groups of threads with identical stacks; the
+		# first thread of a group stands for it
+		if c.model.aggregate:
+			rows = [(group.key, group, group.threads[0], group.key in c.model.expanded_groups)
+				for group in c.model.groups]
+		else:
+			rows = [(item.id, item, item, item.id in c.model.expanded)
+				for item in c.model.threads]
+		keys = [row[0] for row in rows]
+		buf = c.link.tab.window.buffer
+		incremental = not c.model.aggregate and buf.lines is not None and keys == c.keys
 
-			# Update model source index for thread folding
-			c.model.sources[lineNum] = item
+		blocks = []
+		ranges = []		# (start, count, lines) of changed rows, on the last render
+		sources = {}
+		lineNum = len(HEADER)	# lines before the row
+		lineOld = len(HEADER)	# same, on the last render
+		lineNav = -1
+		lineCursor = -1
+		for index, (key, source, item, expanded) in enumerate(rows):
+			# If thread not selected, and not expanded - don't render frames
+			shown = item.default or expanded
+			count = 1 + (len(item.frames) + (1 if item.more else 0) if shown else 0)
+			block = c.blocks[index] if incremental else None
+			if block is None or key in touched or block.shown != shown or len(block.lines) != count:
+				fresh = c.block(source, item, shown)
+				if block is not None:
+					ranges.append((lineOld, len(block.lines), fresh.lines))
+			else:
+				fresh = block
+			if block is not None:
+				lineOld += len(block.lines)
+			blocks.append(fresh)
 
+			# Update model source index for folding and navigation
+			lineNum += 1
+			sources[lineNum] = source
+			if item.default:
+				c.line_thread = lineNum
 			if c.model.navigated == item.number:
 				lineNav = lineNum
-
-			# If thread not selected, and not expanded - don't render frames
-			if not item.default and item.id not in c.model.expanded:
+			if not shown:
 				continue
-			# Render every frame in thread item
 			for frame in item.frames:
-				line = "\t"
+				lineNum += 1
+				sources[lineNum] = frame
 				if frame.default:
-					line = line + "*"
-					c.line_frame = lineNum+1
-				else:
-					line = line + " "
-				line = line + "Frame #"+str(frame.number)+" "
-				line = line + frame.name+" "
-				if frame.path:
-					pathLine = "["+str(frame.line)+"]" if frame.line else ""
-					line = line + "("+frame.file+" "+pathLine+")"
-				lineNum = lineNum + 1
-				c.link.write(line)
-				if frame.default:
-					c.link.tab.window.set_cursor(lineNum,1)
+					c.line_frame = lineNum
+					lineCursor = lineNum
+			# Capped stack; the last row loads the next batch of frames
+			if item.more:
+				lineNum += 1
+				sources[lineNum] = c.model.more(item)
+		c.model.sources = sources
+		c.keys = keys
+		c.blocks = blocks
 
-				# Update model source index for backtrace navigation
-				c.model.sources[lineNum] = frame
+		c.link.switch_to()
+		if not incremental:
+			lines = list(HEADER)
+			for block in blocks:
+				lines.extend(block.lines)
+			buf.set_readonly(False)
+			c.link.render(lines)
+			buf.set_readonly(True)
+		elif ranges:
+			buf.set_readonly(False)
+			c.link.patch(ranges)
+			buf.set_readonly(True)
 
-		# Select current backtrace line, and mark it readonly
+		# Select current backtrace line and highlight the selected frame
+		lineSelected = lineCursor
 		if lineNav >= 0:
-			c.link.tab.window.set_cursor(lineNav, 1)
+			lineCursor = lineNav
 			c.line_current = lineNav
-		c.link.tab.window.buffer.set_readonly(True)
+		cursor = (lineCursor, 2) if lineCursor >= 0 else None
+		c.link.tab.window.update(cursor, max(lineSelected, 0))
+
+	# Lines of a thread's or group's row, and of its frames when shown
+	@classmethod
+	def block(c, source, item, shown):
+		lines = [c.thread_line(item) if source is item else c.group_line(source)]
+		if shown:
+			for frame in item.frames:
+				lines.append(c.frame_line(frame))
+			if item.more:
+				lines.append("\t  ... more frames")
+		return Block(lines, shown)
+
+	@classmethod
+	def frame_line(c, frame):
+		line = "\t"
+		if frame.default:
+			line = line + "*"
+		else:
+			line = line + " "
+		line = line + "Frame #"+str(frame.number)+" "
+		line = line + frame.name+" "
+		if frame.path:
+			pathLine = "["+str(frame.line)+"]" if frame.line else ""
+			line = line + "("+frame.file+" "+pathLine+")"
+		return line
+
+	@classmethod
+	def thread_line(c, item):
+		line = "*" if item.default else " "
+		line = line + "Thread #"+str(item.number)
+		line = line + " id="+str(item.id)
+		if item.name:
+			line = line + " "+item.name
+		return line
+
+	# Count and thread ids of a group; long id lists are cut short
+	@classmethod
+	def group_line(c, group):
+		item = group.threads[0]
+		line = "*" if item.default else " "
+		line = line + str(len(group.threads))+(" threads" if len(group.threads) > 1 else " thread")
+		line = line + " ids="+",".join([str(thread.id) for thread in group.threads[:GROUP_IDS]])
+		if len(group.threads) > GROUP_IDS:
+			line = line + ",... (+"+str(len(group.threads)-GROUP_IDS)+")"
+		if item.name:
+			line = line + " "+item.name
+		return line
 
 	# Return thread/frame object from the source index
 	# TODO: move this into model, indexed by line cursor
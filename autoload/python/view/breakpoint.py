@@ -4,11 +4,16 @@
 # Copyright (c) 2017 owl
 #
 
-import os,re
+from __future__ import absolute_import
+import os,re,sys
 import vim
-import view
+from view import view
+import metrics
 
 VBP_NAME = "sdebug_bp"
+VBP_COND = "sdebug_bpc"		# breakpoints with a condition, ignore count or thread filter
+TRACE_NAME = "sdebug_tp"		# tracepoint signs; one per hit count label
+SIGN_RE = re.compile(r'line=(\d+)\s+id=(\d+)\s+name=(\S+)', re.MULTILINE)
 
 def cerr(data):
 	sys.stderr.write(data)
@@ -16,6 +21,12 @@ def cerr(data):
 class View:
 	# Map of {path:{line, boolean}}
 	breakpoints = {}
+	# Map of {buffer number:(changedtick, lines with a sign)}
+	signs = {}
+	# Tracepoint sign names defined so far
+	defined = set()
+	# Map of {(path, line):tracepoint sign name last placed}
+	traced = {}
 
 	@classmethod
 	def sign(add,path,line):
@@ -32,6 +43,7 @@ class View:
 	@classmethod
 	def initialize(c):
 		vim.command('silent sign define %s text=BP texthl=Search'%(VBP_NAME))
+		vim.command('silent sign define %s text=B? texthl=Search'%(VBP_COND))
 		#linehl=Search
 	
 	# def update_breakpoints(c):
@@ -43,36 +55,82 @@ class View:
 		# import re
 		# rex = re.compile(r'Signs\sfor\s.+\:\n.*?', re.MULTILINE)
 		
+	# Place the signs of breakpoints in the current buffer. Signs already
+	# placed are remembered per buffer until the buffer is edited, so
+	# switching buffers is usually just a couple of dictionary lookups.
 	@classmethod
+	@metrics.timed("view.breakpoint.update_current")
 	def update_current(c, model):
-		path = vim.eval('expand("%:p")')
-		if not os.path.exists(path): return
+		buf = vim.current.buffer
+		if not buf.name or not model.container: return
+		lines = model.lookup(buf.name)
+		if not lines: return
+
+		tick = int(vim.eval('b:changedtick'))
+		state = c.signs.get(buf.number)
+		if not state or state[0] != tick:
+			# Unknown or edited buffer; signs may have moved, ask vim once
+			state = (tick, c.placed(vim.eval('SDebugSignlistCurrent()')))
+			c.signs[buf.number] = state
 
-		text = vim.eval('SDebugSignlistCurrent()')
-		if not text:
-			cerr("no signs to load")
-			return
-
-		# Parse existing signs to ensure we don't add duplicates
-		import re
-		rex = re.compile(r'line=(\d+)\s+id=(\d+)\s+name=(\S+)', re.MULTILINE)
+		# Duplicate breakpoint signs are ignored
+		missing = [ln for ln in lines if ln not in state[1]]
+		if not missing: return
+		# Must provide full path file as argument, otherwise errors
+		vim.command(" | ".join(['silent sign place %i line=%i name=%s file=%s'%(ln,ln,c.sign_name(lines[ln]),buf.name) for ln in missing]))
+		state[1].update(missing)
 
-		signlist = {}
-		for match in rex.finditer(text):
+	# Parse the lines holding breakpoint signs from `sign place` output
+	@classmethod
+	def placed(c, text):
+		lines = set()
+		for match in SIGN_RE.finditer(text or ""):
 			line, id, name = match.groups()
-			if name == VBP_NAME:
-				signlist[line] = True
+			if name.startswith(VBP_NAME) or name.startswith(TRACE_NAME):
+				lines.add(int(line))
+		return lines
 
-		# Attempt to load breakpoint signs into this file
-		# Duplicate breakpoint signs are ignored
-		for src,lines in model.container.iteritems():
-			if os.path.basename(path) != src and src != path: continue
-			if os.path.basename(path) == src: src = path
-			# Update each breakpoint line in current file as a BP sign
-			for ln, bp in lines.iteritems():
-				if str(ln) in signlist: continue
-				# Must provide full path file as argument, otherwise errors
-				vim.command('silent sign place %i line=%i name=%s file=%s'%(ln,ln,VBP_NAME,path))
+	# Keep the sign cache of the current buffer in line with add/remove
+	@classmethod
+	def update_cache(c, source, line, placed):
+		buf = vim.current.buffer
+		state = c.signs.get(buf.number)
+		if buf.name != source:
+			c.signs = {}
+		elif state:
+			if placed: state[1].add(line)
+			else: state[1].discard(line)
+
+	# Tracepoints show their hit count (two characters at most) as sign text
+	@classmethod
+	def sign_name(c, bp):
+		if not bp.message:
+			return VBP_COND if bp.conditional() else VBP_NAME
+		text = "TP" if not bp.hits else str(bp.hits) if bp.hits < 100 else "++"
+		name = "%s_%s"%(TRACE_NAME, text.replace("+", "p"))
+		if name not in c.defined:
+			vim.command('silent sign define %s text=%s texthl=Question'%(name, text))
+			c.defined.add(name)
+		return name
+
+	# Replace the signs of tracepoints whose hit count label changed; sources
+	# without a buffer get the right sign once they are loaded
+	@classmethod
+	@metrics.timed("view.breakpoint.update_hits")
+	def update_hits(c, bps):
+		commands = []
+		for bp in bps:
+			name = c.sign_name(bp)
+			if name != c.traced.get((bp.source, bp.line)):
+				c.traced[(bp.source, bp.line)] = name
+				commands.append('silent! sign place %i name=%s file=%s'%(bp.line, name, bp.source))
+		if commands:
+			vim.command(" | ".join(commands))
+
+	# Show whether a breakpoint whose filters were changed is conditional
+	@classmethod
+	def update_sign(c, bp):
+		vim.command('silent! sign place %i name=%s file=%s'%(bp.line, c.sign_name(bp), bp.source))
 
 	@classmethod
 	def line_info(c):
@@ -82,13 +140,15 @@ class View:
 		return (source,line,modified)
 	
 	@classmethod
-	def add(c, source, line):
+	def add(c, source, line, bp=None):
 		if vim.current.buffer.options['modified']:
 			cerr("error setting breakpoint; buffer has unsaved changes.")
 			return
 		try:
 			cmd = 'silent sign '
-			vim.command(cmd+'place %i line=%i name=%s file=%s'%(line,line,VBP_NAME,source))
+			name = c.sign_name(bp) if bp else VBP_NAME
+			vim.command(cmd+'place %i line=%i name=%s file=%s'%(line,line,name,source))
+			c.update_cache(source, line, True)
 		except vim.error as err:
 			print(err)
 
@@ -99,9 +159,12 @@ class View:
 			return
 		cmd = 'silent sign '
 		vim.command(cmd+'unplace %i file=%s'%(line,source))
+		c.update_cache(source, line, False)
+		c.traced.pop((source, line), None)
 
 	@classmethod
 	def clear(c):
 		#TODO implement clearing of all breakpoints
-		pass
+		c.signs = {}
+		c.traced = {}
 
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+#
+# console.py 
+# Copyright (c) 2017 owl
+#
+
+from __future__ import absolute_import
+import vim
+from view import view
+import metrics
+
+class View:
+	link = None
+	limit = 10000	# lines kept in the console buffer
+
+	@classmethod
+	def initialize(c):
+		vim.command(":silent e [CONSOLE]")
+		c.link = view.Link()
+		c.link.tab.window.buffer.set_readonly(True)
+		c.link.tab.window.buffer.set_nofile(True)
+
+	@classmethod
+	def valid(c):
+		return c.link != None
+
+	@classmethod
+	def switch_to(c):
+		if not c.link: return
+		c.link.switch_to()
+
+	@classmethod
+	def clear(c):
+		if not c.link: return
+		c.link.clear()
+
+	@classmethod
+	@metrics.timed("view.console.append")
+	def append(c, lines, dropped=0):
+		c.write(lines, dropped)
+
+	# Append a batch of output lines, trimming the oldest ones past the limit
+	@classmethod
+	def write(c, lines, dropped=0):
+		if not c.link: return
+		if dropped:
+			lines = ["<%i lines dropped>"%(dropped)] + lines
+		if not lines: return
+		buf = c.link.tab.window.buffer
+		window = c.link.tab.window.vim
+		follow = window.cursor[0] == len(buf.vim)
+		buf.set_readonly(False)
+		if len(buf.vim) == 1 and not buf.vim[0]:
+			buf.vim[:] = lines[-c.limit:]
+		else:
+			buf.vim.append(lines[-c.limit:])
+		excess = len(buf.vim) - c.limit
+		if excess > 0:
+			buf.vim[0:excess] = None
+		buf.set_readonly(True)
+		# Keep following the output unless the cursor was moved away from it
+		if follow:
+			window.cursor = (len(buf.vim), 0)
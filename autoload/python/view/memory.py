@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+#
+# memory.py 
+# Copyright (c) 2017 owl
+#
+
+from __future__ import absolute_import
+import vim
+from view import view
+import metrics
+
+# Printable ascii column, indexed by byte value
+ASCII = [chr(value) if 32 <= value < 127 else "." for value in range(256)]
+
+class View:
+	link = None
+	model = None
+
+	@classmethod
+	def initialize(c, model):
+		vim.command(":silent e [MEMORY]")
+		vim.command(":nmap <silent> <buffer> <C-f> : python MemoryScroll(1)<CR>")
+		vim.command(":nmap <silent> <buffer> <C-b> : python MemoryScroll(-1)<CR>")
+		c.link = view.Link()
+		c.model = model
+		c.link.tab.window.buffer.set_readonly(True)
+		c.link.tab.window.buffer.set_nofile(True)
+
+	@classmethod
+	def valid(c):
+		return c.link != None
+
+	@classmethod
+	def switch_to(c):
+		if not c.link: return
+		c.link.switch_to()
+
+	@classmethod
+	def clear(c):
+		if not c.link: return
+		c.link.clear()
+
+	# Number of rows which fit the window
+	@classmethod
+	def rows(c):
+		if not c.link: return 0
+		return c.link.height()
+
+	@classmethod
+	@metrics.timed("view.memory.render")
+	def render(c):
+		if not c.link: return
+		if not c.model: return
+		if not c.model.changed: return
+		c.model.changed = False
+
+		width = c.model.width
+		start, end = c.model.address, c.model.end()
+		lines = []
+		for page, size, data in c.model.pages:
+			if data is not None:
+				# Rows are sliced out of the page without copying it
+				data = memoryview(data)
+			for address in range(max(start, page), min(end, page+size), width):
+				if data is None:
+					lines.append("0x%016x: %s"%(address, " ".join(["??"]*width)))
+					continue
+				values = bytearray(data[address-page:address-page+width])
+				lines.append("0x%016x: %s  %s"%(address, " ".join(["%02x"%(value) for value in values]),
+					"".join([ASCII[value] for value in values])))
+
+		c.link.switch_to()
+		c.link.tab.window.buffer.set_readonly(False)
+		c.link.render(lines if lines else ["<no memory>"])
+		c.link.tab.window.buffer.set_readonly(True)
@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+#
+# profile.py 
+# Copyright (c) 2017 owl
+#
+
+from __future__ import absolute_import
+import vim
+from view import view
+
+class View:
+	link = None
+
+	@classmethod
+	def initialize(c):
+		vim.command(":silent botright new [PROFILE]")
+		c.link = view.Link()
+		c.link.tab.window.buffer.set_readonly(True)
+		c.link.tab.window.buffer.set_nofile(True)
+
+	@classmethod
+	def valid(c):
+		return c.link != None
+
+	@classmethod
+	def switch_to(c):
+		if not c.link: return
+		c.link.switch_to()
+
+	# Show report lines; the buffer is rewritten on every report
+	@classmethod
+	def show(c, lines):
+		if not c.link: return
+		buf = c.link.tab.window.buffer
+		buf.set_readonly(False)
+		buf.vim[:] = lines
+		buf.set_readonly(True)
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+#
+# samples.py 
+# Copyright (c) 2017 owl
+#
+
+from __future__ import absolute_import
+import vim
+from view import view
+import metrics
+
+class View:
+	link = None
+	model = None
+
+	@classmethod
+	def initialize(c, model):
+		vim.command(":silent botright new [SAMPLES]")
+		vim.command(":nmap <silent> <buffer> <Enter> : python SamplesNavigate()<CR>")
+		c.link = view.Link()
+		c.model = model
+		c.link.tab.window.buffer.set_readonly(True)
+		c.link.tab.window.buffer.set_nofile(True)
+
+	@classmethod
+	def valid(c):
+		return c.link != None
+
+	@classmethod
+	def switch_to(c):
+		if not c.link: return
+		c.link.switch_to()
+
+	# Top-down call tree; children sorted by samples, folded unless expanded
+	@classmethod
+	@metrics.timed("view.samples.render")
+	def render(c):
+		if not c.link: return
+		if not c.model: return
+		if not c.model.changed: return
+		c.model.changed = False
+
+		total = float(max(c.model.root.total, 1))
+		lines = ["%i samples, %i stacks, process paused %.1f ms"%(c.model.samples, c.model.stacks, c.model.paused),
+			"   total    self"]
+		sources = {}
+		pending = sorted(c.model.root.children.values(), key=lambda node: node.total)
+		while pending:
+			node = pending.pop()
+			expanded = node.path in c.model.expanded
+			marker = ("- " if expanded else "+ ") if node.children else "  "
+			lines.append("%7.1f%% %6.1f%% %s%s%s"%(node.total*100/total, node.own*100/total,
+				"  "*node.depth, marker, node.name))
+			sources[len(lines)] = node
+			if expanded:
+				pending.extend(sorted(node.children.values(), key=lambda node: node.total))
+		c.model.sources = sources
+
+		c.link.switch_to()
+		c.link.tab.window.buffer.set_readonly(False)
+		c.link.render(lines)
+		c.link.tab.window.buffer.set_readonly(True)
+
+	# Return node under the cursor
+	@classmethod
+	def info(c):
+		if not c.link: return
+		if not c.model: return
+		return c.model.sources.get(c.link.tab.window.get_cursor()[0])
@@ -4,12 +4,20 @@
 # Copyright (c) 2017 owl
 #
 
+from __future__ import absolute_import
 import vim
-import view
+from view import view
+import metrics
+
+VPC_NAME = "sdebug_pc"
+VPC_ID = 1000001	# sign id of the current line; breakpoint signs use their line as id
 
 class View:
 	link = None
 	model = None
+	listing = None		# (buffer number, function) of the shown disassembly
+	buffers = {}		# path (or [symbol] for disassembly) -> buffer number
+	marked = None		# buffer number holding the current line sign
 
 	@classmethod
 	def initialize(c, model):
@@ -17,6 +25,7 @@ class View:
 		vim.command(":nmap <silent> <Leader>o : python StepOut()<CR>")
 		vim.command(":nmap <silent> <Leader>i : python StepInto()<CR>")
 		vim.command(":nmap <silent> <Leader>n : python StepOver()<CR>")
+		vim.command("silent sign define %s text=-> texthl=Search linehl=CursorLine"%(VPC_NAME))
 		c.link = view.Link()
 		c.link.tab.window.buffer.set_nofile(True)
 		c.model = model
@@ -30,8 +39,10 @@ class View:
 		if not c.link: return
 		c.link.clear()
 
-	# Render the source model
+	# Render the source model. Files which are already loaded are shown
+	# again without :edit, so a step only moves the cursor and the pc sign.
 	@classmethod
+	@metrics.timed("view.source.render")
 	def render(c):
 		if not c.link: return
 		if not c.model: return
@@ -39,34 +50,63 @@ class View:
 		if not c.model.changed: return
 		c.model.changed = False
 
-		c.link.tab.switch()
-		c.link.tab.window.switch()
+		c.link.switch_to_window()
 
 		if c.model.path:
 			# Working with source file
-			c.link.switch_to()
-			vim.command(":silent nos e "+c.model.path+"")
-			c.link.tab.window.set_cursor(c.model.line, c.model.column)
+			if not c.show(c.model.path):
+				vim.command(":silent nos e "+c.model.path+"")
+				c.buffers[c.model.path] = vim.current.buffer.number
+			c.mark(c.model.line, c.model.column+1)
 		elif c.model.data:
-			c.link.switch_to()
 			if not c.model.symbol:
 				return
-			vim.command(":silent e ["+str(c.model.symbol)+"]")
+			name = "["+str(c.model.symbol)+"]"
+			shown = c.show(name)
 			buf = view.Buffer()
-			buf.set_readonly(False)
-			buf.set_nofile(True)
-			buf.vim[:] = None
-			for item in c.model.data.split("\n"):
-				if len(buf.vim) == 1 and not buf.vim[0]:
-					buf.vim[len(buf.vim)-1] = item
-				else:
-					buf.vim.append(item)
-			buf.set_readonly(True)
-			vim.command(":set syntax=asm")
-			# c.link.tab.window.set_cursor(c.model.line, c.model.column)
-			vim.command(":"+str(len(buf.vim)-1))
+			# Only rewrite the listing when the function changed
+			if not shown or not c.model.listing or c.listing != (buf.vim.number, c.model.listing):
+				if not shown:
+					vim.command(":silent e "+name)
+					c.buffers[name] = vim.current.buffer.number
+					buf = view.Buffer()
+				buf.set_readonly(False)
+				buf.set_nofile(True)
+				buf.vim[:] = c.model.data.split("\n")
+				buf.set_readonly(True)
+				vim.command(":set syntax=asm")
+				c.listing = (buf.vim.number, c.model.listing)
+			c.mark(c.model.line if c.model.line else len(buf.vim)-1, 1)
 		else:
 			print("ERROR CAN'T FIND MODEL FOR SOURCE")
-			
 
+	# Show an already loaded buffer in the source window; returns False when
+	# the buffer still has to be loaded
+	@classmethod
+	def show(c, name):
+		number = c.buffers.get(name)
+		if number is None:
+			return False
+		if vim.current.buffer.number == number:
+			return True
+		try:
+			if not vim.buffers[number].valid:
+				raise KeyError(number)
+		except KeyError:
+			del c.buffers[name]
+			return False
+		vim.command(":silent buffer "+str(number))
+		return True
 
+	# Move the cursor and the current line sign with a single vim command
+	@classmethod
+	def mark(c, line, column):
+		if line <= 0: return
+		number = vim.current.buffer.number
+		cmds = []
+		if c.marked:
+			cmds.append("silent! sign unplace %i buffer=%i"%(VPC_ID, c.marked))
+		cmds.append("silent! sign place %i line=%i name=%s buffer=%i"%(VPC_ID, line, VPC_NAME, number))
+		cmds.append("call cursor(%i, %i)"%(line, max(column, 1)))
+		vim.command(" | ".join(cmds))
+		c.marked = number
@@ -0,0 +1,29 @@
+#!/usr/bin/env python
+#
+# trace.py 
+# Copyright (c) 2017 owl
+#
+
+# The package's console view, not controller/console.py (first on sys.path)
+from __future__ import absolute_import
+import vim
+import metrics
+from view import view
+from view import console as view_console
+
+# Tracepoint output; appended in batches and trimmed like the console
+class View(view_console.View):
+	link = None
+	limit = 10000	# lines kept in the trace buffer
+
+	@classmethod
+	def initialize(c):
+		vim.command(":silent e [TRACE]")
+		c.link = view.Link()
+		c.link.tab.window.buffer.set_readonly(True)
+		c.link.tab.window.buffer.set_nofile(True)
+
+	@classmethod
+	@metrics.timed("view.trace.append")
+	def append(c, lines, dropped=0):
+		c.write(lines, dropped)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+#
+# variables.py 
+# Copyright (c) 2017 owl
+#
+
+from __future__ import absolute_import
+import vim
+from view import view
+import metrics
+
+class View:
+	link = None
+	model = None
+
+	@classmethod
+	def initialize(c, model):
+		vim.command(":silent e [VARIABLES]")
+		vim.command(":nmap <silent> <buffer> <Enter> : python VariablesNavigate()<CR>")
+		c.link = view.Link()
+		c.model = model
+		c.link.tab.window.buffer.set_readonly(True)
+		c.link.tab.window.buffer.set_nofile(True)
+
+	@classmethod
+	def valid(c):
+		return c.link != None
+
+	@classmethod
+	def switch_to(c):
+		if not c.link: return
+		c.link.switch_to()
+
+	@classmethod
+	def clear(c):
+		if not c.link: return
+		c.link.clear()
+
+	@classmethod
+	@metrics.timed("view.variables.render")
+	def render(c):
+		if not c.link: return
+		if not c.model: return
+		if not c.model.changed: return
+		c.model.changed = False
+
+		lines = []
+		sources = {}
+		# Depth-first walk; (variable, True) stands for the paging row
+		pending = [(item, False) for item in reversed(c.model.roots)]
+		while pending:
+			item, page = pending.pop()
+			if page:
+				total = "%i+"%(item.count) if item.capped else str(item.count)
+				lines.append("  "*(item.depth+1) + "  ... next page (%i of %s)"%(len(item.children), total))
+				sources[len(lines)] = c.model.page(item)
+				continue
+
+			expanded = item.path in c.model.expanded
+			line = "  "*item.depth
+			line = line + ("- " if expanded else "+ ") if item.count else line + "  "
+			line = line + item.name
+			if item.type:
+				line = line + " ("+item.type+")"
+			if item.value:
+				line = line + " = "+item.value
+			if item.summary:
+				line = line + " "+item.summary
+			lines.append(line)
+			sources[len(lines)] = item
+
+			if expanded:
+				# Children render next, followed by the paging row if needed
+				if len(item.children) < item.count or item.capped:
+					pending.append((item, True))
+				pending.extend((child, False) for child in reversed(item.children))
+		c.model.sources = sources
+
+		c.link.switch_to()
+		c.link.tab.window.buffer.set_readonly(False)
+		c.link.render(lines if lines else ["<no variables>"])
+		c.link.tab.window.buffer.set_readonly(True)
+
+	# Return variable/page object under the cursor
+	@classmethod
+	def info(c):
+		if not c.link: return
+		if not c.model: return
+		cursor = c.link.tab.window.get_cursor()
+		return c.model.sources.get(cursor[0])
@@ -6,9 +6,13 @@
 
 import vim
 
+MATCH_ID = 4242		# match id used for the highlighted line of a window
+PATCHES = 4			# ranges patch() writes one by one; more are written as one span
+
 class Buffer:
 	def __init__(self):
 		self.vim = vim.current.buffer
+		self.lines = None	# lines of the last render(), None when unknown
 	
 	def switch_to(self):
 		if(vim.current.buffer.number != self.vim.number):
@@ -29,12 +33,79 @@ class Buffer:
 		self.vim.options['swapfile'] = not value
 
 	def clear(self, line=-1):
+		self.lines = None
 		if line == -1:
 			self.set_readonly(False)
 			self.vim[:] = None
 		else: self.vim[line] = ""
 	
+	# Set the whole buffer to lines. Only the line ranges which differ from
+	# the previous render are written back to vim.
+	def render(self, lines):
+		old = self.lines
+		self.lines = lines
+		if old is None:
+			self.vim[:] = lines
+			return
+
+		# Skip the common head and tail
+		start = 0
+		count = min(len(old), len(lines))
+		while start < count and old[start] == lines[start]:
+			start += 1
+		end_old, end_new = len(old), len(lines)
+		while end_old > start and end_new > start and old[end_old-1] == lines[end_new-1]:
+			end_old -= 1
+			end_new -= 1
+		if start == end_old and start == end_new:
+			return
+
+		if end_old - start != end_new - start:
+			self.vim[start:end_old] = lines[start:end_new]
+			return
+		# Same number of lines; patch each run of changed lines separately
+		index = start
+		while index < end_new:
+			if old[index] == lines[index]:
+				index += 1
+				continue
+			run = index
+			while run < end_new and old[run] != lines[run]:
+				run += 1
+			self.vim[index:run] = lines[index:run]
+			index = run
+
+	# Replace ranges of the last render, given as (start, count, lines) in
+	# ascending order of start; lines both ranges share are left alone
+	def patch(self, ranges):
+		changes = []
+		for start, count, lines in ranges:
+			old = self.lines[start:start+count]
+			head = 0
+			while head < count and head < len(lines) and old[head] == lines[head]:
+				head += 1
+			tail = 0
+			while tail < count-head and tail < len(lines)-head and old[count-tail-1] == lines[len(lines)-tail-1]:
+				tail += 1
+			if head + tail < count or head + tail < len(lines):
+				changes.append((start+head, count-head-tail, lines[head:len(lines)-tail]))
+		if len(changes) > PATCHES:
+			lines = []
+			end = changes[0][0]
+			for start, count, new in changes:
+				lines.extend(self.lines[end:start])
+				lines.extend(new)
+				end = start + count
+			changes = [(changes[0][0], end - changes[0][0], lines)]
+		shift = 0
+		for start, count, lines in changes:
+			start += shift
+			self.vim[start:start+count] = lines
+			self.lines[start:start+count] = lines
+			shift += len(lines) - count
+
 	def write(self, data, line=-1):
+		self.lines = None
 		if line == -1:
 			if type(data) is not list and len(self.vim) == 0:
 				self.vim[0] = data
@@ -66,6 +137,19 @@ class Window:
 	def get_cursor(self):
 		return self.vim.cursor
 
+	# Move the cursor and the highlighted line in a single vim command;
+	# the window must be the current one
+	def update(self, cursor=None, highlight=None, group="Visual"):
+		cmds = []
+		if cursor:
+			cmds.append("call cursor(%i, %i)"%(cursor[0], cursor[1]))
+		if highlight is not None:
+			cmds.append("silent! call matchdelete(%i)"%(MATCH_ID))
+			if highlight > 0:
+				cmds.append("call matchaddpos('%s', [%i], 10, %i)"%(group, highlight, MATCH_ID))
+		if cmds:
+			vim.command(" | ".join(cmds))
+
 class Tab:
 	def __init__(self):
 		self.vim = vim.current.tabpage
@@ -80,11 +164,11 @@ class Tab:
 		self.window.switch_to()
 
 	def tabnum(self):
-		return self.tab.vim.number
+		return self.vim.number
 	def winnum(self):
-		return self.tab.window.vim.number
+		return self.window.vim.number
 	def bufnum(self):
-		return self.tab.window.buffer.vim.number
+		return self.window.buffer.vim.number
 
 class Link:
 	def __init__(self):
@@ -112,3 +196,9 @@ class Link:
 	def clear(self):
 		self.tab.window.buffer.clear()
 
+	def render(self, lines):
+		self.tab.window.buffer.render(lines)
+
+	def patch(self, ranges):
+		self.tab.window.buffer.patch(ranges)
+
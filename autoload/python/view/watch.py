@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+#
+# watch.py 
+# Copyright (c) 2017 owl
+#
+
+from __future__ import absolute_import
+import vim
+from view import view
+import metrics
+
+MATCH_ID = 4243		# match id used for the changed watches
+
+class View:
+	link = None
+	model = None
+
+	@classmethod
+	def initialize(c, model):
+		vim.command(":silent e [WATCH]")
+		vim.command(":nmap <silent> <buffer> x : python WatchRemove()<CR>")
+		c.link = view.Link()
+		c.model = model
+		c.link.tab.window.buffer.set_readonly(True)
+		c.link.tab.window.buffer.set_nofile(True)
+
+	@classmethod
+	def valid(c):
+		return c.link != None
+
+	@classmethod
+	def switch_to(c):
+		if not c.link: return
+		c.link.switch_to()
+
+	@classmethod
+	def clear(c):
+		if not c.link: return
+		c.link.clear()
+
+	@classmethod
+	@metrics.timed("view.watch.render")
+	def render(c):
+		if not c.link: return
+		if not c.model: return
+		if not c.model.changed: return
+		c.model.changed = False
+
+		lines = []
+		changed = []
+		sources = {}
+		for watch in c.model.watches:
+			if watch.error:
+				line = "%s: %s"%(watch.expression, watch.error.replace("\n", " ").strip())
+			else:
+				line = "%s = %s"%(watch.expression, watch.value)
+				if watch.stale:
+					line = line + " (stale)"
+			lines.append(line)
+			sources[len(lines)] = watch
+			if watch.changed:
+				changed.append(len(lines))
+		c.model.sources = sources
+
+		# Only lines whose text changed are written; changed values are highlighted
+		c.link.switch_to()
+		c.link.tab.window.buffer.set_readonly(False)
+		c.link.render(lines if lines else ["<no watches>"])
+		c.link.tab.window.buffer.set_readonly(True)
+		cmd = "silent! call matchdelete(%i)"%(MATCH_ID)
+		if changed:
+			pattern = "\\|".join("\\%%%il"%(line) for line in changed)
+			cmd = cmd + " | call matchadd('DiffChange', '%s', 10, %i)"%(pattern, MATCH_ID)
+		vim.command(cmd)
+
+	# Return index of the watch under the cursor
+	@classmethod
+	def index(c):
+		if not c.link: return -1
+		if not c.model: return -1
+		watch = c.model.sources.get(c.link.tab.window.get_cursor()[0])
+		if watch is None: return -1
+		return c.model.watches.index(watch)
@@ -8,6 +8,38 @@ endif
 
 " Internal variables
 let g:superdebug_loaded = 1
+let g:superdebug_timer = -1
+
+" Interval (ms) at which debugger events are applied to the views
+if !exists("g:superdebug_poll_interval")
+	let g:superdebug_poll_interval = 50
+endif
+
+" Run lldb in a separate worker process (and the python used to run it)
+if !exists("g:superdebug_worker")
+	let g:superdebug_worker = 0
+endif
+if !exists("g:superdebug_worker_python")
+	let g:superdebug_worker_python = "python"
+endif
+
+" Lines of program output kept by the console (and collected between polls)
+if !exists("g:superdebug_console_lines")
+	let g:superdebug_console_lines = 10000
+endif
+
+" Milliseconds a watch expression may run before it is interrupted
+if !exists("g:superdebug_watch_timeout")
+	let g:superdebug_watch_timeout = 100
+endif
+
+" Count lldb SB API calls per operation in :SDebugProfile (slows lldb calls)
+if !exists("g:superdebug_profile")
+	let g:superdebug_profile = 0
+endif
+
+" Batch crash triage script (see SDebug#Triage)
+let s:triage = expand("<sfile>:p:h")."/python/controller/triage.py"
 
 " Return the full sign list
 function! SDebugSignlist()
@@ -61,17 +93,150 @@ function! SDebug#Launch()
 	python vim.command("below 16 split")
 	python OpenViewBacktrace()
 	python Launch()
+	call SDebug#PollStart()
 	redraw
 	python BreakpointToggle("main.cpp", 49)
 	python Run("/Users/owl/git/bravo/bin/bravo")
 	python Refresh()
 endfunc
 
+" Show locals/arguments of the selected frame in a split
+function! SDebug#Variables()
+	below 12 split
+	python OpenViewVariables()
+endfunc
+
+" Show inferior memory at address (a number or an expression) in a split
+function! SDebug#Memory(address)
+	below 16 split
+	execute "python OpenViewMemory(vim.eval('a:address'))"
+endfunc
+
+" Show the output of the debugged program in a split
+function! SDebug#Console()
+	below 10 split
+	python OpenViewConsole()
+endfunc
+
+" Show the watch expressions in a split
+function! SDebug#Watches()
+	below 8 split
+	python OpenViewWatch()
+endfunc
+
+function! SDebug#WatchAdd(expression)
+	python WatchAdd(vim.eval("a:expression"))
+endfunc
+
+" Show the tracepoint output in a split
+function! SDebug#Trace()
+	below 10 split
+	python OpenViewTrace()
+endfunc
+
+" Log message at the cursor line instead of stopping; {expression} is replaced
+" by its value on every hit
+function! SDebug#TracepointToggle(message)
+	python BreakpointToggle('', '', vim.eval("a:message"))
+endfunc
+
+" Browse a core file of program, with the same views as a live process
+function! SDebug#LoadCore(program, core)
+	python vim.command("tabe")
+	python OpenViewSource()
+	python vim.command("below 16 split")
+	python OpenViewBacktrace()
+	python Launch()
+	python LoadCore(vim.eval("a:program"), vim.eval("a:core"))
+endfunc
+
+" Group the core files of directory by crash stack in the background, and
+" open the report when done
+function! SDebug#Triage(program, directory)
+	let l:report = tempname()
+	let l:cmd = [g:superdebug_worker_python, s:triage, a:program, a:directory, '-o', l:report]
+	call job_start(l:cmd, {'exit_cb': function('SDebug#TriageDone', [l:report])})
+	echo "triaging cores of ".a:directory
+endfunc
+
+function! SDebug#TriageDone(report, job, status)
+	if a:status != 0 || !filereadable(a:report)
+		echo "crash triage failed (exit code ".a:status.")"
+		return
+	endif
+	execute "silent botright split ".fnameescape(a:report)
+endfunc
+
+" Group threads with identical stacks into one backtrace row (toggle)
+function! SDebug#BacktraceAggregate()
+	python BacktraceAggregate()
+endfunc
+
+" Profile the running process by sampling its stacks
+function! SDebug#Sample(hz, seconds)
+	python Sample(vim.eval("a:hz"), vim.eval("a:seconds"))
+endfunc
+
+function! SDebug#SamplesExport(path)
+	python SamplesExport(vim.eval("a:path"))
+endfunc
+
+" Snapshot a live process (pid or name); it's only stopped while its
+" stacks are copied
+function! SDebug#Snapshot(process)
+	python vim.command("tabe")
+	python OpenViewSource()
+	python vim.command("below 16 split")
+	python OpenViewBacktrace()
+	python Launch()
+	if a:process =~ '^\d\+$'
+		python Snapshot(int(vim.eval("a:process")), "")
+	else
+		python Snapshot(0, vim.eval("a:process"))
+	endif
+endfunc
+
+" Run the program again; reuses the loaded target when the program wasn't rebuilt
+function! SDebug#Restart()
+	python Restart()
+	call SDebug#PollStart()
+endfunc
+
 function! SDebug#Quit()
+	call SDebug#PollStop()
 	python Quit()
 	"TODO: Cleanup after ourselves, return to last tab/window/buffer we were in
 endfunc
 
+" Debugger events are drained by a background thread; the timer applies
+" them to the views so vim never waits on lldb
+function! SDebug#PollStart()
+	if g:superdebug_timer != -1
+		return
+	endif
+	let g:superdebug_timer = timer_start(g:superdebug_poll_interval, 'SDebug#Poll', {'repeat': -1})
+endfunc
+
+function! SDebug#PollStop()
+	if g:superdebug_timer == -1
+		return
+	endif
+	call timer_stop(g:superdebug_timer)
+	let g:superdebug_timer = -1
+endfunc
+
+function! SDebug#Poll(timer)
+	python Poll()
+endfunc
+
+function! SDebug#Profile()
+	python Profile()
+endfunc
+
+function! SDebug#ProfileDump(path)
+	python ProfileDump(vim.eval("a:path"))
+endfunc
+
 function! SDebug#NavBacktrace()
 	python NavBacktrace()
 endfunc
@@ -80,6 +245,23 @@ function! SDebug#BreakpointToggle()
 	python BreakpointToggle()
 endfunc
 
+" Stop at the breakpoint under the cursor only when expression is true
+" (an empty expression removes the condition)
+function! SDebug#BreakpointCondition(expression)
+	python BreakpointOptions(condition=vim.eval("a:expression"))
+endfunc
+
+" Skip the first count hits of the breakpoint under the cursor
+function! SDebug#BreakpointIgnore(count)
+	python BreakpointOptions(ignore=int(vim.eval("a:count")))
+endfunc
+
+" Stop at the breakpoint under the cursor only in thread id (0 for any
+" thread); without an id, in the thread selected in the backtrace
+function! SDebug#BreakpointThread(...)
+	python BreakpointOptions(thread=int(vim.eval("a:0 ? a:1 : -1")))
+endfunc
+
 function! SDebug#BufferLoad()
 	python BufferLoad()
 endfunc
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+#
+# bench.py
+# Copyright (c) 2017 owl
+#
+
+# Controller benchmarks on top of the synthetic lldb module (fake/lldb.py).
+# Reports latency per operation, SB API calls per operation and peak memory.
+#
+#	python bench/bench.py [--threads 2000] [--frames 200] [--runs 20]
+#
+# Runs with python 2 (what vim is usually built against) and python 3. Peak
+# memory per operation needs tracemalloc (python 3); under python 2 only the
+# process peak RSS is shown.
+
+import os, sys, time, argparse
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(HERE, '..', 'autoload', 'python')
+sys.path.insert(0, os.path.join(ROOT, 'controller'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(HERE, 'fake'))
+
+import lldb
+try:
+	import tracemalloc
+except ImportError:
+	tracemalloc = None
+try:
+	import resource
+except ImportError:
+	resource = None
+
+def wait_stopped(ctrl):
+	for _ in range(100):
+		if ctrl.refresh(1) == "stopped":
+			return
+	raise RuntimeError("process never stopped")
+
+class Bench:
+	def __init__(self, args):
+		lldb.configure(threads=args.threads, frames=args.frames)
+		import lldbc
+		import model.backtrace as model_bt
+		import model.breakpoint as model_bp
+		import model.watch as model_watch
+		self.model_bt = model_bt
+		self.model_watch = model_watch
+		self.model_bp = model_bp
+		self.ctrl = lldbc.Controller()
+		model_bp.Model.add("/src/fake/main.cpp", 10)	# where resume() stops
+		self.ctrl.run("/bin/fake")
+		self.ctrl.process.Stop()
+		wait_stopped(self.ctrl)
+		self.runs = args.runs
+		self.count = 0
+
+	def close(self):
+		listener = self.ctrl.listener
+		self.ctrl.quit()
+		if listener:
+			listener.join()
+
+	# Operations; each is run self.runs times
+	def op_stop(self):
+		self.ctrl.resume()
+		wait_stopped(self.ctrl)
+
+	def op_step(self):
+		self.ctrl.step_over()
+		wait_stopped(self.ctrl)
+
+	def op_fold(self):
+		threads = self.model_bt.Model.threads
+		thread = threads[1 + self.count % max(len(threads)-1, 1)]
+		self.model_bt.Model.fold(thread.id)
+		if thread.id in self.model_bt.Model.expanded:
+			self.ctrl.load_frames(thread)
+		self.model_bt.Model.fold(thread.id)
+
+	def op_select_frame(self):
+		thread = self.model_bt.Model.selected
+		frame = thread.frames[(self.count % 2) and 1 or 0] if len(thread.frames) > 1 else thread.frames[0]
+		self.ctrl.select_frame(frame)
+
+	# Step with a heap and a code window shown; only the heap pages are read again
+	def op_memory(self):
+		self.ctrl.step_over()
+		wait_stopped(self.ctrl)
+		self.ctrl.read_memory(0x10000000, 64)
+		self.ctrl.read_memory(0x400000, 64)
+
+	# Step with a watch list; only expressions are run again, constants never,
+	# and expressions whose variables kept their values aren't either
+	def op_watch(self):
+		if not self.model_watch.Model.watches:
+			for expression in ["count", "node->next.value", "items[3]", "4096 * 16", "limit * 2 + 1", "count * 2 + node->next.value", "size() + 1", "slow()"] * 10:
+				self.ctrl.watch_add(expression)
+		self.ctrl.step_over()
+		wait_stopped(self.ctrl)
+
+	def op_breakpoint_toggle(self):
+		source, line = "/src/fake/stack0.cpp", 100 + self.count
+		self.model_bp.Model.add(source, line)
+		self.ctrl.breakpoint_add(source, line)
+		self.ctrl.breakpoint_delete(source, line)
+		self.model_bp.Model.delete(source, line)
+
+	def measure(self, name):
+		op = getattr(self, 'op_'+name)
+		samples = []
+		calls = sum(lldb.calls.values())
+		for _ in range(self.runs):
+			start = time.time()
+			op()
+			samples.append((time.time() - start) * 1000.0)
+			self.count += 1
+		calls = (sum(lldb.calls.values()) - calls) / float(self.runs)
+
+		peak = None
+		if tracemalloc:
+			tracemalloc.start()
+			op()
+			self.count += 1
+			peak = tracemalloc.get_traced_memory()[1]
+			tracemalloc.stop()
+		return samples, calls, peak
+
+def percentile(samples, p):
+	samples = sorted(samples)
+	return samples[min(len(samples)-1, int(len(samples)*p))]
+
+def main():
+	parser = argparse.ArgumentParser(description="superdebug controller benchmarks")
+	parser.add_argument('--threads', type=int, default=2000)
+	parser.add_argument('--frames', type=int, default=200)
+	parser.add_argument('--runs', type=int, default=20)
+	parser.add_argument('ops', nargs='*', default=['stop', 'step', 'fold', 'select_frame', 'breakpoint_toggle', 'memory', 'watch'])
+	args = parser.parse_args()
+
+	stdout = sys.stdout
+	sys.stdout = open(os.devnull, 'w')	# the controller prints state changes
+	try:
+		bench = Bench(args)
+		results = [(name,) + bench.measure(name) for name in args.ops]
+		bench.close()
+	finally:
+		sys.stdout = stdout
+
+	print("%i threads x %i frames, %i runs"%(args.threads, args.frames, args.runs))
+	print("%-20s %9s %9s %9s %10s %10s"%("operation", "p50 ms", "p95 ms", "max ms", "sb calls", "peak KB"))
+	for name, samples, calls, peak in results:
+		print("%-20s %9.2f %9.2f %9.2f %10.0f %10s"%(name, percentile(samples, 0.5),
+			percentile(samples, 0.95), max(samples), calls, "%.0f"%(peak/1024.0) if peak is not None else "-"))
+	if resource:
+		print("process peak RSS: %i KB"%(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss))
+
+if __name__ == '__main__':
+	main()
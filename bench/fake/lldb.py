@@ -0,0 +1,775 @@
+#!/usr/bin/env python
+#
+# lldb.py
+# Copyright (c) 2017 owl
+#
+
+# Synthetic stand-in for the lldb python module. Implements the part of the
+# SB API used by controller/lldbc.py on top of a generated process, so the
+# controller and views can be measured without a real inferior.
+#
+# Size the generated process with configure() before launching, or with the
+# SDEBUG_FAKE environment variable, e.g. SDEBUG_FAKE="threads=2000,frames=200"
+
+import os, sys, threading
+
+eStateInvalid = 0
+eStateUnloaded = 1
+eStateConnected = 2
+eStateAttaching = 3
+eStateLaunching = 4
+eStateStopped = 5
+eStateRunning = 6
+eStateStepping = 7
+eStateCrashed = 8
+eStateDetached = 9
+eStateExited = 10
+eStateSuspended = 11
+
+LLDB_INVALID_ADDRESS = 0xffffffffffffffff
+LLDB_INVALID_THREAD_ID = 0
+
+eStopReasonNone = 1
+eStopReasonBreakpoint = 3
+eStopReasonWatchpoint = 4
+eStopReasonSignal = 5
+eStopReasonException = 6
+
+eExpressionCompleted = 0
+eExpressionTimedOut = 6
+
+# Workload of the next launched/attached process
+workload = {
+	'threads': 8,		# number of threads
+	'frames': 32,		# stack depth of every thread
+	'stacks': 7,		# number of distinct stacks shared between threads
+	'nosource': 5,		# every n-th frame has no line information
+	'locals': 8,		# locals per frame; the first one is a large vector
+	'elements': 10000000,	# number of elements of that vector
+}
+
+def configure(**kwargs):
+	workload.update(kwargs)
+
+def _configure_from_env():
+	for item in os.environ.get('SDEBUG_FAKE', '').split(','):
+		if '=' in item:
+			key, value = item.split('=', 1)
+			workload[key.strip()] = int(value)
+_configure_from_env()
+
+# Number of SB API calls made, per method name
+calls = {}
+
+def _count(name):
+	calls[name] = calls.get(name, 0) + 1
+
+class SBError:
+	def __init__(self):
+		self.error = ""
+		self.code = 0
+	def GetError(self):
+		return self.code
+	def Success(self):
+		return not self.error
+	def Fail(self):
+		return bool(self.error)
+	def __str__(self):
+		return self.error
+
+class SBExpressionOptions:
+	def __init__(self):
+		self.timeout = 0
+	def SetTimeoutInMicroSeconds(self, timeout):
+		self.timeout = timeout
+	def SetTryAllThreads(self, value):
+		pass
+	def SetUnwindOnError(self, value):
+		pass
+	def SetIgnoreBreakpoints(self, value):
+		pass
+
+class SBCommandReturnObject:
+	def __init__(self):
+		self.output = ""
+
+class SBCommandInterpreter:
+	def HandleCommand(self, command, result):
+		_count('HandleCommand')
+		return 0
+
+class SBLaunchInfo:
+	def __init__(self, args):
+		self.args = args
+		self.files = {}		# fd -> path
+	def AddOpenFileAction(self, fd, path, read, write):
+		self.files[fd] = path
+		return True
+
+class SBEvent:
+	def __init__(self, kind=0, state=eStateInvalid, broadcaster=None, modules=()):
+		self.kind = kind
+		self.state = state
+		self.broadcaster = broadcaster
+		self.modules = list(modules)
+	def GetType(self):
+		return self.kind
+	def _set(self, other):
+		self.__dict__.update(other.__dict__)
+
+class SBListener:
+	def __init__(self, name=""):
+		self.name = name
+		self.events = []
+		self.lock = threading.Condition()
+	def _post(self, event):
+		with self.lock:
+			self.events.append(event)
+			self.lock.notify()
+	def WaitForEvent(self, timeout, event):
+		with self.lock:
+			if not self.events:
+				self.lock.wait(timeout)
+			if not self.events:
+				return False
+			event._set(self.events.pop(0))
+			return True
+	def PeekAtNextEvent(self, event):
+		with self.lock:
+			if not self.events:
+				return False
+			event._set(self.events[0])
+			return True
+	def GetNextEvent(self, event):
+		with self.lock:
+			if not self.events:
+				return False
+			event._set(self.events.pop(0))
+			return True
+
+class SBBroadcaster:
+	def __init__(self, owner):
+		self.owner = owner
+		self.listeners = []
+	def AddListener(self, listener, mask):
+		self.listeners.append((listener, mask))
+		return mask
+	def _broadcast(self, event):
+		event.broadcaster = self.owner
+		for listener, mask in self.listeners:
+			if mask & event.kind:
+				listener._post(event)
+
+class SBFileSpec:
+	def __init__(self, directory="", filename=""):
+		if directory and not filename:	# SBFileSpec(path)
+			directory, filename = os.path.split(directory)
+		self.directory = directory
+		self.filename = filename
+	def GetFilename(self):
+		_count('GetFilename')
+		return self.filename or None
+	def GetDirectory(self):
+		_count('GetDirectory')
+		return self.directory or None
+
+class SBLineEntry:
+	def __init__(self, spec, line, column):
+		self.spec = spec
+		self.line = line
+		self.column = column
+	def GetFileSpec(self):
+		_count('GetFileSpec')
+		return self.spec
+	def GetLine(self):
+		_count('GetLine')
+		return self.line
+	def GetColumn(self):
+		_count('GetColumn')
+		return self.column
+
+class SBModuleSpec:
+	def __init__(self):
+		self.spec = SBFileSpec()
+	def SetFileSpec(self, spec):
+		self.spec = spec
+
+class SBModule:
+	def __init__(self, name="", uuid=""):
+		if isinstance(name, SBModuleSpec):	# read from the file; changes when it is rebuilt
+			path = os.path.join(name.spec.directory, name.spec.filename)
+			self.spec = name.spec
+			self.uuid = "FAKE-UUID-%d"%(os.stat(path).st_mtime) if os.path.exists(path) else ""
+			return
+		self.spec = SBFileSpec("/usr/lib", name)
+		self.uuid = uuid
+	def GetFileSpec(self):
+		_count('GetFileSpec')
+		return self.spec
+	def GetUUIDString(self):
+		_count('GetUUIDString')
+		return self.uuid
+	def IsValid(self):
+		return bool(self.uuid)
+	def GetNumSections(self):
+		return 1
+	def GetSectionAtIndex(self, index):
+		return SBSection(".text", 0x400000)
+	def FindSection(self, name):
+		return SBSection(name, 0x400000)
+
+class SBSection:
+	def __init__(self, name, address):
+		self.name = name
+		self.address = address
+	def IsValid(self):
+		return True
+	def GetName(self):
+		return self.name
+	def GetLoadAddress(self, target):
+		return self.address
+
+class SBAddress:
+	def __init__(self, address=LLDB_INVALID_ADDRESS):
+		self.address = address
+	# Inverse of the pc layout of SBFrame
+	def GetSymbol(self):
+		_count('GetSymbol')
+		stack, index = (self.address - 0x400000)//0x10000, (self.address % 0x10000)//0x100
+		start = 0x400000 + stack*0x10000 + index*0x100
+		return SBSymbol("fn_%d_%d"%(stack, index), start, start+0x100)
+	def GetModule(self):
+		_count('GetModule')
+		return MODULES[(self.address % 0x10000)//0x100 % len(MODULES)]
+	def GetLineEntry(self):
+		_count('GetLineEntry')
+		stack, index = (self.address - 0x400000)//0x10000, (self.address % 0x10000)//0x100
+		if (index+1) % workload['nosource'] == 0:
+			return SBLineEntry(SBFileSpec(), 0, 0)
+		return SBLineEntry(SBFileSpec("/src/fake", "stack%d.cpp"%(stack)), 10 + index + (self.address % 0x100)//4, 5)
+	def GetLoadAddress(self, target):
+		_count('GetLoadAddress')
+		return self.address
+	def IsValid(self):
+		return self.address != LLDB_INVALID_ADDRESS
+
+class SBSymbol:
+	def __init__(self, name, start, end):
+		self.name = name
+		self.start = start
+		self.end = end
+	def GetName(self):
+		_count('GetName')
+		return self.name
+	def GetStartAddress(self):
+		return SBAddress(self.start)
+	def GetEndAddress(self):
+		return SBAddress(self.end)
+	def IsValid(self):
+		return self.name is not None
+
+class SBFunction(SBSymbol):
+	pass
+
+MODULES = [SBModule("libfake%d.so"%(index), "FAKE-UUID-%04d"%(index)) for index in range(4)]
+
+class SBFrame:
+	def __init__(self, thread, index):
+		self.thread = thread
+		self.index = index
+		stack = thread.id % workload['stacks']
+		self.pc = 0x400000 + stack*0x10000 + index*0x100 + thread.pcs.get(index, 0)
+		self.cfa = 0x7f0000000000 + thread.id*0x100000 - index*0x100
+		self.function = "fn_%d_%d"%(stack, index)
+		self.start = 0x400000 + stack*0x10000 + index*0x100
+		self.module = MODULES[index % len(MODULES)]
+		self.source = (index+1) % workload['nosource'] != 0
+	def IsValid(self):
+		return True
+	def GetFrameID(self):
+		_count('GetFrameID')
+		return self.index
+	def GetPC(self):
+		_count('GetPC')
+		return self.pc
+	def GetCFA(self):
+		_count('GetCFA')
+		return self.cfa
+	def GetThread(self):
+		return self.thread
+	def GetModule(self):
+		_count('GetModule')
+		return self.module
+	def GetFunctionName(self):
+		_count('GetFunctionName')
+		return self.function
+	def GetDisplayFunctionName(self):
+		_count('GetDisplayFunctionName')
+		return self.function if self.source else None
+	def GetLineEntry(self):
+		_count('GetLineEntry')
+		if not self.source:
+			return SBLineEntry(SBFileSpec(), 0, 0)
+		line = 10 + self.index + (self.pc - self.start)//4
+		return SBLineEntry(SBFileSpec("/src/fake", "stack%d.cpp"%(self.thread.id % workload['stacks'])), line, 5)
+	def GetSymbol(self):
+		_count('GetSymbol')
+		return SBSymbol(self.function, self.start, self.start+0x100)
+	def GetFunction(self):
+		_count('GetFunction')
+		if not self.source:
+			return SBFunction(None, LLDB_INVALID_ADDRESS, LLDB_INVALID_ADDRESS)
+		return SBFunction(self.function, self.start, self.start+0x100)
+	def Disassemble(self):
+		_count('Disassemble')
+		lines = ["%s`%s:"%(self.module.spec.filename, self.function)]
+		for address in range(self.start, self.start+0x100, 4):
+			marker = "->" if address == self.pc else "  "
+			lines.append("%s  0x%x <+%d>: nop"%(marker, address, address-self.start))
+		return "\n".join(lines)
+
+	def GetVariables(self, arguments, locals, statics, in_scope_only):
+		_count('GetVariables')
+		values = [SBValue("v%d"%(index), "int", str(self.pc + index)) for index in range(1, workload['locals'])]
+		values.insert(0, SBValue("items", "std::vector<int>", None, workload['elements']))
+		return SBValueList(values)
+
+	# Variable paths and expressions evaluate to a value derived from the pc;
+	# expressions containing "slow" run into the timeout
+	def GetValueForVariablePath(self, path):
+		_count('GetValueForVariablePath')
+		# "limit" keeps its value across stops, "node" is a struct whose members
+		# change, everything else changes
+		if path == "node":
+			return SBValue(path, "struct node", None, 2)
+		return SBValue(path, "int", "64" if path == "limit" else str(self.pc % 1000))
+	def EvaluateExpression(self, expression, options=None):
+		_count('EvaluateExpression')
+		value = SBValue(expression, "int", str(len(expression) + self.pc % 1000))
+		if "slow" in expression:
+			value.error.error, value.error.code = "expression timed out", eExpressionTimedOut
+		return value
+
+# Values are generated on demand; children of a container cost nothing until read
+class SBValue:
+	def __init__(self, name, type, value, children=0):
+		self.name = name
+		self.type = type
+		self.value = value
+		self.children = children
+		self.error = SBError()
+	def IsValid(self):
+		return True
+	def GetError(self):
+		return self.error
+	def GetName(self):
+		_count('GetName')
+		return self.name
+	def GetTypeName(self):
+		_count('GetTypeName')
+		return self.type
+	def GetValue(self):
+		_count('GetValue')
+		return self.value
+	def GetSummary(self):
+		_count('GetSummary')
+		return "size=%d"%(self.children) if self.children else None
+	def GetNumChildren(self, max=None):
+		_count('GetNumChildren')
+		return self.children if max is None else min(self.children, max)
+	def GetChildAtIndex(self, index):
+		_count('GetChildAtIndex')
+		return self.child(index)
+	def child(self, index):
+		return SBValue("[%d]"%(index), "int", str(index))
+	def GetValueAsUnsigned(self):
+		_count('GetValueAsUnsigned')
+		return int(self.value or 0)
+
+class SBValueList:
+	def __init__(self, values):
+		self.values = values
+	def GetSize(self):
+		return len(self.values)
+	def GetValueAtIndex(self, index):
+		return self.values[index]
+
+class _InvalidFrame:
+	def IsValid(self):
+		return False
+	def GetFrameID(self):
+		return 0xffffffff
+
+class SBThread:
+	def __init__(self, process, id, index):
+		self.process = process
+		self.id = id
+		self.index = index
+		self.selected = 0
+		self.pcs = {}		# frame index -> pc offset, moved by stepping
+		self.depth = workload['frames']
+		self.reason = eStopReasonNone
+	def __eq__(self, other):
+		return isinstance(other, SBThread) and other.id == self.id
+	def __ne__(self, other):
+		return not self.__eq__(other)
+	def __hash__(self):
+		return self.id
+	def __iter__(self):
+		for index in range(self.depth):
+			yield SBFrame(self, index)
+	def IsValid(self):
+		return True
+	def GetThreadID(self):
+		_count('GetThreadID')
+		return self.id
+	def GetIndexID(self):
+		_count('GetIndexID')
+		return self.index
+	def GetName(self):
+		_count('GetName')
+		return "worker-%d"%(self.index) if self.index > 1 else "main"
+	def GetStopReason(self):
+		_count('GetStopReason')
+		return self.reason
+	def GetStopDescription(self, size):
+		_count('GetStopDescription')
+		return "signal SIGSEGV" if self.reason == eStopReasonSignal else ""
+	def GetNumFrames(self):
+		_count('GetNumFrames')
+		return self.depth
+	def GetFrameAtIndex(self, index):
+		_count('GetFrameAtIndex')
+		if index < 0 or index >= self.depth:
+			return _InvalidFrame()
+		return SBFrame(self, index)
+	def GetSelectedFrame(self):
+		_count('GetSelectedFrame')
+		return SBFrame(self, self.selected)
+	def SetSelectedFrame(self, index):
+		_count('SetSelectedFrame')
+		self.selected = index
+		return SBFrame(self, index)
+	def GetProcess(self):
+		return self.process
+	def _step(self):
+		self.selected = 0
+		self.pcs[0] = (self.pcs.get(0, 0) + 4) % 0x100
+		self.process._stopped()
+	def StepOver(self):
+		_count('StepOver')
+		self._step()
+	def StepInto(self):
+		_count('StepInto')
+		self._step()
+	def StepOut(self):
+		_count('StepOut')
+		self._step()
+
+# Memory map of the generated process: (start, end, writable)
+REGIONS = [
+	(0x400000, 0x800000, False),			# code
+	(0x10000000, 0x20000000, True),			# heap
+]
+
+class SBMemoryRegionInfo:
+	def __init__(self):
+		self.start, self.end, self.writable = 0, 0, False
+	def GetRegionBase(self):
+		return self.start
+	def GetRegionEnd(self):
+		return self.end
+	def IsWritable(self):
+		return self.writable
+
+class SBProcess:
+	eBroadcastBitStateChanged = 1 << 0
+
+	def __init__(self, target, pid):
+		self.target = target
+		self.pid = pid
+		self.state = eStateStopped
+		self.broadcaster = SBBroadcaster(self)
+		self.threads = [SBThread(self, 1000+index, index+1) for index in range(workload['threads'])]
+		self.selected = self.threads[0] if self.threads else None
+		self.stops = 0
+		self.stdout = None		# terminal the program writes to, see _write()
+	def __iter__(self):
+		return iter(self.threads)
+	def __nonzero__(self):
+		return True
+	__bool__ = __nonzero__
+	def IsValid(self):
+		return True
+	def GetProcessID(self):
+		return self.pid
+	def GetBroadcaster(self):
+		return self.broadcaster
+	def GetState(self):
+		_count('GetState')
+		return self.state
+	def GetNumThreads(self):
+		return len(self.threads)
+	def GetThreadAtIndex(self, index):
+		return self.threads[index]
+	def GetSelectedThread(self):
+		_count('GetSelectedThread')
+		return self.selected
+	def GetThreadByID(self, id):
+		_count('GetThreadByID')
+		for thread in self.threads:
+			if thread.id == id:
+				return thread
+		return None
+	def SetSelectedThreadByID(self, id):
+		_count('SetSelectedThreadByID')
+		thread = self.GetThreadByID(id)
+		if thread:
+			self.selected = thread
+		return thread is not None
+	def GetMemoryRegionInfo(self, address, info):
+		_count('GetMemoryRegionInfo')
+		error = SBError()
+		for start, end, writable in REGIONS:
+			if start <= address < end:
+				info.start, info.end, info.writable = start, end, writable
+				return error
+		error.error = "no region at 0x%x"%(address)
+		return error
+	# Heap bytes change on every stop, code bytes never do
+	def ReadMemory(self, address, size, error):
+		_count('ReadMemory')
+		for start, end, writable in REGIONS:
+			if start <= address and address+size <= end:
+				seed = (address + (self.stops if writable else 0)) & 0xff
+				return bytes(bytearray((seed + index) & 0xff for index in range(size)))
+		error.error = "memory read failed for 0x%x"%(address)
+		return None
+	# Program output; written to the launch terminal like the real inferior would
+	def _write(self, lines):
+		if not self.stdout: return
+		fd = os.open(self.stdout, os.O_WRONLY | os.O_NOCTTY)
+		try:
+			data = "".join(line+"\n" for line in lines).encode('utf-8')
+			while data:
+				data = data[os.write(fd, data):]
+		finally:
+			os.close(fd)
+	# Run for a while, hitting every breakpoint with a script callback count
+	# times; callbacks returning False let the process run on
+	def _trace(self, count):
+		for breakpoint in list(self.target.breakpoints.values()):
+			if not breakpoint.callback: continue
+			module, name = breakpoint.callback.rsplit('.', 1)
+			callback = getattr(sys.modules[module], name)
+			location = SBBreakpointLocation(breakpoint)
+			for index in range(count):
+				frame = self.threads[index % len(self.threads)].GetFrameAtIndex(0)
+				if callback(frame, location, {}) is not False:
+					self._post(eStateStopped)
+					return
+	def _post(self, state):
+		if state == eStateStopped:
+			self.stops += 1
+		self.state = state
+		self.broadcaster._broadcast(SBEvent(SBProcess.eBroadcastBitStateChanged, state))
+	def _stopped(self):
+		self._post(eStateRunning)
+		self._post(eStateStopped)
+	# Runs until the next hit of a breakpoint which stops (no script callback)
+	def Continue(self):
+		_count('Continue')
+		for thread in self.threads:
+			if thread.reason == eStopReasonBreakpoint:
+				thread.reason = eStopReasonNone
+		self._post(eStateRunning)
+		if self.selected and any(not breakpoint.callback for breakpoint in self.target.breakpoints.values()):
+			self.selected.reason = eStopReasonBreakpoint
+			self._post(eStateStopped)
+		return SBError()
+	def Stop(self):
+		_count('Stop')
+		self._post(eStateStopped)
+		return SBError()
+	def Kill(self):
+		self._post(eStateExited)
+		return SBError()
+	def Detach(self):
+		self._post(eStateDetached)
+		return SBError()
+
+	@staticmethod
+	def GetStateFromEvent(event):
+		return event.state
+
+class SBBreakpoint:
+	def __init__(self, id):
+		self.id = id
+		self.callback = None
+	def __nonzero__(self):
+		return True
+	__bool__ = __nonzero__
+	def IsValid(self):
+		return True
+	def GetID(self):
+		return self.id
+	def SetCondition(self, condition):
+		_count('SetCondition')
+		self.condition = condition
+	def SetIgnoreCount(self, count):
+		_count('SetIgnoreCount')
+		self.ignore = count
+	def SetThreadID(self, id):
+		_count('SetThreadID')
+		self.thread = id
+	def SetScriptCallbackFunction(self, name):
+		_count('SetScriptCallbackFunction')
+		self.callback = name
+
+class SBBreakpointLocation:
+	def __init__(self, breakpoint):
+		self.breakpoint = breakpoint
+	def GetBreakpoint(self):
+		return self.breakpoint
+
+class SBTarget:
+	eBroadcastBitModulesUnloaded = 1 << 2
+
+	def __init__(self, program):
+		self.program = program
+		self.broadcaster = SBBroadcaster(self)
+		self.breakpoints = {}
+		self.next_id = 1
+		self.process = None
+	def __nonzero__(self):
+		return True
+	__bool__ = __nonzero__
+	def IsValid(self):
+		return True
+	def GetBroadcaster(self):
+		return self.broadcaster
+	def Launch(self, info, error):
+		_count('Launch')
+		self.process = SBProcess(self, 4242)
+		self.process.stdout = info.files.get(1)
+		return self.process
+	# The crashed thread (and so the crash stack) is picked by the core's name
+	def GetNumModules(self):
+		return len(MODULES)
+	def GetModuleAtIndex(self, index):
+		return MODULES[index]
+	def GetExecutable(self):
+		return SBFileSpec(self.program)
+	def RemoveModule(self, module):
+		_count('RemoveModule')
+		return True
+	def FindModule(self, spec):
+		_count('FindModule')
+		if os.path.join(spec.directory, spec.filename) == self.program:
+			executable = SBModuleSpec()
+			executable.SetFileSpec(spec)
+			return SBModule(executable)
+		for module in MODULES:
+			if module.spec.filename == spec.filename:
+				return module
+		return SBModule("", "")
+	def AddModule(self, path, triple, uuid):
+		return SBModule(os.path.basename(path), uuid)
+	def SetSectionLoadAddress(self, section, address):
+		return SBError()
+	def ResolveLoadAddress(self, address):
+		_count('ResolveLoadAddress')
+		return SBAddress(address)
+	def LoadCore(self, path):
+		_count('LoadCore')
+		self.process = SBProcess(self, 4242)
+		if self.process.threads:
+			crashed = self.process.threads[sum(bytearray(os.path.basename(path).encode('utf-8'))) % len(self.process.threads)]
+			crashed.reason = eStopReasonSignal
+			self.process.selected = crashed
+		return self.process
+	def AttachToProcessWithID(self, listener, pid, error):
+		self.process = SBProcess(self, pid)
+		self.process.broadcaster.AddListener(listener, SBProcess.eBroadcastBitStateChanged)
+		return self.process
+	def AttachToProcessWithName(self, listener, name, wait, error):
+		return self.AttachToProcessWithID(listener, 4242, error)
+	def BreakpointCreateByLocation(self, path, line):
+		_count('BreakpointCreateByLocation')
+		breakpoint = SBBreakpoint(self.next_id)
+		self.breakpoints[self.next_id] = breakpoint
+		self.next_id += 1
+		return breakpoint
+	def GetNumBreakpoints(self):
+		return len(self.breakpoints)
+	def GetBreakpointAtIndex(self, index):
+		return [self.breakpoints[id] for id in sorted(self.breakpoints)][index]
+	def FindBreakpointByID(self, id):
+		_count('FindBreakpointByID')
+		return self.breakpoints.get(id)
+	def BreakpointDelete(self, id):
+		_count('BreakpointDelete')
+		return self.breakpoints.pop(id, None) is not None
+	def DeleteAllBreakpoints(self):
+		self.breakpoints = {}
+		return True
+	def _unload(self, modules):
+		self.broadcaster._broadcast(SBEvent(SBTarget.eBroadcastBitModulesUnloaded, modules=modules))
+
+	@staticmethod
+	def EventIsTargetEvent(event):
+		return isinstance(event.broadcaster, SBTarget)
+	@staticmethod
+	def GetNumModulesFromEvent(event):
+		return len(event.modules)
+	@staticmethod
+	def GetModuleAtIndexFromEvent(index, event):
+		return event.modules[index]
+
+class SBStringList:
+	def __init__(self, strings):
+		self.strings = strings
+	def GetSize(self):
+		return len(self.strings)
+	def GetStringAtIndex(self, index):
+		return self.strings[index]
+
+# Debugger settings, shared by every debugger instance here
+settings = {'target.preload-symbols': 'true'}
+
+class SBDebugger:
+	@staticmethod
+	def Create():
+		return SBDebugger()
+	@staticmethod
+	def GetInternalVariableValue(name, instance):
+		return SBStringList([settings[name]] if name in settings else [])
+	@staticmethod
+	def SetInternalVariable(name, value, instance):
+		settings[name] = value
+		return SBError()
+	def GetInstanceName(self):
+		return "debugger_1"
+	def __init__(self):
+		self.targets = []
+		self.asynchronous = True
+	def Initialize(self):
+		pass
+	def GetAsync(self):
+		return self.asynchronous
+	def SetAsync(self, value):
+		self.asynchronous = value
+	def Terminate(self):
+		self.targets = []
+	def GetCommandInterpreter(self):
+		return SBCommandInterpreter()
+	def DeleteTarget(self, target):
+		_count('DeleteTarget')
+		if target in self.targets:
+			self.targets.remove(target)
+		return True
+	def CreateTarget(self, program, triple=None, platform=None, dependents=True, error=None):
+		_count('CreateTarget')
+		target = SBTarget(program)
+		self.targets.append(target)
+		return target
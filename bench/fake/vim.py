@@ -0,0 +1,309 @@
+#!/usr/bin/env python
+#
+# vim.py
+# Copyright (c) 2017 owl
+#
+
+# In-memory stand-in for vim's python module: buffers, windows, tabpages,
+# options, cursor, signs and the small set of ex commands/expressions the
+# plugin uses. Every call into the vim API is counted (see calls/reset()),
+# so renders can be measured and bounded headless.
+
+import os, re
+
+class error(Exception):
+	pass
+
+# Number of vim API calls made, per kind
+calls = {}
+
+def _count(kind):
+	calls[kind] = calls.get(kind, 0) + 1
+
+def reset():
+	calls.clear()
+
+def total():
+	return sum(calls.values())
+
+# Global variables, as seen through get(g:, 'name', default)
+vars = {}
+
+class Options(dict):
+	def __setitem__(self, key, value):
+		_count('option')
+		dict.__setitem__(self, key, value)
+
+class Buffer(object):
+	def __init__(self, number, name=""):
+		self.number = number
+		self.name = name
+		self.lines = [""]
+		self.options = Options(modifiable=True, modified=False, buftype='', swapfile=True)
+		self.valid = True
+		self.changedtick = 1
+		self.signs = {}		# sign id -> (line, name)
+
+	def _modify(self):
+		if not self.options['modifiable']:
+			raise error("E21: Cannot make changes, 'modifiable' is off")
+		self.changedtick += 1
+
+	def __len__(self):
+		return len(self.lines)
+
+	def __iter__(self):
+		return iter(self.lines)
+
+	def __getitem__(self, index):
+		return self.lines[index]
+
+	def __setitem__(self, index, value):
+		_count('buffer')
+		self._modify()
+		if isinstance(index, slice):
+			if value is None:
+				value = []
+			elif not isinstance(value, list):
+				value = [value]
+			self.lines[index] = list(value)
+		elif value is None:
+			del self.lines[index]
+		else:
+			self.lines[index] = value
+		if not self.lines:
+			self.lines = [""]
+
+	def __setslice__(self, start, end, value):
+		self.__setitem__(slice(start, end), value)
+
+	def __getslice__(self, start, end):
+		return self.lines[start:end]
+
+	def append(self, data, line=None):
+		_count('buffer')
+		self._modify()
+		data = data if isinstance(data, list) else [data]
+		if line is None:
+			line = len(self.lines)
+		self.lines[line:line] = data
+
+class Window(object):
+	def __init__(self, tabpage, buffer):
+		self.tabpage = tabpage
+		self.buffer = buffer
+		self._cursor = (1, 0)
+		self.options = Options()
+		self.valid = True
+		self.height = 16
+		self.width = 80
+
+	@property
+	def number(self):
+		return self.tabpage.windows.index(self) + 1
+
+	@property
+	def cursor(self):
+		return self._cursor
+
+	@cursor.setter
+	def cursor(self, value):
+		_count('cursor')
+		line, column = value
+		if line < 1 or line > len(self.buffer):
+			raise error("cursor position outside buffer")
+		self._cursor = (line, column)
+
+class Tabpage(object):
+	def __init__(self, buffer):
+		self.windows = [Window(self, buffer)]
+		self.window = self.windows[0]
+		self.valid = True
+
+	@property
+	def number(self):
+		return _state.tabpages.index(self) + 1
+
+class Current(object):
+	@property
+	def tabpage(self):
+		return _state.tab
+	@property
+	def window(self):
+		return _state.tab.window
+	@property
+	def buffer(self):
+		return _state.tab.window.buffer
+	@property
+	def line(self):
+		return self.buffer[self.window.cursor[0]-1]
+
+class Buffers(object):
+	def __init__(self):
+		self.items = {}
+	def __getitem__(self, number):
+		return self.items[number]
+	def __contains__(self, number):
+		return number in self.items
+	def __iter__(self):
+		return iter(self.items.values())
+	def __len__(self):
+		return len(self.items)
+
+class State:
+	def __init__(self):
+		self.next = 1
+		self.tabpages = []
+		self.tab = None
+
+_state = State()
+buffers = Buffers()
+current = Current()
+tabpages = _state.tabpages
+
+def _buffer(name=""):
+	buf = Buffer(_state.next, name)
+	_state.next += 1
+	buffers.items[buf.number] = buf
+	return buf
+
+def _find(name):
+	for buf in buffers:
+		if buf.name == name:
+			return buf
+	return None
+
+def _edit(name):
+	buf = _find(name) if name else None
+	if not buf:
+		buf = _buffer(name)
+		if name and os.path.isfile(name):
+			with open(name) as f:
+				buf.lines = f.read().split("\n") or [""]
+	current.window.buffer = buf
+	current.window._cursor = (1, 0)
+
+def _sign_buffer(args):
+	if 'buffer' in args:
+		return buffers[int(args['buffer'])]
+	if 'file' in args:
+		buf = _find(args['file'])
+		if not buf:
+			raise error("E158: Invalid buffer name: %s"%(args['file']))
+		return buf
+	return current.buffer
+
+def _sign(words):
+	if not words: return
+	args = dict(word.split('=', 1) for word in words[1:] if '=' in word)
+	if words[0] == 'place' and len(words) > 1 and words[1].isdigit():
+		buf = _sign_buffer(args)
+		id = int(words[1])
+		line = int(args['line']) if 'line' in args else buf.signs.get(id, (0,))[0]
+		buf.signs[id] = (line, args.get('name', ''))
+	elif words[0] == 'unplace' and len(words) > 1 and words[1].isdigit():
+		_sign_buffer(args).signs.pop(int(words[1]), None)
+
+def _call(text):
+	match = re.match(r'(\w+)\((.*)\)$', text)
+	if not match: return
+	name, args = match.groups()
+	if name == 'cursor':
+		line, column = [int(arg) for arg in args.split(',')]
+		current.window._cursor = (max(1, min(line, len(current.buffer))), max(column-1, 0))
+	elif name == 'matchdelete' or name == 'matchaddpos':
+		pass
+	elif name == 'timer_stop':
+		pass
+
+def _run(cmd):
+	cmd = cmd.strip().lstrip(':').strip()
+	silent = False
+	while True:
+		for prefix in ('silent! ', 'silent ', 'nos ', 'noswapfile '):
+			if cmd.startswith(prefix):
+				cmd = cmd[len(prefix):].strip()
+				silent = silent or prefix.startswith('silent!')
+				break
+		else:
+			break
+	if not cmd: return
+	words = cmd.split()
+	head = words[0]
+	try:
+		if cmd.isdigit():
+			current.window._cursor = (max(1, min(int(cmd), len(current.buffer))), 0)
+		elif head == 'call':
+			_call(cmd[len('call'):].strip())
+		elif head in ('e', 'edit'):
+			_edit(cmd.split(None, 1)[1] if len(words) > 1 else current.buffer.name)
+		elif head == 'enew':
+			_edit("")
+		elif head in ('b', 'buffer'):
+			current.window.buffer = buffers[int(words[1])]
+		elif head == 'tabe' or head == 'tabedit' or head == 'tabnew':
+			tab = Tabpage(_buffer())
+			_state.tabpages.append(tab)
+			_state.tab = tab
+		elif head in ('tab', 'tabnext') and len(words) > 1:
+			_state.tab = _state.tabpages[int(words[1])-1]
+		elif head == 'wincmd' or (len(words) > 2 and words[1] == 'wincmd'):
+			if words[0].isdigit():
+				_state.tab.window = _state.tab.windows[int(words[0])-1]
+		elif 'new' in words:
+			# [botright|above|...] new [name]: a window on a new (or named) buffer
+			window = Window(_state.tab, current.buffer)
+			index = _state.tab.windows.index(current.window)
+			_state.tab.windows.insert(index+1, window)
+			_state.tab.window = window
+			_edit(words[-1] if words[-1] != 'new' else "")
+		elif 'split' in words:
+			window = Window(_state.tab, current.buffer)
+			index = _state.tab.windows.index(current.window)
+			_state.tab.windows.insert(index+1, window)
+			_state.tab.window = window
+		elif head == 'sign':
+			_sign(words[1:])
+	except (KeyError, IndexError, ValueError, error) as err:
+		if not silent:
+			raise error(str(err))
+
+def command(cmd):
+	_count('command')
+	for part in cmd.split(' | '):
+		_run(part)
+
+def _signlist(buf):
+	lines = ["--- Signs ---", "Signs for %s:"%(buf.name)]
+	for id, (line, name) in sorted(buf.signs.items(), key=lambda item: item[1][0]):
+		lines.append("    line=%i  id=%i  name=%s"%(line, id, name))
+	return "\n".join(lines)
+
+def eval(expr):
+	_count('eval')
+	expr = expr.strip()
+	match = re.match(r"get\(g:,\s*'(\w+)',\s*(.*)\)$", expr)
+	if match:
+		name, default = match.groups()
+		if name in vars:
+			return str(vars[name])
+		return default.strip("'\"")
+	if re.match(r'''expand\(["']%:p["']\)$''', expr):
+		return current.buffer.name
+	if expr == 'b:changedtick':
+		return str(current.buffer.changedtick)
+	if expr == 'SDebugSignlistCurrent()':
+		return _signlist(current.buffer)
+	if expr.startswith('winwidth'):
+		return str(current.window.width)
+	if expr.startswith('winheight'):
+		return str(current.window.height)
+	if expr.isdigit():
+		return expr
+	return ""
+
+def _start():
+	tab = Tabpage(_buffer())
+	_state.tabpages.append(tab)
+	_state.tab = tab
+_start()
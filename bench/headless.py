@@ -0,0 +1,356 @@
+#!/usr/bin/env python
+#
+# headless.py
+# Copyright (c) 2017 owl
+#
+
+# Runs the plugin.py entry points without vim, on top of the in-memory vim
+# (fake/vim.py) and the synthetic lldb (fake/lldb.py). Reports the vim API
+# calls and time per operation, and fails when an operation makes more vim
+# calls than its budget.
+#
+#	python bench/headless.py [--threads 500] [--frames 100]
+
+import os, sys, time, argparse
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(HERE, '..', 'autoload', 'python')
+sys.path.insert(0, os.path.join(ROOT, 'controller'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(HERE, 'fake'))
+
+import lldb, vim
+
+# Upper bound of vim API calls per operation. Budgets are added up from what
+# an operation has to do in vim, not from measured counts, so a regression
+# shows up as a step that shouldn't be there rather than as any change.
+SWITCH = 1		# go to a view's window which isn't the current one
+CURSOR = 1		# set the cursor from python
+HIGHLIGHT = 1	# cursor and highlighted line of a list, one command
+RENDER = 4		# 'modifiable' off and on around up to two changed line ranges
+CLEAR = 2		# 'modifiable' off and emptying the buffer
+APPEND = 5		# 'modifiable' off and on, append, trim past the limit, follow
+OPEN = 5		# :e of a view's buffer, one mapping, 'modifiable', 'buftype', 'swapfile'
+MAPPING = 1		# each further mapping of a view
+HEIGHT = 1		# winheight() of a view
+SOURCE = 3		# source window: switch to it, :buffer the file, pc sign and cursor
+LINE_INFO = 1	# file and line under the cursor, one eval
+SIGN = 1		# place or remove a sign
+SIGN_TEXT = 2	# define a sign's text and place it
+
+# A stop renders the backtrace (the old and new selected thread are the two
+# changed ranges), resets its cursor and shows the selected frame's source
+STOP = SWITCH + RENDER + HIGHLIGHT + CURSOR + SOURCE
+# Navigating the backtrace: cursor placed by the op, the list re-rendered
+NAVIGATE = SWITCH + CURSOR + RENDER + HIGHLIGHT
+
+BUDGET = {
+	'stop': STOP,
+	'step': STOP,
+	'fold': NAVIGATE,
+	'unfold': NAVIGATE,
+	'aggregate': SWITCH + RENDER + HIGHLIGHT,
+	'stop_aggregated': STOP,
+	'unfold_group': NAVIGATE,
+	# Opened in the current window; rendered without switching
+	'variables': OPEN + RENDER,
+	'variables_expand': CURSOR + RENDER,
+	'variables_page': CURSOR + RENDER,
+	'memory': OPEN + MAPPING + HEIGHT + RENDER,
+	'memory_scroll': HEIGHT + RENDER,
+	# The finished run clears the backtrace, so may the running state the
+	# sampler passes on; then the call tree view is opened
+	'samples': 2*CLEAR + OPEN + RENDER,
+	'console': APPEND + CLEAR,
+	'buffer_enter': LINE_INFO + SIGN,
+	'breakpoint_toggle': 2*(LINE_INFO + SIGN),
+	'breakpoint_condition': LINE_INFO + SIGN,
+	# Backtrace, variables and memory are cleared, and refreshed at the
+	# first stop along with the backtrace and source
+	'restart': 3*CLEAR + STOP + (SWITCH + RENDER) + (HEIGHT + SWITCH + RENDER),
+	# One batch of output, one tracepoint's hit count sign
+	'trace': SIGN_TEXT + APPEND,
+}
+
+class Session:
+	def __init__(self):
+		import plugin
+		self.plugin = plugin
+		self.ctrl = None
+
+	def launch(self):
+		# Same sequence as SDebug#Launch()
+		vim.command("tabe")
+		self.plugin.OpenViewSource()
+		vim.command("below 16 split")
+		self.plugin.OpenViewBacktrace()
+		self.plugin.Launch()
+		self.ctrl = self.plugin.ctrl
+
+	def run(self):
+		self.plugin.Run("/bin/fake")
+
+	def wait(self, events):
+		deadline = time.time() + 5
+		while self.ctrl.listener.events.qsize() < events:
+			if time.time() > deadline:
+				raise RuntimeError("timeout waiting for debugger events")
+			time.sleep(0.001)
+
+	# Operations; return after vim has applied every resulting change
+	def op_stop(self):
+		self.ctrl.process.Stop()
+		self.wait(1)
+		self.plugin.Poll()
+
+	def op_step(self):
+		self.plugin.StepOver()
+		self.wait(2)
+		self.plugin.Poll()
+
+	def backtrace_row(self, kind):
+		view_bt = self.plugin.view_bt
+		for line, item in sorted(view_bt.View.model.sources.items()):
+			leader = item.threads[0] if isinstance(item, self.plugin.model_bt.Group) else item
+			if isinstance(item, kind) and not getattr(leader, 'default', False):
+				return line
+		raise RuntimeError("no backtrace row to navigate")
+
+	def op_unfold(self):
+		view_bt = self.plugin.view_bt
+		view_bt.View.link.switch_to()
+		view_bt.View.link.tab.window.vim.cursor = (self.backtrace_row(self.plugin.model_bt.Thread), 0)
+		self.plugin.BacktraceNavigate()
+
+	def op_fold(self):
+		self.op_unfold()
+
+	def op_aggregate(self):
+		self.plugin.BacktraceAggregate()
+
+	def op_stop_aggregated(self):
+		self.op_stop()
+
+	def op_unfold_group(self):
+		view_bt = self.plugin.view_bt
+		view_bt.View.link.switch_to()
+		view_bt.View.link.tab.window.vim.cursor = (self.backtrace_row(self.plugin.model_bt.Group), 0)
+		self.plugin.BacktraceNavigate()
+
+	# Applying a finished sampling run: symbolication and the call tree view
+	def op_samples(self):
+		self.plugin.Poll()
+
+	def sample(self):
+		self.plugin.Sample(200, 0.2)
+		self.ctrl.sampler.join()
+		self.wait(1)
+
+	# Relaunch an unchanged program and apply its first stop
+	def op_restart(self):
+		self.plugin.Restart()
+		self.ctrl.process.Stop()
+		self.wait(1)
+		self.plugin.Poll()
+
+	def op_buffer_enter(self):
+		self.plugin.BufferLoad()
+
+	def variables_row(self, kind):
+		view_var = self.plugin.view_var
+		for line, item in sorted(view_var.View.model.sources.items()):
+			if isinstance(item, kind):
+				return line
+		raise RuntimeError("no variables row to navigate")
+
+	def op_variables(self):
+		self.plugin.OpenViewVariables()
+
+	def op_variables_expand(self):
+		view_var = self.plugin.view_var
+		view_var.View.link.tab.window.vim.cursor = (self.variables_row(self.plugin.model_var.Variable), 0)
+		self.plugin.VariablesNavigate()
+
+	def op_variables_page(self):
+		view_var = self.plugin.view_var
+		view_var.View.link.tab.window.vim.cursor = (self.variables_row(self.plugin.model_var.Page), 0)
+		self.plugin.VariablesNavigate()
+
+	# Memory view over the heap; scrolling reads only the next window of pages
+	def op_memory(self):
+		self.plugin.OpenViewMemory("0x10000000")
+
+	def op_memory_scroll(self):
+		self.plugin.MemoryScroll(1)
+
+	# A burst of output far larger than the console keeps; one batch per poll
+	def op_console(self):
+		console = self.plugin.console
+		self.ctrl.process._write(["line %i"%(index) for index in range(50000)])
+		deadline = time.time() + 5
+		while console.partial or not console.pending() or console.lines[-1] != "line 49999":
+			if time.time() > deadline:
+				raise RuntimeError("timeout waiting for program output")
+			time.sleep(0.001)
+		self.plugin.Poll()
+
+	# A hot loop through a tracepoint; one batch of output and sign text per poll
+	def op_trace(self):
+		self.ctrl.process._trace(50000)
+		self.plugin.Poll()
+
+	def tracepoint(self):
+		self.plugin.BreakpointToggle('', '', "i={i} node={node->next}")
+
+	# Filters are set inside lldb; only the sign changes in vim
+	def op_breakpoint_condition(self):
+		self.plugin.BreakpointOptions("i == 10000", 100, -1)
+
+	def op_breakpoint_toggle(self):
+		self.plugin.BreakpointToggle()
+		self.plugin.BreakpointToggle()
+
+	# Rows patched from the model's delta must read like a render from scratch
+	def check_backtrace(self):
+		view_bt = self.plugin.view_bt
+		patched = list(view_bt.View.link.tab.window.buffer.vim)
+		view_bt.View.keys = None
+		view_bt.View.model.changed = True
+		view_bt.View.render()
+		if list(view_bt.View.link.tab.window.buffer.vim) != patched:
+			raise RuntimeError("patched backtrace differs from a full render")
+
+	def measure(self, name, setup=None):
+		if setup: setup()
+		vim.reset()
+		start = time.time()
+		getattr(self, 'op_'+name)()
+		return (time.time() - start) * 1000.0, vim.total(), dict(vim.calls)
+
+	def close(self):
+		listener = self.ctrl.listener
+		self.plugin.Quit()
+		if listener:
+			listener.join()
+
+def main():
+	parser = argparse.ArgumentParser(description="headless superdebug render checks")
+	parser.add_argument('--threads', type=int, default=500)
+	parser.add_argument('--frames', type=int, default=100)
+	args = parser.parse_args()
+	lldb.configure(threads=args.threads, frames=args.frames)
+
+	stdout = sys.stdout
+	sys.stdout = open(os.devnull, 'w')	# the controller prints state changes
+	try:
+		session = Session()
+		session.launch()
+		# A snapshot browsed before running must not stand in for the process
+		session.plugin.Snapshot(4242)
+		offline = session.ctrl.target
+		if not session.ctrl.snap:
+			raise RuntimeError("snapshot was not taken")
+		session.run()
+		resolved = lldb.calls.get('ResolveLoadAddress', 0)
+		results = []
+		results.append(('stop',) + session.measure('stop'))
+		if session.ctrl.snap or offline in session.ctrl.dbg.targets or lldb.calls.get('ResolveLoadAddress', 0) != resolved:
+			raise RuntimeError("the snapshot was still shown after run")
+		results.append(('step',) + session.measure('step'))
+		results.append(('unfold',) + session.measure('unfold'))
+		results.append(('fold',) + session.measure('fold'))
+		session.check_backtrace()
+		results.append(('aggregate',) + session.measure('aggregate'))
+		results.append(('stop_aggregated',) + session.measure('stop_aggregated'))
+		results.append(('unfold_group',) + session.measure('unfold_group'))
+		# Stepping moved the selected thread away from its stack
+		if len(session.plugin.model_bt.Model.groups) > lldb.workload['stacks'] + 1:
+			raise RuntimeError("identical stacks were not grouped")
+		session.plugin.BacktraceAggregate()
+
+		# Expressions whose inputs kept their values aren't evaluated again,
+		# unless an input is a struct whose members may have changed
+		session.ctrl.watch_add("limit * 2")
+		session.ctrl.watch_add("node == limit")
+		evaluated = lldb.calls.get('EvaluateExpression', 0)
+		session.op_step()
+		if lldb.calls.get('EvaluateExpression', 0) - evaluated != 1:
+			raise RuntimeError("watches were not evaluated again by their inputs")
+		session.ctrl.watch_remove(1)
+		session.ctrl.watch_remove(0)
+
+		# The first local is a large vector; expanding it reads one page
+		vim.command("below 8 split")
+		results.append(('variables',) + session.measure('variables'))
+		results.append(('variables_expand',) + session.measure('variables_expand'))
+		results.append(('variables_page',) + session.measure('variables_page'))
+		# Children are only counted up to the loaded pages
+		rows = [line for line in session.plugin.view_var.View.link.tab.window.buffer.vim if "next page" in line]
+		if not rows or not rows[0].endswith("(200 of 200+)"):
+			raise RuntimeError("container children were not counted up to the page limit")
+
+		vim.command("below 16 split")
+		results.append(('memory',) + session.measure('memory'))
+		results.append(('memory_scroll',) + session.measure('memory_scroll'))
+		rows = len(session.plugin.view_mem.View.link.tab.window.buffer.vim)
+		if rows != session.plugin.view_mem.View.rows() or not session.plugin.view_mem.View.link.tab.window.buffer.vim[0].startswith("0x"):
+			raise RuntimeError("memory view was not rendered")
+
+		results.append(('samples',) + session.measure('samples', session.sample))
+		if not session.plugin.model_samples.Model.samples:
+			raise RuntimeError("no samples were taken")
+
+		vim.command("below 10 split")
+		session.plugin.OpenViewConsole()
+		results.append(('console',) + session.measure('console'))
+		if len(session.plugin.view_con.View.link.tab.window.buffer.vim) > session.plugin.view_con.View.limit:
+			raise RuntimeError("console buffer grew past its limit")
+
+		# Breakpoints act on the current source buffer
+		def open_source():
+			vim.command(":silent e /src/fake/stack0.cpp")
+			vim.current.buffer[:] = ["" for _ in range(200)]
+			vim.current.window.cursor = (42, 0)
+		results.append(('breakpoint_toggle',) + session.measure('breakpoint_toggle', open_source))
+		session.plugin.BreakpointToggle()
+		results.append(('breakpoint_condition',) + session.measure('breakpoint_condition'))
+		breakpoint = session.ctrl.target.FindBreakpointByID(session.plugin.model_bp.Model.get("/src/fake/stack0.cpp", 42).id)
+		if breakpoint.condition != "i == 10000" or not breakpoint.thread:
+			raise RuntimeError("breakpoint filters were not set in the debugger")
+		session.plugin.BufferLoad()
+		results.append(('buffer_enter',) + session.measure('buffer_enter'))
+
+		created = lldb.calls.get('CreateTarget', 0)
+		results.append(('restart',) + session.measure('restart'))
+		if lldb.calls.get('CreateTarget', 0) != created or not session.ctrl.target.GetNumBreakpoints():
+			raise RuntimeError("restart did not reuse the target")
+
+		vim.command("below 10 split")
+		session.plugin.OpenViewTrace()
+		vim.command("above split")
+		vim.command(":silent e /src/fake/stack0.cpp")
+		vim.current.window.cursor = (60, 0)
+		results.append(('trace',) + session.measure('trace', session.tracepoint))
+		if session.plugin.model_bp.Model.get("/src/fake/stack0.cpp", 60).hits != 50000:
+			raise RuntimeError("tracepoint hits were not counted")
+		if session.ctrl.pending():
+			raise RuntimeError("tracepoint stopped the process")
+		session.close()
+	finally:
+		sys.stdout = stdout
+
+	print("%i threads x %i frames"%(args.threads, args.frames))
+	print("%-20s %9s %9s %9s  %s"%("operation", "ms", "vim calls", "budget", "by kind"))
+	failed = []
+	for name, elapsed, count, kinds in results:
+		budget = BUDGET[name]
+		detail = " ".join("%s=%i"%(kind, kinds[kind]) for kind in sorted(kinds))
+		print("%-20s %9.2f %9i %9i  %s"%(name, elapsed, count, budget, detail))
+		if count > budget:
+			failed.append(name)
+	if failed:
+		print("over budget: "+", ".join(failed))
+		return 1
+	return 0
+
+if __name__ == '__main__':
+	sys.exit(main())
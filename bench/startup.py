@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+#
+# startup.py 
+# Copyright (c) 2017 owl
+#
+
+# Startup cost of the lldb module lookup, with and without the cached
+# 'lldb -P' path (see controller/import_lldb.py). Every sample runs in a
+# fresh interpreter so nothing is shared between runs.
+#
+#	python bench/startup.py [runs]
+
+import os, sys, shutil, subprocess, tempfile, time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'autoload', 'python')
+CONTROLLER = os.path.join(ROOT, 'controller')
+
+def sample(code, env):
+	start = time.time()
+	subprocess.check_call([sys.executable, '-c', code], env=env)
+	return (time.time() - start) * 1000.0
+
+def median(values):
+	values = sorted(values)
+	return values[len(values)//2]
+
+def main():
+	runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+	cache = tempfile.mkdtemp(prefix='sdebug_bench')
+	env = dict(os.environ)
+	env['XDG_CACHE_HOME'] = cache
+	env['PYTHONPATH'] = os.pathsep.join([CONTROLLER, ROOT])
+	lookup = "import sys, import_lldb; sys.exit(0 if 'lldb' in sys.modules else 1)"
+
+	try:
+		try:
+			sample(lookup, env)
+		except subprocess.CalledProcessError:
+			print("lldb python module not found; nothing to measure")
+			return 1
+
+		cold = []
+		for _ in range(runs):
+			shutil.rmtree(os.path.join(cache, 'superdebug'), True)
+			cold.append(sample(lookup, env))
+		warm = [sample(lookup, env) for _ in range(runs)]
+		plugin = [sample("import model.backtrace, model.breakpoint, model.source, controller.remote", env) for _ in range(runs)]
+	finally:
+		shutil.rmtree(cache, True)
+
+	print("%-34s %8.1f ms"%("lldb lookup, 'lldb -P' (cold)", median(cold)))
+	print("%-34s %8.1f ms"%("lldb lookup, cached path (warm)", median(warm)))
+	print("%-34s %8.1f ms"%("plugin load, lldb deferred", median(plugin)))
+	return 0
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -7,7 +7,26 @@ endif
 
 command! SDebugLaunch call SDebug#Launch()
 command! SDebugQuit call SDebug#Quit()
+command! SDebugRestart call SDebug#Restart()
 command! SDebugBreakpointToggle call SDebug#BreakpointToggle()
+command! -nargs=? SDebugBreakpointCondition call SDebug#BreakpointCondition(<q-args>)
+command! -nargs=1 SDebugBreakpointIgnore call SDebug#BreakpointIgnore(<f-args>)
+command! -nargs=? SDebugBreakpointThread call SDebug#BreakpointThread(<f-args>)
+command! SDebugVariables call SDebug#Variables()
+command! -nargs=1 SDebugMemory call SDebug#Memory(<q-args>)
+command! SDebugConsole call SDebug#Console()
+command! SDebugWatches call SDebug#Watches()
+command! -nargs=1 SDebugWatch call SDebug#WatchAdd(<q-args>)
+command! SDebugTrace call SDebug#Trace()
+command! -nargs=1 SDebugTracepoint call SDebug#TracepointToggle(<q-args>)
+command! -nargs=+ -complete=file SDebugLoadCore call SDebug#LoadCore(<f-args>)
+command! -nargs=+ -complete=file SDebugTriage call SDebug#Triage(<f-args>)
+command! SDebugBacktraceAggregate call SDebug#BacktraceAggregate()
+command! -nargs=+ SDebugSample call SDebug#Sample(<f-args>)
+command! -nargs=1 -complete=file SDebugSampleExport call SDebug#SamplesExport(<f-args>)
+command! -nargs=1 SDebugSnapshot call SDebug#Snapshot(<q-args>)
+command! SDebugProfile call SDebug#Profile()
+command! -nargs=1 -complete=file SDebugProfileDump call SDebug#ProfileDump(<f-args>)
 
 silent nnoremap <Leader>s :SDebugLaunch<CR>
 silent nnoremap <Leader>\ :SDebugBreakpointToggle<CR>